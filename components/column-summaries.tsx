@@ -9,6 +9,8 @@ import { API_BASE_URL } from '@/lib/constants'
 interface ColumnSummariesProps {
   analysis: Record<string, any>
   columns: string[]
+  // Histograms and top-k counts stored with the dataset, see /api/summaries
+  summaries?: Record<string, any>
 }
 
 interface ColumnSummary {
@@ -23,17 +25,44 @@ interface ColumnSummary {
     std?: number
     min?: number
     max?: number
+    approximate?: string[]
   }
   chartUrl?: string
 }
 
-export default function ColumnSummaries({ analysis, columns }: ColumnSummariesProps) {
+export default function ColumnSummaries({ analysis, columns, summaries: stored = {} }: ColumnSummariesProps) {
   const summaries: ColumnSummary[] = columns.map(col => {
     const stats = analysis[col] || {}
+    const summary = stored[col]
 
-    // Generate distribution chart for numeric columns
+    // Generate distribution chart: the stored histogram / top values, else the basic stats
     let chartUrl = ''
-    if (stats.mean && stats.min !== undefined && stats.max !== undefined) {
+    if (summary && (summary.bins?.length || summary.top?.length)) {
+      const isTop = summary.kind === 'categorical'
+      const chartConfig = {
+        type: 'bar',
+        data: {
+          labels: isTop
+            ? summary.top.map((t: any) => String(t.value).substring(0, 12))
+            : summary.bins.map((b: any) => summary.kind === 'numeric' ? Number(b.start).toFixed(1) : String(b.start).substring(0, 10)),
+          datasets: [{
+            label: isTop ? `${col} Top Values` : `${col} Distribution`,
+            data: isTop ? summary.top.map((t: any) => t.count) : summary.bins.map((b: any) => b.count),
+            backgroundColor: '#3b82f6'
+          }]
+        },
+        options: {
+          title: {
+            display: true,
+            text: isTop ? `${col} Top Values` : `${col} Histogram`,
+            fontSize: 12
+          },
+          legend: { display: false }
+        }
+      }
+
+      chartUrl = `${API_BASE_URL}/chart?c=${encodeURIComponent(JSON.stringify(chartConfig))}&w=300&h=200&f=png`
+    } else if (stats.mean && stats.min !== undefined && stats.max !== undefined) {
       const chartConfig = {
         type: 'bar',
         data: {
@@ -122,7 +151,9 @@ export default function ColumnSummaries({ analysis, columns }: ColumnSummariesPr
                 {stats.unique !== undefined && (
                   <div className="flex justify-between text-muted-foreground">
                     <span>Unique:</span>
-                    <span className="font-semibold text-foreground">{stats.unique}</span>
+                    <span className="font-semibold text-foreground">
+                      {stats.approximate?.includes('unique') ? '≈ ' : ''}{stats.unique}
+                    </span>
                   </div>
                 )}
 
@@ -154,7 +185,9 @@ export default function ColumnSummaries({ analysis, columns }: ColumnSummariesPr
                 {stats.median !== undefined && (
                   <div className="flex justify-between text-muted-foreground">
                     <span>Median:</span>
-                    <span className="font-mono text-foreground">{Number(stats.median).toFixed(2)}</span>
+                    <span className="font-mono text-foreground">
+                      {stats.approximate?.includes('median') ? '≈ ' : ''}{Number(stats.median).toFixed(2)}
+                    </span>
                   </div>
                 )}
 
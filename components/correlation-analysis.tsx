@@ -1,6 +1,7 @@
 'use client'
 
-import { useMemo } from 'react'
+import { useEffect, useMemo, useState } from 'react'
+import axios from 'axios'
 import { Card } from '@/components/ui/card'
 import { AlertCircle, BarChart3 } from 'lucide-react'
 import { API_BASE_URL } from '@/lib/constants'
@@ -8,10 +9,40 @@ import { API_BASE_URL } from '@/lib/constants'
 interface CorrelationAnalysisProps {
   data: any[]
   columns: string[]
+  uploadId?: string
 }
 
-export default function CorrelationAnalysis({ data, columns }: CorrelationAnalysisProps) {
+const strengthOf = (corr: number) => Math.abs(corr) > 0.9 ? 'Very Strong' : 'Strong'
+
+export default function CorrelationAnalysis({ data, columns, uploadId }: CorrelationAnalysisProps) {
+  // Correlations over the whole dataset; the preview rows are only a fallback
+  const [server, setServer] = useState<any | null>(null)
+  useEffect(() => {
+    setServer(null)
+    if (!uploadId) return
+    let cancelled = false
+    const token = localStorage.getItem('quickcharts_token')
+    axios.get(`${API_BASE_URL}/api/correlations/${uploadId}`, {
+      params: { threshold: 0.7, top_k: 50 },
+      headers: { Authorization: `Bearer ${token}` }
+    })
+      .then(response => { if (!cancelled) setServer(response.data) })
+      .catch(e => console.error('Correlation request failed', e))
+    return () => { cancelled = true }
+  }, [uploadId, data])
+
   const { correlationMatrix, strongPairs } = useMemo(() => {
+    if (server && server.columns.length >= 2) {
+      const cols: string[] = server.columns
+      return {
+        correlationMatrix: cols.map((col1, i) => {
+          const row: any = { column: col1 }
+          cols.forEach((col2, j) => { row[col2] = server.matrix[i][j] ?? 0 })
+          return row
+        }),
+        strongPairs: server.pairs.map((pair: any) => ({ ...pair, strength: strengthOf(pair.correlation) })),
+      }
+    }
     if (!data || data.length === 0) return { correlationMatrix: [], strongPairs: [] }
 
     // Get numeric columns
@@ -38,7 +69,7 @@ export default function CorrelationAnalysis({ data, columns }: CorrelationAnalys
             col1,
             col2,
             correlation: corr,
-            strength: Math.abs(corr) > 0.9 ? 'Very Strong' : 'Strong',
+            strength: strengthOf(corr),
           })
         }
       })
@@ -49,7 +80,7 @@ export default function CorrelationAnalysis({ data, columns }: CorrelationAnalys
       correlationMatrix: matrix,
       strongPairs: pairs.sort((a, b) => Math.abs(b.correlation) - Math.abs(a.correlation))
     }
-  }, [data, columns])
+  }, [server, data, columns])
 
   // Generate correlation heatmap with QuickChart
   const heatmapUrl = useMemo(() => {
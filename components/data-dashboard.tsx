@@ -148,6 +148,9 @@ export default function DataDashboard({ data, fileName, onDataUpdate }: DataDash
     return []
   }, [data])
 
+  // rows is only the first page, the metadata has the size of the whole dataset
+  const rowCount: number = data.metadata?.rows ?? rows.length
+
   const analysis = useMemo(() => {
     return data.analysis || {}
   }, [data])
@@ -160,7 +163,7 @@ export default function DataDashboard({ data, fileName, onDataUpdate }: DataDash
   const overviewCharts = useMemo(() => {
     const qualityScore = dataQuality.quality_score || 0
     const missingPercent = dataQuality.missing_count ?
-      Math.round((dataQuality.missing_count / (rows.length * columns.length)) * 100) : 0
+      Math.round((dataQuality.missing_count / (rowCount * columns.length)) * 100) : 0
 
     const qualityChart = {
       type: 'doughnut',
@@ -200,7 +203,7 @@ export default function DataDashboard({ data, fileName, onDataUpdate }: DataDash
       qualityUrl: `${API_BASE_URL}/chart?c=${encodeURIComponent(JSON.stringify(qualityChart))}&w=200&h=200&f=png`,
       missingUrl: `${API_BASE_URL}/chart?c=${encodeURIComponent(JSON.stringify(missingChart))}&w=200&h=200&f=png`
     }
-  }, [dataQuality, rows.length, columns.length])
+  }, [dataQuality, rowCount, columns.length])
 
   // Enhanced AI Data Story
   const dataStory = useMemo(() => {
@@ -209,11 +212,11 @@ export default function DataDashboard({ data, fileName, onDataUpdate }: DataDash
     
     return {
       title: `Dataset ${health}`,
-      summary: `Your dataset contains ${rows.length.toLocaleString()} records. The overall data integrity is rated as ${health.toLowerCase()} with a ${Math.round(qScore * 100)}% quality score.`,
+      summary: `Your dataset contains ${rowCount.toLocaleString()} records. The overall data integrity is rated as ${health.toLowerCase()} with a ${Math.round(qScore * 100)}% quality score.`,
       highlight: columns.length > 5 ? "High dimensionality detected." : "Compact dataset structure.",
       readiness: qScore > 0.7 ? "Ready for final visualization." : "Cleaning recommended for better accuracy."
     }
-  }, [dataQuality, rows.length, columns.length])
+  }, [dataQuality, rowCount, columns.length])
 
   const handleShare = async () => {
     if (!data.upload_id) return
@@ -279,7 +282,7 @@ export default function DataDashboard({ data, fileName, onDataUpdate }: DataDash
           fileName={fileName}
           fileSize={data.file_size}
           uploadedAt={data.uploaded_at}
-          rowCount={rows.length}
+          rowCount={rowCount}
           columnCount={columns.length}
         />
       </div>
@@ -435,7 +438,7 @@ export default function DataDashboard({ data, fileName, onDataUpdate }: DataDash
                 <p className="text-sm text-muted-foreground font-medium">Dataset Dimensions</p>
                 <div className="grid grid-cols-2 gap-4 text-center">
                   <div>
-                    <p className="text-2xl font-bold text-primary">{rows.length.toLocaleString()}</p>
+                    <p className="text-2xl font-bold text-primary">{rowCount.toLocaleString()}</p>
                     <p className="text-xs text-muted-foreground">Rows</p>
                   </div>
                   <div>
@@ -447,13 +450,13 @@ export default function DataDashboard({ data, fileName, onDataUpdate }: DataDash
             </Card>
           </div>
 
-          <ColumnSummaries analysis={analysis} columns={columns} />
+          <ColumnSummaries analysis={analysis} columns={columns} summaries={data.summaries} />
         </TabsContent>
 
         {/* Preview Tab */}
         <TabsContent value="preview" className="mt-6">
           <Card className="bg-white border-gray-200 shadow-sm overflow-hidden rounded-xl">
-            <DataPreviewTable rows={rows} columns={columns} />
+            <DataPreviewTable rows={rows} columns={columns} uploadId={data.upload_id} totalRows={data.metadata?.rows} />
           </Card>
         </TabsContent>
 
@@ -490,6 +493,7 @@ export default function DataDashboard({ data, fileName, onDataUpdate }: DataDash
             <CorrelationAnalysis
               data={rows}
               columns={columns}
+              uploadId={data.upload_id}
             />
           </div>
         </TabsContent>
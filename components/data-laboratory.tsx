@@ -7,7 +7,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@
 import { Input } from '@/components/ui/input'
 import { API_BASE_URL } from '@/lib/constants'
 import axios from 'axios'
-import { Calculator, Type, Hash, Calendar, Loader2, Sparkles, Undo2, Plus } from 'lucide-react'
+import { Calculator, Type, Hash, Calendar, Loader2, Sparkles, Undo2, Redo2, Plus } from 'lucide-react'
 import { toast } from 'sonner'
 
 interface DataLaboratoryProps {
@@ -28,6 +28,7 @@ export default function DataLaboratory({ uploadId, columns, analysis, onDataUpda
 
   const [isSmartCleaning, setIsSmartCleaning] = useState(false)
   const [isUndoing, setIsUndoing] = useState(false)
+  const [isRedoing, setIsRedoing] = useState(false)
 
   const handleCalculate = async () => {
     if (!newColName || !expression || !uploadId) return
@@ -93,6 +94,19 @@ export default function DataLaboratory({ uploadId, columns, analysis, onDataUpda
     }
   }
 
+  const handleRedo = async () => {
+    setIsRedoing(true)
+    try {
+      const response = await axios.get(`${API_BASE_URL}/api/redo/${uploadId}`)
+      onDataUpdateAction(response.data)
+      toast.success("Action re-applied")
+    } catch (e: any) {
+      toast.error("Nothing to redo")
+    } finally {
+      setIsRedoing(false)
+    }
+  }
+
   return (
     <div className="space-y-6">
       <div className="flex justify-between items-center bg-muted/30 p-4 rounded-xl border border-border/50">
@@ -113,6 +127,15 @@ export default function DataLaboratory({ uploadId, columns, analysis, onDataUpda
             {isUndoing ? <Loader2 className="w-4 h-4 animate-spin mr-2" /> : <Undo2 className="w-4 h-4 mr-2" />}
             Undo
           </Button>
+          <Button 
+            variant="outline" 
+            size="sm" 
+            onClick={handleRedo}
+            disabled={isRedoing}
+          >
+            {isRedoing ? <Loader2 className="w-4 h-4 animate-spin mr-2" /> : <Redo2 className="w-4 h-4 mr-2" />}
+            Redo
+          </Button>
           <Button 
             variant="default" 
             size="sm" 
@@ -1,6 +1,7 @@
 'use client'
 
-import { useState, useMemo } from 'react'
+import { useState, useMemo, useEffect } from 'react'
+import axios from 'axios'
 import { 
   Search, 
   ArrowUpDown, 
@@ -45,6 +46,9 @@ import { Tooltip, TooltipContent, TooltipProvider, TooltipTrigger } from '@/comp
 interface DataPreviewTableProps {
   rows: any[]
   columns: string[]
+  // When set and the dataset has more rows than the preview, pages are read from /api/rows
+  uploadId?: string
+  totalRows?: number
 }
 
 type SortConfig = {
@@ -52,13 +56,17 @@ type SortConfig = {
   direction: 'asc' | 'desc' | null
 }
 
-export default function DataPreviewTable({ rows, columns }: DataPreviewTableProps) {
+export default function DataPreviewTable({ rows, columns, uploadId, totalRows }: DataPreviewTableProps) {
   // State
   const [searchTerm, setSearchTerm] = useState('')
   const [sortConfig, setSortConfig] = useState<SortConfig>({ key: null, direction: null })
   const [currentPage, setCurrentPage] = useState(1)
   const [pageSize, setPageSize] = useState(10)
   const [visibleColumns, setVisibleColumns] = useState<string[]>(columns)
+  const [serverRows, setServerRows] = useState<any[] | null>(null)
+
+  // Search still runs over the preview rows; plain browsing and sorting page through the whole dataset
+  const serverPaging = !!uploadId && (totalRows ?? 0) > rows.length && !searchTerm
 
   // Handlers
   const handleSort = (column: string) => {
@@ -106,11 +114,37 @@ export default function DataPreviewTable({ rows, columns }: DataPreviewTableProp
     })
   }, [filteredRows, sortConfig])
 
-  const totalPages = Math.ceil(sortedRows.length / pageSize)
+  useEffect(() => {
+    if (!serverPaging) {
+      setServerRows(null)
+      return
+    }
+    let cancelled = false
+    const params: Record<string, string | number | boolean> = {
+      offset: (currentPage - 1) * pageSize,
+      limit: pageSize,
+    }
+    if (sortConfig.key && sortConfig.direction) {
+      params.sort = sortConfig.key
+      params.desc = sortConfig.direction === 'desc'
+    }
+    const token = localStorage.getItem('quickcharts_token')
+    axios.get(`${API_BASE_URL}/api/rows/${uploadId}`, { params, headers: { Authorization: `Bearer ${token}` } })
+      .then(response => { if (!cancelled) setServerRows(response.data.rows) })
+      .catch(e => console.error('Failed to load rows', e))
+    return () => { cancelled = true }
+  }, [serverPaging, uploadId, currentPage, pageSize, sortConfig])
+
+  const rowCount = serverPaging ? totalRows! : sortedRows.length
+  const totalPages = Math.ceil(rowCount / pageSize)
   const paginatedRows = useMemo(() => {
     const start = (currentPage - 1) * pageSize
+    if (serverPaging) {
+      // The preview already holds the unsorted first pages, use it until the window arrives
+      return serverRows ?? (sortConfig.direction ? [] : rows.slice(start, start + pageSize))
+    }
     return sortedRows.slice(start, start + pageSize)
-  }, [sortedRows, currentPage, pageSize])
+  }, [serverPaging, serverRows, rows, sortedRows, sortConfig, currentPage, pageSize])
 
   // Chart Generation logic (Memozied)
   const columnCharts = useMemo(() => {
@@ -346,7 +380,7 @@ export default function DataPreviewTable({ rows, columns }: DataPreviewTableProp
       <div className="flex flex-col md:flex-row items-center justify-between gap-4 bg-muted/20 p-4 rounded-lg border border-border/30">
         <div className="flex flex-col gap-1">
           <p className="text-sm font-medium">
-            Showing {Math.min(paginatedRows.length, (currentPage - 1) * pageSize + 1)} - {Math.min(currentPage * pageSize, sortedRows.length)} of {sortedRows.length.toLocaleString()} rows
+            Showing {Math.min(paginatedRows.length, (currentPage - 1) * pageSize + 1)} - {Math.min(currentPage * pageSize, rowCount)} of {rowCount.toLocaleString()} rows
           </p>
           <p className="text-[10px] text-muted-foreground">
             Total Columns: {columns.length} ({visibleColumns.length} visible)
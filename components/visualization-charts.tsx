@@ -1,6 +1,7 @@
 'use client'
 
-import { useState, useMemo } from 'react'
+import { useState, useMemo, useEffect } from 'react'
+import axios from 'axios'
 import { Download, FileImage, Image as ImageIcon } from 'lucide-react'
 import { Button } from '@/components/ui/button'
 import { Card } from '@/components/ui/card'
@@ -37,6 +38,27 @@ interface VisualizationChartsProps {
 
 const COLORS = ['#0088FE', '#00C49F', '#FFBB28', '#FF8042', '#8884d8', '#82ca9d', '#ffc658'];
 
+// Chart data aggregated over the whole dataset by /api/chart-data, null until it arrives or without an upload
+function useChartData(uploadId: string | undefined, spec: Record<string, any> | null) {
+  const [result, setResult] = useState<any | null>(null)
+  const key = spec ? JSON.stringify(spec) : null
+
+  useEffect(() => {
+    setResult(null)
+    if (!uploadId || !key) return
+    let cancelled = false
+    const token = localStorage.getItem('quickcharts_token')
+    axios.post(`${API_BASE_URL}/api/chart-data/${uploadId}`, JSON.parse(key), {
+      headers: { Authorization: `Bearer ${token}` }
+    })
+      .then(response => { if (!cancelled) setResult(response.data) })
+      .catch(e => console.error('Chart data request failed', e))
+    return () => { cancelled = true }
+  }, [uploadId, key])
+
+  return result
+}
+
 export default function VisualizationCharts({
   data,
   columns,
@@ -54,8 +76,21 @@ export default function VisualizationCharts({
     })
   }, [columns, analysis])
 
+  const groupSpec = selectedX && selectedY
+    ? { kind: 'groupby', x: selectedX, y: numericColumns.includes(selectedY) ? selectedY : null, agg: numericColumns.includes(selectedY) ? 'sum' : 'count', limit: 20 }
+    : null
+  const serverGroups = useChartData(uploadId, groupSpec)
+  const seriesSpec = numericColumns.includes(selectedX) && numericColumns.includes(selectedY)
+    ? { kind: 'series', x: selectedX, y: selectedY, max_points: 100 }
+    : null
+  const serverSeries = useChartData(uploadId, seriesSpec)
+  const serverHistogram = useChartData(uploadId, numericColumns.length ? { kind: 'histogram', x: numericColumns[0], bins: 20 } : null)
+
   const barChartData = useMemo(() => {
     if (!selectedX || !selectedY) return []
+    if (serverGroups) {
+      return serverGroups.groups.map((g: any) => ({ name: g.name, count: g.count, sum: g.value }))
+    }
 
     const grouped: Record<string, any> = {}
     data.forEach(row => {
@@ -69,12 +104,15 @@ export default function VisualizationCharts({
     })
 
     return Object.values(grouped).slice(0, 20)
-  }, [data, selectedX, selectedY])
+  }, [data, selectedX, selectedY, serverGroups])
 
   const scatterData = useMemo(() => {
     if (!selectedX || !selectedY || !numericColumns.includes(selectedX) || !numericColumns.includes(selectedY)) {
       return []
     }
+    if (serverSeries) {
+      return serverSeries.points.map((p: any) => ({ [selectedX]: p.x, [selectedY]: p.y }))
+    }
 
     return data
       .filter(row =>
@@ -84,10 +122,16 @@ export default function VisualizationCharts({
         typeof row[selectedY] === 'number'
       )
       .slice(0, 100)
-  }, [data, selectedX, selectedY, numericColumns])
+  }, [data, selectedX, selectedY, numericColumns, serverSeries])
 
   const histogramData = useMemo(() => {
     if (!numericColumns.length) return []
+    if (serverHistogram) {
+      return serverHistogram.bins.map((b: any) => ({
+        name: `${Number(b.start).toFixed(1)}-${Number(b.end).toFixed(1)}`,
+        frequency: b.count
+      }))
+    }
 
     const col = numericColumns[0]
     const values = data
@@ -116,7 +160,7 @@ export default function VisualizationCharts({
     })
 
     return Object.entries(bins).map(([label, count]) => ({ name: label, frequency: count }))
-  }, [data, numericColumns])
+  }, [data, numericColumns, serverHistogram])
 
   const pieData = useMemo(() => {
     if (!selectedX || !selectedY) return []
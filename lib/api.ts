@@ -33,6 +33,7 @@ export interface UploadResponse {
   analysis: Record<string, AnalysisInfo>
   insights: Insight[]
   data_quality: DataQuality
+  sampling?: Sampling
   metadata: {
     filename: string
     rows: number
@@ -64,6 +65,17 @@ export interface Insight {
   metrics?: Record<string, number>
 }
 
+// How insights and anomalies were computed; sampled ones are estimates at the given confidence
+export interface Sampling {
+  sampled: boolean
+  method: string
+  sample_size: number
+  total_rows: number
+  fraction: number
+  seed: number
+  confidence: number
+}
+
 export interface DataQuality {
   quality_score: number
   missing_count: number
@@ -0,0 +1,214 @@
+"""
+Chart data computed over a whole dataset: group-by aggregates, histogram bins,
+time buckets and downsampled x/y series.
+
+A spec is a plain dict so it can be sent to worker processes and used as a cache key:
+{"kind": "groupby" | "histogram" | "timeseries" | "series", "x": ..., "y": ...,
+ "agg": ..., "bins": ..., "freq": ..., "max_points": ..., "limit": ...}
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dtypes import widen_series
+
+logger = logging.getLogger(__name__)
+
+AGGREGATIONS = ("count", "sum", "mean", "median", "min", "max")
+
+# Candidate time buckets from fine to coarse, with their approximate length
+TIME_FREQUENCIES = [
+    ("s", pd.Timedelta(seconds=1)),
+    ("min", pd.Timedelta(minutes=1)),
+    ("h", pd.Timedelta(hours=1)),
+    ("D", pd.Timedelta(days=1)),
+    ("W", pd.Timedelta(weeks=1)),
+    ("MS", pd.Timedelta(days=30)),
+    ("QS", pd.Timedelta(days=91)),
+    ("YS", pd.Timedelta(days=365)),
+]
+
+
+class ChartSpecError(ValueError):
+    """Raised when a chart spec does not fit the dataset"""
+
+
+def spec_columns(spec: Dict[str, Any]) -> List[str]:
+    """Columns a spec reads"""
+    return list(dict.fromkeys(c for c in (spec.get("x"), spec.get("y")) if c))
+
+
+def _value(v: Any) -> Any:
+    """A numpy/pandas scalar as a JSON-ready value, NaN as None"""
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.isoformat()
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _numeric(series: pd.Series, name: str) -> pd.Series:
+    """A numeric column widened to 64 bits, so its aggregates neither overflow nor show float32 rounding"""
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        raise ChartSpecError(f"Column '{name}' is not numeric")
+    return widen_series(series)
+
+
+def group_by(df: pd.DataFrame, x: str, y: Optional[str], agg: str, limit: int) -> Dict[str, Any]:
+    """Aggregate y per value of x, largest groups first"""
+    if agg != "count" and not y:
+        raise ChartSpecError(f"Aggregation '{agg}' needs a y column")
+    if y and agg != "count":
+        values = _numeric(df[y], y).groupby(df[x], dropna=False, observed=True, sort=False).agg(["count", agg])
+        values.columns = ["count", "value"]
+    else:
+        values = df.groupby(x, dropna=False, observed=True, sort=False).size().to_frame("count")
+        values["value"] = values["count"]
+    values = values.sort_values(["count", "value"], ascending=False, kind="stable")
+
+    groups = [
+        {"name": "" if _value(name) is None else str(_value(name)), "count": int(row[0]), "value": _value(row[1])}
+        for name, row in zip(values.index[:limit], values.to_numpy()[:limit])
+    ]
+    return {"groups": groups, "total_groups": int(len(values)), "truncated": bool(len(values) > limit)}
+
+
+def histogram(series: pd.Series, bins: int) -> Dict[str, Any]:
+    """Fixed-width bins over the finite values of a numeric column"""
+    values = _numeric(series, series.name).to_numpy(dtype=float, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {"bins": [], "missing": int(len(series))}
+    counts, edges = np.histogram(values, bins=bins)
+    return {
+        "bins": [
+            {"start": float(edges[i]), "end": float(edges[i + 1]), "count": int(counts[i])}
+            for i in range(len(counts))
+        ],
+        "missing": int(len(series) - len(values)),
+    }
+
+
+def pick_frequency(start: pd.Timestamp, end: pd.Timestamp, max_points: int) -> str:
+    """Finest time bucket that keeps the range within max_points buckets"""
+    span = end - start
+    for freq, length in TIME_FREQUENCIES:
+        if span / length < max_points:
+            return freq
+    return TIME_FREQUENCIES[-1][0]
+
+
+def time_buckets(
+    df: pd.DataFrame,
+    x: str,
+    y: Optional[str],
+    agg: str,
+    freq: Optional[str],
+    max_points: int
+) -> Dict[str, Any]:
+    """Aggregate y per time bucket of x; the bucket size is picked from max_points unless given"""
+    times = df[x] if pd.api.types.is_datetime64_any_dtype(df[x]) else pd.to_datetime(df[x], errors="coerce")
+    frame = pd.DataFrame({"t": times})
+    if y:
+        frame["y"] = _numeric(df[y], y).to_numpy()
+    frame = frame.dropna(subset=["t"])
+    if frame.empty:
+        return {"freq": freq, "points": []}
+
+    freq = freq or pick_frequency(frame["t"].min(), frame["t"].max(), max_points)
+    try:
+        grouped = frame.groupby(pd.Grouper(key="t", freq=freq))
+    except ValueError as e:
+        raise ChartSpecError(f"Invalid frequency '{freq}': {str(e)}")
+    counts = grouped.size()
+    values = grouped["y"].agg(agg) if y and agg != "count" else counts
+    return {
+        "freq": freq,
+        "points": [
+            {"t": t.isoformat(), "count": int(c), "value": _value(v)}
+            for t, c, v in zip(counts.index, counts.to_numpy(), values.to_numpy())
+        ],
+    }
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Indices of n points chosen by Largest-Triangle-Three-Buckets: the first and last
+    points, plus per bucket the point forming the largest triangle with the previous
+    pick and the average of the next bucket. x must be sorted.
+    """
+    size = len(x)
+    if n >= size:
+        return np.arange(size)
+    if n < 3:
+        return np.array([0, size - 1])[:n]
+
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    indices = np.empty(n, dtype=np.int64)
+    indices[0], indices[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[end:edges[i + 2]].mean(), y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def series(df: pd.DataFrame, x: str, y: str, max_points: int) -> Dict[str, Any]:
+    """x/y points sorted by x, downsampled with LTTB to at most max_points"""
+    y_values = _numeric(df[y], y).to_numpy(dtype=float, na_value=np.nan)
+    is_time = pd.api.types.is_datetime64_any_dtype(df[x])
+    if is_time:
+        times = df[x].dt.tz_convert(None) if df[x].dt.tz is not None else df[x]
+        x_values = times.to_numpy(dtype="datetime64[ns]").view(np.int64).astype(float)
+        x_values[times.isna().to_numpy()] = np.nan
+    else:
+        x_values = _numeric(df[x], x).to_numpy(dtype=float, na_value=np.nan)
+
+    keep = np.isfinite(x_values) & np.isfinite(y_values)
+    x_values, y_values = x_values[keep], y_values[keep]
+    order = np.argsort(x_values, kind="stable")
+    x_values, y_values = x_values[order], y_values[order]
+    picked = lttb(x_values, y_values, max_points)
+
+    xs = pd.to_datetime(x_values[picked].astype(np.int64)).map(pd.Timestamp.isoformat) if is_time else x_values[picked]
+    return {
+        "points": [{"x": _value(a), "y": float(b)} for a, b in zip(xs, y_values[picked])],
+        "total": int(len(x_values)),
+        "downsampled": bool(len(picked) < len(x_values)),
+    }
+
+
+def chart_data(df: pd.DataFrame, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the chart data a spec asks for"""
+    kind, x, y = spec.get("kind"), spec.get("x"), spec.get("y")
+    agg = spec.get("agg") or "count"
+    if agg not in AGGREGATIONS:
+        raise ChartSpecError(f"Unknown aggregation '{agg}'")
+    missing = [c for c in spec_columns(spec) if c not in df.columns]
+    if missing:
+        raise ChartSpecError(f"Column(s) not found: {', '.join(missing)}")
+    if not x:
+        raise ChartSpecError("Chart spec needs an x column")
+
+    if kind == "groupby":
+        result = group_by(df, x, y, agg, spec["limit"])
+    elif kind == "histogram":
+        result = histogram(df[x], spec["bins"])
+    elif kind == "timeseries":
+        result = time_buckets(df, x, y, agg, spec.get("freq"), spec["max_points"])
+    elif kind == "series":
+        if not y:
+            raise ChartSpecError("A series needs a y column")
+        result = series(df, x, y, spec["max_points"])
+    else:
+        raise ChartSpecError(f"Unknown chart kind '{kind}'")
+    return {**spec, "agg": agg, "rows": int(len(df)), **result}
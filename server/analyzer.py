@@ -0,0 +1,451 @@
+"""
+Dataset analysis used by the API endpoints and by executor workers
+"""
+
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import UploadFile
+
+from config import settings
+from ingest import FileTooLargeError, SizeLimitedReader, file_size
+from llm import LLMClient, LLMError
+from profiling import profile_columns, profile_columns_approximate
+from rowhash import count_duplicates
+from sampling import sample_frame, sampling_info, share_estimate
+
+logger = logging.getLogger(__name__)
+
+# Bump when a prompt template changes, so cached answers to the old prompt are not reused
+PREDICTION_PROMPT_VERSION = "1"
+ADVICE_PROMPT_VERSION = "1"
+
+# Numeric columns, in column order, that get an outlier insight
+OUTLIER_INSIGHT_COLUMNS = 5
+
+
+class DataAnalyzer:
+    """Analyze uploaded data files"""
+    
+    @staticmethod
+    def read_file(file: UploadFile, max_bytes: int = settings.MAX_FILE_SIZE) -> Optional[pd.DataFrame]:
+        """Read CSV or Excel file, streaming it into the parser"""
+        try:
+            filename = file.filename.lower()
+            
+            # Reset file pointer - CRITICAL FIX!
+            file.file.seek(0)
+            if file_size(file.file) > max_bytes:
+                raise FileTooLargeError(max_bytes)
+            
+            if filename.endswith('.csv'):
+                # The parser pulls the spooled upload in chunks, no full in-memory copy of the bytes
+                reader = io.BufferedReader(SizeLimitedReader(file.file, max_bytes), buffer_size=1024 * 1024)
+                df = pd.read_csv(reader)
+            elif filename.endswith(('.xlsx', '.xls')):
+                # Excel needs random access; the size was checked above
+                df = pd.read_excel(file.file)
+            else:
+                return None
+                
+            return df
+        except FileTooLargeError:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading file: {str(e)}")
+            return None
+    
+    @staticmethod
+    def analyze_columns(df: pd.DataFrame) -> Dict[str, Any]:
+        """Analyze each column in the dataframe"""
+        # Very large frames get sketched distinct counts and quartiles, flagged per column
+        if len(df) >= settings.APPROX_STATS_MIN_ROWS:
+            return profile_columns_approximate(df, settings.HLL_PRECISION, settings.TDIGEST_COMPRESSION)
+        # Statistics for all numeric columns are computed together, see profiling.py
+        return profile_columns(df)
+    
+    @staticmethod
+    def outlier_insight(
+        df: pd.DataFrame,
+        col: str,
+        analysis: Dict,
+        sample: Optional[pd.DataFrame] = None
+    ) -> Optional[Dict]:
+        """
+        Z-score outlier insight for one numeric column, None when there are none.
+        With a sample, outliers are counted on the sampled rows and scaled up, with a
+        confidence interval in the metrics.
+        """
+        col_data = (df if sample is None else sample)[col].dropna()
+        if len(col_data) == 0:
+            return None
+        
+        # Mean and std of the whole column are known from the profile
+        mean, std = analysis[col]['mean'], analysis[col]['std']
+        if std is None or std <= 0:
+            return None
+        
+        # Check for outliers (simple z-score)
+        z_scores = np.abs((col_data - mean) / std)
+        outliers = int((z_scores > 3).sum())
+        metrics = {'mean': float(mean), 'std_dev': float(std)}
+        if sample is not None:
+            present = len(df) - analysis[col]['missing']
+            estimate = share_estimate(outliers, len(col_data), present, settings.SAMPLE_CONFIDENCE)
+            outliers = estimate['count']
+            metrics.update({
+                'outlier_count_low': estimate['count_low'],
+                'outlier_count_high': estimate['count_high'],
+            })
+        metrics['outlier_count'] = outliers
+        if outliers == 0:
+            return None
+        
+        found = 'Found' if sample is None else 'Estimated'
+        return {
+            'type': 'general',
+            'title': f'Outliers in {col}',
+            'message': f'{found} {outliers} potential outliers (|z-score| > 3)',
+            'description': f'Column "{col}" has {outliers} values that deviate significantly from the mean.',
+            'metrics': metrics
+        }
+    
+    @staticmethod
+    def generate_insights(
+        df: pd.DataFrame,
+        analysis: Dict,
+        sample: Optional[pd.DataFrame] = None,
+        duplicates: Optional[int] = None,
+        outliers: Optional[Dict[str, Optional[Dict]]] = None
+    ) -> List[Dict]:
+        """
+        Generate AI-like insights from data. duplicates and per-column outlier insights
+        that are already known (see prepare_for_frontend) are reused instead of rescanned.
+        """
+        insights = []
+        outliers = outliers or {}
+        
+        # Check for missing values, already counted per column by analyze_columns
+        total_missing = sum(info['missing'] for info in analysis.values())
+        if total_missing > 0:
+            missing_percent = (total_missing / (len(df) * len(df.columns))) * 100
+            insights.append({
+                'type': 'alert',
+                'title': 'Missing Data Detected',
+                'message': f'Found {total_missing:,} missing values ({missing_percent:.1f}% of total data)',
+                'description': 'Missing values can affect analysis accuracy. Consider imputation or removal.',
+                'recommendation': 'Clean missing values using forward fill, interpolation, or removal strategies.'
+            })
+        
+        # Check for duplicates
+        if duplicates is None:
+            duplicates = int(df.duplicated().sum())
+        if duplicates > 0:
+            insights.append({
+                'type': 'alert',
+                'title': 'Duplicate Rows Found',
+                'message': f'Detected {duplicates} duplicate rows',
+                'description': 'Duplicate rows can skew analysis results.',
+                'recommendation': 'Remove duplicate rows to improve data quality.'
+            })
+        
+        # Numeric column insights
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        
+        for col in numeric_cols[:OUTLIER_INSIGHT_COLUMNS]:
+            if col in outliers:
+                insight = outliers[col]
+            else:
+                insight = DataAnalyzer.outlier_insight(df, col, analysis, sample)
+            if insight is not None:
+                insights.append(insight)
+        
+        # Data completeness
+        completeness = 1 - (total_missing / (len(df) * len(df.columns)))
+        insights.append({
+            'type': 'general',
+            'title': 'Data Completeness',
+            'message': f'Dataset is {completeness*100:.1f}% complete',
+            'description': f'Your dataset has good data quality with {completeness*100:.1f}% completeness.',
+            'metrics': {
+                'completeness_score': float(completeness)
+            }
+        })
+        
+        return insights
+    
+    @staticmethod
+    def detect_anomalies(
+        df: pd.DataFrame,
+        total_rows: Optional[int] = None,
+        columns: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Detect statistical anomalies in numeric columns (all, or those in columns).
+        When df is a sample of total_rows rows, counts are estimated with a confidence interval.
+        """
+        anomalies = []
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        if columns is not None:
+            numeric_cols = [col for col in numeric_cols if col in columns]
+        sampled = total_rows is not None and total_rows > len(df)
+        
+        for col in numeric_cols:
+            col_data = df[col].dropna()
+            if len(col_data) < 10: continue
+            
+            # Simple IQR based anomaly detection
+            Q1 = col_data.quantile(0.25)
+            Q3 = col_data.quantile(0.75)
+            IQR = Q3 - Q1
+            lower_bound = Q1 - 1.5 * IQR
+            upper_bound = Q3 + 1.5 * IQR
+            
+            outlier_indices = col_data[(col_data < lower_bound) | (col_data > upper_bound)].index.tolist()
+            if len(outlier_indices) > 0:
+                anomaly = {
+                    "column": col,
+                    "count": len(outlier_indices),
+                    "percentage": (len(outlier_indices) / len(df)) * 100,
+                    "example_indices": outlier_indices[:5]
+                }
+                if sampled:
+                    estimate = share_estimate(len(outlier_indices), len(df), total_rows, settings.SAMPLE_CONFIDENCE)
+                    anomaly.update({
+                        "count": estimate['count'],
+                        "count_low": estimate['count_low'],
+                        "count_high": estimate['count_high'],
+                        "estimated": True,
+                    })
+                anomalies.append(anomaly)
+        return anomalies
+
+    @staticmethod
+    async def get_auto_summary(df: pd.DataFrame, llm: LLMClient) -> str:
+        """Generate a 3-bullet point TL;DR using Groq (Llama 3)"""
+        try:
+            head = df.head(10).to_csv(index=False)
+            info = df.describe().to_string()
+            
+            prompt = f"Analyze this dataset and provide exactly 3 bullet points summarizing the most interesting trends or facts. Keep it punchy.\nData Sample:\n{head}\nStats:\n{info}"
+            
+            try:
+                return await llm.chat(prompt, temperature=0.5)
+            except LLMError as e:
+                logger.error(f"Groq Summary Error: {e.detail}")
+                return "Dataset analysis ready."
+        except Exception as e:
+            logger.error(f"Auto-summary error: {str(e)}")
+            return "Dataset uploaded. Ready for analysis."
+    
+    @staticmethod
+    async def get_predictions(df: pd.DataFrame, llm: LLMClient) -> Dict:
+        """Generate AI-powered predictions and forecasts"""
+        try:
+            head = df.head(10).to_csv(index=False)
+            stats = df.describe(include='all').to_string()
+            
+            prompt = f"""You are a predictive analyst. Based on this dataset sample and statistics:
+Dataset Sample:
+{head}
+Stats:
+{stats}
+
+Task:
+1. Identify the most important numerical trend to forecast.
+2. Provide a 'Prediction' (what will happen next).
+3. Provide a 'Confidence Score' (0-100%).
+4. List 2 'Key Drivers' for this prediction.
+
+Return a JSON object:
+{{
+  "trend": "string",
+  "prediction": "string",
+  "confidence": number,
+  "drivers": ["string", "string"]
+}}
+Only return JSON."""
+            
+            try:
+                content = await llm.chat(prompt, temperature=0.4, json_mode=True)
+            except LLMError as e:
+                logger.error(f"Groq Prediction Error: {e.detail}")
+                return {"error": "Prediction engine temporarily offline"}
+                
+            return json.loads(content)
+        except Exception as e:
+            logger.error(f"Prediction error: {str(e)}")
+            return {"error": "Failed to generate predictions"}
+
+    @staticmethod
+    async def get_causes_advice(df: pd.DataFrame, llm: LLMClient) -> Dict:
+        """Analyze root causes and provide business advice"""
+        try:
+            head = df.head(10).to_csv(index=False)
+            stats = df.describe(include='all').to_string()
+            
+            prompt = f"""You are a Strategic Business Consultant. Analyze this data:
+{stats}
+
+Task:
+1. Identify a significant pattern/issue.
+2. Explain the likely 'Root Cause'.
+3. Provide 3 actionable 'Strategic Advice' points.
+
+Return a JSON object:
+{{
+  "finding": "string",
+  "root_cause": "string",
+  "advice": ["string", "string", "string"]
+}}
+Only return JSON."""
+            
+            try:
+                content = await llm.chat(prompt, temperature=0.6, json_mode=True)
+            except LLMError as e:
+                logger.error(f"Groq Advice Error: {e.detail}")
+                return {"error": "Consultation service temporarily offline"}
+                
+            return json.loads(content)
+        except Exception as e:
+            logger.error(f"Advice error: {str(e)}")
+            return {"error": "Failed to generate causes and advice"}
+
+    @staticmethod
+    def assess_data_quality(
+        df: pd.DataFrame,
+        analysis: Optional[Dict] = None,
+        duplicates: Optional[int] = None
+    ) -> Dict:
+        """Assess overall data quality, from the per-column profile and duplicate count when given"""
+        total_cells = len(df) * len(df.columns)
+        if analysis is None:
+            missing_count = df.isna().sum().sum()
+        else:
+            missing_count = sum(info['missing'] for info in analysis.values())
+        duplicate_count = df.duplicated().sum() if duplicates is None else duplicates
+        
+        quality_score = 1 - (missing_count / total_cells) - (duplicate_count / len(df) * 0.1)
+        quality_score = max(0, min(1, quality_score))
+        
+        issues = []
+        if missing_count > 0:
+            issues.append(f"Contains {missing_count:,} missing values")
+        if duplicate_count > 0:
+            issues.append(f"Contains {duplicate_count:,} duplicate rows")
+        if len(df.columns) > 50:
+            issues.append("Dataset has many columns, consider dimensionality reduction")
+        if len(df) < 10:
+            issues.append("Dataset is very small, analysis may be limited")
+        
+        return {
+            'quality_score': float(quality_score),
+            'missing_count': int(missing_count),
+            'duplicate_count': int(duplicate_count),
+            'completeness': float(1 - (missing_count / total_cells)),
+            'issues': issues
+        }
+    
+    @staticmethod
+    def outlier_columns(columns: List[str], analysis: Dict) -> List[str]:
+        """Columns generate_insights scanned for outliers, from a payload's column dtypes"""
+        empty = pd.DataFrame({col: pd.Series(dtype=analysis[col]['dtype']) for col in columns})
+        return list(empty.select_dtypes(include=[np.number]).columns[:OUTLIER_INSIGHT_COLUMNS])
+    
+    @staticmethod
+    def prepare_for_frontend(
+        df: pd.DataFrame,
+        filename: str,
+        exact: bool = False,
+        previous: Optional[Dict] = None,
+        changed: Optional[List[str]] = None,
+        row_hashes: Optional[np.ndarray] = None,
+        sample_positions: Optional[np.ndarray] = None
+    ) -> Dict:
+        """
+        Prepare data for frontend consumption. Large frames get insights and anomalies
+        from a seeded sample unless exact is set; 'sampling' says which was used.
+        
+        previous is the payload of the version df was derived from and changed the
+        columns the edit wrote (etl.changed_columns). Only those columns are profiled
+        and scanned again; missing totals, completeness and quality are rebuilt from
+        the per-column parts.
+        
+        row_hashes are the stored hashes of df's rows (DatasetStore.row_hashes); duplicates
+        are counted from them instead of hashing the frame again. sample_positions are the
+        stored sample of the version (DatasetStore.sample_positions), used instead of a new draw.
+        """
+        # Only the first page is shipped, the rest is read through /api/rows.
+        # It stays a frame, FastJSONResponse encodes it without per-cell Python objects
+        data = df.head(settings.PREVIEW_ROWS)
+        columns = list(df.columns)
+        
+        reuse: List[str] = []
+        if previous is not None and changed is not None and previous['metadata']['rows'] == len(df):
+            # Keep the previous mode, an exact upgrade stays exact
+            exact = not previous.get('sampling', {}).get('sampled', False)
+            reuse = [col for col in columns if col not in changed and col in previous['analysis']]
+        fresh = [col for col in columns if col not in reuse]
+        
+        if reuse:
+            profiled = DataAnalyzer.analyze_columns(df[fresh]) if fresh else {}
+            analysis = {col: profiled[col] if col in profiled else previous['analysis'][col] for col in columns}
+        else:
+            analysis = DataAnalyzer.analyze_columns(df)
+        sample = None
+        if not exact and len(df) >= settings.SAMPLE_MIN_ROWS:
+            if sample_positions is not None and (len(sample_positions) == 0 or sample_positions[-1] < len(df)):
+                sample = df.take(sample_positions)
+            else:
+                sample = sample_frame(df, settings.SAMPLE_SIZE, settings.SAMPLE_SEED)
+        
+        # Duplicates depend on every column; new columns computed from each row's values
+        # cannot make two rows equal or different, any other edit needs a recount
+        if reuse and not any(col in previous['analysis'] for col in changed):
+            duplicates = int(previous['data_quality']['duplicate_count'])
+        elif row_hashes is not None and len(row_hashes) == len(df):
+            duplicates = count_duplicates(df, row_hashes)
+        else:
+            duplicates = int(df.duplicated().sum())
+        
+        # A missing outlier insight only means "no outliers" for a column that was scanned
+        outliers = {}
+        if reuse:
+            known_insights = {insight.get('title'): insight for insight in previous['insights']}
+            scanned = DataAnalyzer.outlier_columns(previous['columns'], previous['analysis'])
+            outliers = {col: known_insights.get(f'Outliers in {col}') for col in reuse if col in scanned}
+        insights = DataAnalyzer.generate_insights(df, analysis, sample, duplicates, outliers)
+        data_quality = DataAnalyzer.assess_data_quality(df, analysis, duplicates)
+        
+        scan = fresh if reuse else None
+        if sample is None:
+            anomalies = DataAnalyzer.detect_anomalies(df, columns=scan)
+        else:
+            anomalies = DataAnalyzer.detect_anomalies(sample, total_rows=len(df), columns=scan)
+        if reuse:
+            anomalies += [anomaly for anomaly in previous['anomalies'] if anomaly['column'] in reuse]
+            position = {col: i for i, col in enumerate(columns)}
+            anomalies.sort(key=lambda anomaly: position[anomaly['column']])
+        sample_size = len(df) if sample is None else len(sample)
+        
+        return {
+            'data': data,
+            'columns': columns,
+            'analysis': analysis,
+            'insights': insights,
+            'data_quality': data_quality,
+            'anomalies': anomalies,
+            'sampling': sampling_info(len(df), sample_size, settings.SAMPLE_SEED, settings.SAMPLE_CONFIDENCE),
+            'metadata': {
+                'filename': filename,
+                'rows': int(len(df)),
+                'columns': int(len(df.columns)),
+                'preview_rows': int(min(len(df), settings.PREVIEW_ROWS)),
+                'uploaded_at': datetime.now().isoformat()
+            }
+        }
@@ -0,0 +1,48 @@
+"""
+Benchmark ingest-time dtype optimization: memory of a parsed CSV before and after
+
+Usage: python benchmarks/bench_dtypes.py [rows]
+"""
+
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from dtypes import frame_memory, optimize_dtypes
+
+
+def make_csv(rows: int, seed: int = 0) -> bytes:
+    """Sales-like columns: ids, small counts, prices, a few categories and free text"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "order_id": np.arange(rows),
+        "quantity": rng.integers(1, 20, rows),
+        "store": rng.integers(1, 300, rows),
+        "price": rng.integers(100, 100_000, rows) / 100,
+        "discount": rng.choice([0.0, 0.25, 0.5], rows),
+        "region": rng.choice(["North", "South", "East", "West"], rows),
+        "category": rng.choice([f"category_{i}" for i in range(40)], rows),
+        "status": rng.choice(["shipped", "pending", "returned", None], rows),
+        "comment": [f"note {i}" for i in rng.integers(0, rows, rows)],
+    })
+    return df.to_csv(index=False).encode("utf-8")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = pd.read_csv(io.BytesIO(make_csv(rows)))
+    print(f"Frame: {rows:,} rows x {len(df.columns)} columns")
+
+    start = time.perf_counter()
+    optimized, report = optimize_dtypes(df)
+    elapsed = time.perf_counter() - start
+    print(f"default dtypes:   {frame_memory(df) / 2 ** 20:8.1f} MiB")
+    print(f"optimized dtypes: {frame_memory(optimized) / 2 ** 20:8.1f} MiB "
+          f"({frame_memory(df) / frame_memory(optimized):.1f}x smaller) in {elapsed:.2f} s")
+    for col, change in report["columns"].items():
+        print(f"  {col:10} {change['from']:8} -> {change['to']}")
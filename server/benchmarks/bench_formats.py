@@ -0,0 +1,66 @@
+"""
+Compare the records, columnar JSON and Arrow IPC payloads of the preview on the sample uploads
+
+Usage: python benchmarks/bench_formats.py [preview rows] [files...]
+Without files, every .csv and .parquet dataset in server/uploads is measured.
+"""
+
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from serialization import frame_to_arrow, frame_to_columnar, frame_to_json
+
+UPLOAD_DIR = Path(__file__).resolve().parent.parent / "uploads"
+
+
+def read_dataset(path: Path) -> pd.DataFrame:
+    """A sample upload, legacy CSV or stored Parquet"""
+    return pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+
+
+def decode_json(body: bytes):
+    return json.loads(body)
+
+
+def decode_arrow(body: bytes):
+    return pa.ipc.open_stream(body).read_all()
+
+
+def best_of(func, body: bytes, repeats: int = 5) -> float:
+    """Fastest of several decodes, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(body)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    paths = [Path(p) for p in sys.argv[2:]] or sorted(
+        p for p in UPLOAD_DIR.iterdir() if p.suffix in (".csv", ".parquet")
+    )
+
+    formats = [
+        ("records", frame_to_json, decode_json),
+        ("columnar", frame_to_columnar, decode_json),
+        ("arrow", frame_to_arrow, decode_arrow),
+    ]
+    for path in paths:
+        df = read_dataset(path).head(rows)
+        print(f"{path.name}: {len(df):,} rows x {len(df.columns)} columns")
+        for name, encode, decode in formats:
+            body = encode(df)
+            print(
+                f"  {name:9} {len(body) / 1e3:8.1f} kB"
+                f"  gzip {len(gzip.compress(body)) / 1e3:7.1f} kB"
+                f"  decode {best_of(decode, body):6.2f} ms"
+            )
@@ -0,0 +1,54 @@
+"""
+Benchmark loading a stored dataset from Parquet against its memory-mapped Arrow copy
+
+Usage: python benchmarks/bench_mapped.py [rows ...]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from dtypes import optimize_dtypes
+from storage import DatasetStore
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Numbers with and without gaps, a category and free text"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "value": rng.normal(size=rows),
+        "score": rng.normal(size=rows),
+        "group": rng.choice(["a", "b", "c", "d"], rows),
+        "label": [f"label {i}" for i in rng.integers(0, rows, rows)],
+    })
+    df.loc[::10, "score"] = np.nan
+    return optimize_dtypes(df)[0]
+
+
+def timed(func, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000, 5_000_000]
+    with tempfile.TemporaryDirectory() as root:
+        store = DatasetStore(Path(root))
+        print(f"{'rows':>10}  {'parquet':>9}  {'mapped':>9}")
+        for rows in sizes:
+            upload_id = f"bench{rows}"
+            store.save(upload_id, make_frame(rows))
+            store.load_mapped(upload_id)  # writes the Arrow copy once
+            parquet = timed(store.load, upload_id)
+            mapped = timed(store.load_mapped, upload_id)
+            print(f"{rows:>10,}  {parquet * 1000:7.1f}ms  {mapped * 1000:7.1f}ms")
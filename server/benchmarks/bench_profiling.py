@@ -0,0 +1,90 @@
+"""
+Benchmark DataAnalyzer.analyze_columns: column-by-column loop vs vectorized profiling
+
+Usage: python benchmarks/bench_profiling.py [rows] [columns]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from profiling import profile_columns
+
+
+def legacy_analyze_columns(df: pd.DataFrame) -> dict:
+    """The original per-column implementation, kept here as the baseline"""
+    analysis = {}
+    for col in df.columns:
+        col_data = df[col]
+        analysis[col] = {
+            'dtype': str(col_data.dtype),
+            'unique': int(col_data.nunique()),
+            'missing': int(col_data.isna().sum()),
+            'missing_percent': float(col_data.isna().sum() / len(df)),
+        }
+        if pd.api.types.is_numeric_dtype(col_data):
+            analysis[col].update({
+                'mean': float(col_data.mean()) if not col_data.isna().all() else None,
+                'median': float(col_data.median()) if not col_data.isna().all() else None,
+                'std': float(col_data.std()) if not col_data.isna().all() else None,
+                'min': float(col_data.min()) if not col_data.isna().all() else None,
+                'max': float(col_data.max()) if not col_data.isna().all() else None,
+                '25%': float(col_data.quantile(0.25)) if not col_data.isna().all() else None,
+                '75%': float(col_data.quantile(0.75)) if not col_data.isna().all() else None,
+            })
+    return analysis
+
+
+def make_frame(rows: int, cols: int, seed: int = 0) -> pd.DataFrame:
+    """Mostly float columns with 5% missing values, plus some int and text columns"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(cols):
+        if i % 10 == 8:
+            data[f"int_{i}"] = rng.integers(0, 1000, rows)
+        elif i % 10 == 9:
+            data[f"cat_{i}"] = pd.Categorical.from_codes(rng.integers(0, 20, rows), [f"c{k}" for k in range(20)]).astype(object)
+        else:
+            values = rng.normal(100, 15, rows)
+            values[rng.random(rows) < 0.05] = np.nan
+            data[f"num_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def timed(func, df: pd.DataFrame):
+    start = time.perf_counter()
+    result = func(df)
+    return result, time.perf_counter() - start
+
+
+def check_same(expected: dict, actual: dict):
+    """Both implementations must return the same schema and values"""
+    assert expected.keys() == actual.keys()
+    for col, stats in expected.items():
+        assert stats.keys() == actual[col].keys(), col
+        for key, value in stats.items():
+            other = actual[col][key]
+            if isinstance(value, float):
+                assert np.isclose(value, other, equal_nan=True), (col, key, value, other)
+            else:
+                assert value == other, (col, key, value, other)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    df = make_frame(rows, cols)
+    print(f"Frame: {rows:,} rows x {cols} columns, {df.memory_usage(deep=True).sum() / 1e6:,.0f} MB")
+
+    legacy, legacy_time = timed(legacy_analyze_columns, df)
+    vectorized, vectorized_time = timed(profile_columns, df)
+    check_same(legacy, vectorized)
+
+    print(f"legacy loop:   {legacy_time:8.2f} s")
+    print(f"vectorized:    {vectorized_time:8.2f} s")
+    print(f"speedup:       {legacy_time / vectorized_time:8.1f}x")
@@ -0,0 +1,75 @@
+"""
+Benchmark the categorical x numeric effect scan against one groupby per pair
+
+Usage: python benchmarks/bench_relationships.py [rows] [categorical columns] [numeric columns]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from relationships import categorical_effects
+
+
+def make_frame(rows: int, n_cat: int, n_num: int, seed: int = 0) -> pd.DataFrame:
+    """Categories of 2 to 50 levels, numbers with a group effect on some columns and 2% missing"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_cat):
+        levels = np.array([f"level_{j}" for j in range(2 + i % 49)], dtype=object)
+        data[f"cat{i}"] = levels[rng.integers(0, len(levels), rows)]
+    codes = pd.factorize(data["cat0"])[0]
+    for i in range(n_num):
+        values = rng.normal(size=rows) + (codes * 0.1 * (i % 3))
+        values[rng.random(rows) < 0.02] = np.nan
+        data[f"num{i}"] = values
+    return pd.DataFrame(data)
+
+
+def per_pair(df: pd.DataFrame, categorical, numeric):
+    """What detect_relationships did for its 5 x 5 pairs, for all of them: a groupby per pair"""
+    results = {}
+    for cat_col in categorical:
+        for num_col in numeric:
+            frame = df[[cat_col, num_col]].dropna()
+            groups = frame.groupby(cat_col)[num_col].agg(['count', 'mean'])
+            grand = frame[num_col].mean()
+            ss_between = (groups['count'] * (groups['mean'] - grand) ** 2).sum()
+            ss_total = ((frame[num_col] - grand) ** 2).sum()
+            results[(cat_col, num_col)] = ss_between / ss_total
+    return results
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    n_cat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    n_num = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    df = make_frame(rows, n_cat, n_num)
+    categorical = [f"cat{i}" for i in range(n_cat)]
+    numeric = [f"num{i}" for i in range(n_num)]
+    print(f"Frame: {rows:,} rows, {n_cat} categorical x {n_num} numeric = {n_cat * n_num:,} pairs")
+
+    expected, pair_time = timed(per_pair, df, categorical, numeric)
+    effects, scan_time = timed(categorical_effects, df, categorical, numeric)
+    error = max(abs(e['eta_squared'] - expected[(e['categorical'], e['numeric'])]) for e in effects)
+    print(f"groupby per pair: {pair_time:7.2f} s")
+    print(f"bincount scan:    {scan_time:7.2f} s  ({pair_time / scan_time:.1f}x), max eta^2 diff {error:.1e}")
+
+    # F and p against scipy for the strongest pair
+    top = effects[0]
+    frame = df[[top['categorical'], top['numeric']]].dropna()
+    f, p = stats.f_oneway(*[g.to_numpy() for _, g in frame.groupby(top['categorical'])[top['numeric']]])
+    print(f"strongest: {top['categorical']} x {top['numeric']} eta^2 {top['eta_squared']:.4f}"
+          f"  F {top['f_statistic']:.2f} (scipy {f:.2f})  p {top['p_value']:.2e} (scipy {p:.2e})")
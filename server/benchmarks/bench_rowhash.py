@@ -0,0 +1,64 @@
+"""
+Benchmark duplicate counting and dedup from stored row hashes against DataFrame.duplicated
+
+Usage: python benchmarks/bench_rowhash.py [rows] [columns]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from rowhash import count_duplicates, deduplicate, row_hashes, update_row_hashes
+
+
+def make_frame(rows: int, n_cols: int, seed: int = 0) -> pd.DataFrame:
+    """Mixed numeric and text columns with about 1% duplicated rows"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_cols):
+        if i % 3 == 2:
+            data[f"c{i}"] = np.array([f"value_{j}" for j in range(1000)], dtype=object)[rng.integers(0, 1000, rows)]
+        else:
+            data[f"c{i}"] = rng.normal(size=rows)
+    df = pd.DataFrame(data)
+    copies = rng.integers(0, rows, rows // 100)
+    df.iloc[rng.integers(0, rows, len(copies))] = df.iloc[copies].to_numpy()
+    return df
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_cols = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    df = make_frame(rows, n_cols)
+    print(f"Frame: {rows:,} rows x {n_cols} columns")
+
+    hashes, hash_time = timed(row_hashes, df)
+    print(f"row hashes (once per version):  {hash_time:6.2f} s")
+
+    expected, pandas_time = timed(lambda: int(df.duplicated().sum()))
+    counted, count_time = timed(count_duplicates, df, hashes)
+    print(f"duplicated().sum():              {pandas_time:6.2f} s")
+    print(f"count from hashes:               {count_time:6.2f} s  ({pandas_time / count_time:.1f}x), "
+          f"{counted:,} duplicates {'ok' if counted == expected else f'expected {expected:,}'}")
+
+    dropped, drop_time = timed(df.drop_duplicates)
+    kept, dedup_time = timed(deduplicate, df, hashes)
+    print(f"drop_duplicates():               {drop_time:6.2f} s")
+    print(f"dedup from hashes:               {dedup_time:6.2f} s  ({drop_time / dedup_time:.1f}x), "
+          f"{'same rows' if kept.index.equals(dropped.index) else 'rows differ'}")
+
+    edited = df.assign(c0=df["c0"] * 2)
+    updated, update_time = timed(update_row_hashes, hashes, df, edited, ["c0"])
+    print(f"rehash after one column edit:    {update_time:6.2f} s  "
+          f"({'matches' if (updated == row_hashes(edited)).all() else 'differs from'} a full rehash)")
@@ -0,0 +1,71 @@
+"""
+Benchmark building and encoding the preview payload: records + jsonable_encoder vs FastJSONResponse
+
+Usage: python benchmarks/bench_serialization.py [preview rows] [columns] [repeats]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from bench_profiling import make_frame
+from serialization import FastJSONResponse
+
+
+def legacy_render(df) -> bytes:
+    """The original path: fillna("") records, FastAPI's encoder, then JSONResponse"""
+    data = df.fillna("").to_dict('records')
+    return JSONResponse(jsonable_encoder({"data": data})).body
+
+
+def fast_render(df) -> bytes:
+    """The preview frame handed to FastJSONResponse as is"""
+    return FastJSONResponse({"data": df}).body
+
+
+def best_of(func, df, repeats: int):
+    """Fastest of several runs, with the last result"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        body = func(df)
+        best = min(best, time.perf_counter() - start)
+    return body, best
+
+
+def check_same(legacy: bytes, fast: bytes):
+    """Same rows and values; missing cells are "" in the legacy payload and null in the new one"""
+    expected = json.loads(legacy)["data"]
+    actual = json.loads(fast)["data"]
+    assert len(expected) == len(actual)
+    for old, new in zip(expected, actual):
+        assert old.keys() == new.keys()
+        for key, value in old.items():
+            if value == "":
+                assert new[key] is None, (key, new[key])
+            elif isinstance(value, float):
+                assert abs(value - new[key]) <= 1e-9 * max(1.0, abs(value)), (key, value, new[key])
+            else:
+                assert value == new[key], (key, value, new[key])
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    df = make_frame(rows, cols)
+    print(f"Preview: {rows:,} rows x {cols} columns")
+
+    legacy, legacy_time = best_of(legacy_render, df, repeats)
+    fast, fast_time = best_of(fast_render, df, repeats)
+    check_same(legacy, fast)
+
+    print(f"records + jsonable_encoder: {legacy_time * 1000:8.1f} ms  {len(legacy) / 1e3:8.0f} kB")
+    print(f"FastJSONResponse:           {fast_time * 1000:8.1f} ms  {len(fast) / 1e3:8.0f} kB")
+    print(f"speedup:                    {legacy_time / fast_time:8.1f}x")
@@ -0,0 +1,54 @@
+"""
+Benchmark exact vs sketched column profiles: time, peak extra memory and the error of every estimate
+
+Usage: python benchmarks/bench_sketches.py [rows] [columns]
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from bench_profiling import make_frame
+from profiling import profile_columns, profile_columns_approximate
+
+
+def measure(func, df):
+    """Result, seconds and peak traced allocation in MB of one run"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(df)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def worst_errors(exact: dict, approx: dict) -> dict:
+    """Largest relative error of each approximate stat across columns"""
+    worst = {}
+    for col, profile in approx.items():
+        for name in profile['approximate']:
+            if name == 'top_values' or exact[col].get(name) is None:
+                continue
+            expected = exact[col][name]
+            error = abs(profile[name] - expected) / max(abs(expected), 1e-12)
+            worst[name] = max(worst.get(name, 0.0), error)
+    return worst
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 3_000_000
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 21
+
+    df = make_frame(rows, cols)
+    print(f"Frame: {rows:,} rows x {cols} columns, {df.memory_usage(deep=True).sum() / 1e6:,.0f} MB")
+
+    exact, exact_time, exact_peak = measure(profile_columns, df)
+    approx, approx_time, approx_peak = measure(profile_columns_approximate, df)
+
+    print(f"exact:       {exact_time:6.2f} s  peak {exact_peak:8.0f} MB")
+    print(f"approximate: {approx_time:6.2f} s  peak {approx_peak:8.0f} MB")
+    for name, error in worst_errors(exact, approx).items():
+        print(f"  worst relative error {name:7} {error:.4%}")
@@ -0,0 +1,236 @@
+"""
+In-process and on-disk caches shared by the API endpoints
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetCache:
+    """LRU cache of loaded DataFrames keyed by upload_id, bounded by total memory"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Optional[str], pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, upload_id: str, version: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Return the cached frame if it matches the requested version"""
+        with self._lock:
+            entry = self._entries.get(upload_id)
+            if entry is None or (version is not None and entry[0] != version):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(upload_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, upload_id: str, df: pd.DataFrame, version: Optional[str] = None):
+        """Insert or replace a frame, evicting least recently used entries to fit the budget"""
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self._remove(upload_id)
+            if size > self.max_bytes:
+                logger.info(f"Dataset {upload_id} ({size:,} bytes) exceeds cache budget, not cached")
+                return
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+            self._entries[upload_id] = (version, df, size)
+            self.current_bytes += size
+
+    def invalidate(self, upload_id: str):
+        """Drop a cached frame after its stored dataset changed"""
+        with self._lock:
+            self._remove(upload_id)
+
+    def clear(self):
+        """Drop every cached frame"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for monitoring"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, upload_id: str):
+        entry = self._entries.pop(upload_id, None)
+        if entry is not None:
+            self.current_bytes -= entry[2]
+
+
+class ResultCache:
+    """
+    Small LRU cache for computed results keyed by tuples such as (upload_id, version).
+    With a ttl (seconds), entries older than that are treated as missing.
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Return a cached result or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple, value: Any):
+        """Store a result, evicting the least recently used one when full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, upload_id: str):
+        """Drop every result computed for an upload"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == upload_id]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for monitoring"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class ChartImageCache:
+    """
+    Content-addressed disk cache of rendered chart images, LRU-evicted by total bytes.
+    Recency is kept in file mtimes, so the order survives restarts.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        files = sorted((p for p in self.root.glob("*/*") if p.is_file() and not p.name.endswith(".tmp")),
+                       key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self.current_bytes += size
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Stable content address for a render request"""
+        return hashlib.sha256(json.dumps(parts, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached image bytes or None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            content = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.current_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, key: str, content: bytes):
+        """Store an image atomically, evicting least recently used files to fit the budget"""
+        size = len(content)
+        if size > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+
+        evicted = []
+        with self._lock:
+            self.current_bytes -= self._entries.pop(key, 0)
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                old_key, old_size = self._entries.popitem(last=False)
+                self.current_bytes -= old_size
+                self.evictions += 1
+                evicted.append(old_key)
+            self._entries[key] = size
+            self.current_bytes += size
+        for old_key in evicted:
+            self._path(old_key).unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for monitoring"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,111 @@
+"""
+Chart image proxy for QuickChart.io with a pooled client, a disk cache and request coalescing
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from cache import ChartImageCache
+
+logger = logging.getLogger(__name__)
+
+
+class ChartRenderError(Exception):
+    """Raised when QuickChart.io does not return an image"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ChartProxy:
+    """
+    Render charts through one long-lived httpx.AsyncClient.
+    Images are stored in a ChartImageCache under the hash of (config, w, h, f, v),
+    and concurrent requests for the same key share a single upstream call.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        cache: ChartImageCache,
+        timeout: float = 15.0,
+        max_connections: int = 20
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client, created on first use so it binds to the running event loop"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+            )
+        return self._client
+
+    @staticmethod
+    def cache_key(c: str, w: int, h: int, f: str, v: Optional[str]) -> str:
+        """Content address of a render request, also used as its ETag"""
+        return ChartImageCache.make_key(c, w, h, f, v)
+
+    async def render(self, c: str, w: int, h: int, f: str, v: Optional[str]) -> bytes:
+        """Image bytes for a chart config, from the disk cache or a (shared) upstream call"""
+        key = self.cache_key(c, w, h, f, v)
+        content = self.cache.get(key)
+        if content is not None:
+            return content
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, c, w, h, f, v))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shielded so one cancelled client does not abort the render for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, c: str, w: int, h: int, f: str, v: Optional[str]) -> bytes:
+        self.upstream_calls += 1
+        # httpx encodes the params, the 'c' value from FastAPI is already decoded
+        params = {"c": c, "w": w, "h": h, "f": f}
+        if v:
+            params["v"] = v
+        response = await self.client.get("/chart", params=params)
+        if response.status_code != 200:
+            raise ChartRenderError(response.status_code, response.text)
+        content = response.content
+        await asyncio.to_thread(self.cache.put, key, content)
+        return content
+
+    def stats(self) -> Dict[str, int]:
+        """Proxy and cache counters for monitoring"""
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            **{f"cache_{k}": v for k, v in self.cache.stats().items()},
+        }
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -26,19 +26,74 @@ class Settings:
     DATABASE_NAME = "dataviz_db"
     
     # File Upload Configuration
-    MAX_FILE_SIZE = 100 * 1024 * 1024  # 100 MB
+    MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 100 * 1024 * 1024))  # 100 MB
     ALLOWED_EXTENSIONS = {'.csv', '.xlsx', '.xls'}
+    # Uploaded text columns become categories up to this many distinct values / share of rows
+    CATEGORY_MAX_UNIQUE = int(os.getenv("CATEGORY_MAX_UNIQUE", 10_000))
+    CATEGORY_MAX_RATIO = float(os.getenv("CATEGORY_MAX_RATIO", 0.5))
+    
+    # Dataset Storage Configuration
+    DATASET_COMPRESSION = os.getenv("DATASET_COMPRESSION", "zstd")
+    DATASET_CACHE_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # 512 MB
+    DATASET_ROW_GROUP_SIZE = int(os.getenv("DATASET_ROW_GROUP_SIZE", 100_000))
+    ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", 64))
+    AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", 256))
+    AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", 24 * 3600))  # seconds
+    HISTORY_MAX_VERSIONS = int(os.getenv("HISTORY_MAX_VERSIONS", 20))
+    HISTORY_MAX_BYTES = int(os.getenv("HISTORY_MAX_BYTES", 256 * 1024 * 1024))  # per dataset
+    PLAN_MAX_STEPS = int(os.getenv("PLAN_MAX_STEPS", 32))  # ETL steps kept before compaction
     
     # Data Processing Configuration
     MAX_ROWS_PREVIEW = 50
-    MAX_CHART_POINTS = 100
-    MAX_HISTOGRAM_BINS = 20
+    PREVIEW_ROWS = int(os.getenv("PREVIEW_ROWS", 1000))  # first page shipped with an analysis
+    ROWS_PAGE_MAX = int(os.getenv("ROWS_PAGE_MAX", 1000))  # largest window /api/rows serves
+    ROW_ORDER_CACHE_SIZE = int(os.getenv("ROW_ORDER_CACHE_SIZE", 8))  # sorted row orders kept
+    MAX_CHART_POINTS = 100  # default point budget of /api/chart-data series and time buckets
+    MAX_HISTOGRAM_BINS = 20  # default bins of /api/chart-data histograms
+    CHART_POINTS_LIMIT = int(os.getenv("CHART_POINTS_LIMIT", 5000))  # largest budget a request may ask for
+    CHART_DATA_CACHE_SIZE = int(os.getenv("CHART_DATA_CACHE_SIZE", 256))
+    SUMMARY_TOP_K = int(os.getenv("SUMMARY_TOP_K", 10))  # values kept per categorical column summary
+    CORRELATION_CACHE_SIZE = int(os.getenv("CORRELATION_CACHE_SIZE", 64))
+    CORRELATION_TOP_K = 20  # default pairs returned by /api/correlations
+    
+    # Executor Configuration
+    THREAD_POOL_WORKERS = int(os.getenv("THREAD_POOL_WORKERS", 4))
+    PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+    PROCESS_POOL_MIN_CELLS = int(os.getenv("PROCESS_POOL_MIN_CELLS", 5_000_000))  # rows x columns
+    EXECUTOR_ENDPOINT_LIMITS = os.getenv(
+        "EXECUTOR_ENDPOINT_LIMITS",
+        "upload=2,analysis=4,etl=2,export=2,history=4,rows=4,charts=4,correlations=2"
+    )
     
+    # LLM (Groq) Configuration
+    GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1")
+    GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 30))  # seconds per attempt
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 10))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+    LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", 0.5))
+
+    # Chart Proxy Configuration
+    CHART_API_URL = os.getenv("CHART_API_URL", "https://quickchart.io")
+    CHART_TIMEOUT = float(os.getenv("CHART_TIMEOUT", 15))
+    CHART_MAX_CONNECTIONS = int(os.getenv("CHART_MAX_CONNECTIONS", 20))
+    CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # 256 MB
+    CHART_CACHE_MAX_AGE = int(os.getenv("CHART_CACHE_MAX_AGE", 24 * 3600))  # seconds
+
     # Analysis Configuration
     MIN_UNIQUE_FOR_CATEGORICAL = 20
     OUTLIER_Z_SCORE_THRESHOLD = 3
     CORRELATION_THRESHOLD = 0.7
     SKEWNESS_THRESHOLD = 1.0
+    APPROX_STATS_MIN_ROWS = int(os.getenv("APPROX_STATS_MIN_ROWS", 10_000_000))  # sketches, bounded memory
+    HLL_PRECISION = int(os.getenv("HLL_PRECISION", 14))  # 2**p registers, ~0.8% error at 14
+    TDIGEST_COMPRESSION = float(os.getenv("TDIGEST_COMPRESSION", 200))
+    # Insights and anomalies above SAMPLE_MIN_ROWS run on a seeded sample; exact on request
+    SAMPLE_MIN_ROWS = int(os.getenv("SAMPLE_MIN_ROWS", 1_000_000))
+    SAMPLE_SIZE = int(os.getenv("SAMPLE_SIZE", 100_000))
+    SAMPLE_SEED = int(os.getenv("SAMPLE_SEED", 0))
+    SAMPLE_CONFIDENCE = float(os.getenv("SAMPLE_CONFIDENCE", 0.95))
     
     # Logging Configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -8,6 +8,10 @@ from typing import Dict, List, Any, Tuple, Optional
 from scipy import stats
 import logging
 
+from correlation import correlations
+from dtypes import TEXT_DTYPES
+from relationships import categorical_effects
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,24 +21,18 @@ class AdvancedAnalyzer:
     @staticmethod
     def calculate_correlation_matrix(df: pd.DataFrame) -> Dict[str, Any]:
         """Calculate correlation matrix for numeric columns"""
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        result = correlations(df, threshold=0.7)
+        numeric_cols = result['columns']
         
         if len(numeric_cols) < 2:
             return {'correlations': [], 'matrix': []}
         
-        corr_matrix = df[numeric_cols].corr()
-        
-        # Find strong correlations
-        strong_corrs = []
-        for i in range(len(numeric_cols)):
-            for j in range(i + 1, len(numeric_cols)):
-                corr_value = corr_matrix.iloc[i, j]
-                if abs(corr_value) > 0.7:
-                    strong_corrs.append({
-                        'col1': numeric_cols[i],
-                        'col2': numeric_cols[j],
-                        'correlation': float(corr_value),
-                    })
+        # Strong correlations, strongest first
+        strong_corrs = [
+            {'col1': pair['col1'], 'col2': pair['col2'], 'correlation': pair['correlation']}
+            for pair in result['pairs']
+        ]
+        corr_matrix = pd.DataFrame(result['matrix'], index=numeric_cols, columns=numeric_cols)
         
         return {
             'correlations': strong_corrs,
@@ -104,42 +102,35 @@ class AdvancedAnalyzer:
         return float(entropy)
     
     @staticmethod
-    def detect_relationships(df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Detect potential relationships between columns"""
+    def detect_relationships(df: pd.DataFrame, limit: Optional[int] = 10) -> List[Dict[str, Any]]:
+        """Detect potential relationships between columns, strongest correlations first, then category effects"""
         relationships = []
         
         numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+        categorical_cols = df.select_dtypes(include=TEXT_DTYPES).columns.tolist()
         
         # Check numeric correlations
         if len(numeric_cols) > 1:
-            corr_matrix = df[numeric_cols].corr()
-            for i in range(len(numeric_cols)):
-                for j in range(i + 1, len(numeric_cols)):
-                    corr = abs(corr_matrix.iloc[i, j])
-                    if corr > 0.7:
-                        relationships.append({
-                            'type': 'strong_correlation',
-                            'columns': [numeric_cols[i], numeric_cols[j]],
-                            'strength': float(corr),
-                        })
-        
-        # Check if numeric varies by category
-        for cat_col in categorical_cols[:5]:  # Limit to avoid slow processing
-            for num_col in numeric_cols[:5]:
-                try:
-                    groups = df.groupby(cat_col)[num_col].mean()
-                    if groups.std() / groups.mean() > 0.3:  # High variance
-                        relationships.append({
-                            'type': 'categorical_numeric_relationship',
-                            'categorical': cat_col,
-                            'numeric': num_col,
-                            'strength': 'moderate',
-                        })
-                except:
-                    pass
-        
-        return relationships[:10]  # Return top 10
+            for pair in correlations(df, columns=numeric_cols, threshold=0.7)['pairs']:
+                relationships.append({
+                    'type': 'strong_correlation',
+                    'columns': [pair['col1'], pair['col2']],
+                    'strength': abs(pair['correlation']),
+                })
+        
+        # Check if numeric varies by category: every pair, one bincount pass per categorical column
+        for effect in categorical_effects(df, categorical_cols, numeric_cols, min_effect=0.06, alpha=0.05):
+            relationships.append({
+                'type': 'categorical_numeric_relationship',
+                'categorical': effect['categorical'],
+                'numeric': effect['numeric'],
+                'strength': effect['effect'],
+                'eta_squared': effect['eta_squared'],
+                'f_statistic': effect['f_statistic'],
+                'p_value': effect['p_value'],
+            })
+        
+        return relationships[:limit]
     
     @staticmethod
     def suggest_visualizations(df: pd.DataFrame, analysis: Dict) -> List[str]:
@@ -147,7 +138,7 @@ class AdvancedAnalyzer:
         suggestions = []
         
         numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+        categorical_cols = df.select_dtypes(include=TEXT_DTYPES).columns.tolist()
         
         # Basic suggestions
         if len(numeric_cols) > 0:
@@ -176,23 +167,34 @@ class DataValidator:
     """Validate and clean data"""
     
     @staticmethod
-    def validate_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
-        """Validate dataframe and return issues"""
+    def validate_dataframe(df: pd.DataFrame, columns: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Validate dataframe and return issues. columns is the analyze_columns profile if
+        it has been computed already; its 'unique' and 'missing' counts are reused
+        (sketched on very large frames) instead of hashing every column again.
+        """
         issues = []
         warnings = []
         
+        if columns is None:
+            missing = df.isna().sum()
+            unique = df.nunique()
+        else:
+            missing = pd.Series({col: columns[col]['missing'] for col in df.columns}, dtype='int64')
+            unique = pd.Series({col: columns[col]['unique'] for col in df.columns}, dtype='int64')
+        
         # Check empty dataframe
         if len(df) == 0:
             issues.append('Empty dataframe')
         
         # Check for all null columns
         for col in df.columns:
-            if df[col].isna().all():
+            if missing[col] == len(df):
                 issues.append(f'Column "{col}" is entirely null')
         
         # Check for high cardinality
-        for col in df.select_dtypes(include=['object']).columns:
-            unique_ratio = df[col].nunique() / len(df)
+        for col in df.select_dtypes(include=TEXT_DTYPES).columns:
+            unique_ratio = unique[col] / len(df)
             if unique_ratio > 0.9:
                 warnings.append(f'Column "{col}" has very high cardinality ({unique_ratio*100:.1f}%)')
         
@@ -202,7 +204,7 @@ class DataValidator:
         
         # Check for single value columns
         for col in df.columns:
-            if df[col].nunique() == 1:
+            if unique[col] == 1:
                 warnings.append(f'Column "{col}" has only one unique value')
         
         return {
@@ -239,27 +241,11 @@ class CorrelationAnalyzer:
     @staticmethod
     def calculate_pairwise_correlations(df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Calculate pairwise correlations between all numeric columns"""
-        numeric_df = df.select_dtypes(include=[np.number])
-        
-        if len(numeric_df.columns) < 2:
-            return []
-        
-        correlations = []
-        
-        for i, col1 in enumerate(numeric_df.columns):
-            for col2 in numeric_df.columns[i+1:]:
-                try:
-                    corr = numeric_df[col1].corr(numeric_df[col2])
-                    if not pd.isna(corr):
-                        correlations.append({
-                            'col1': col1,
-                            'col2': col2,
-                            'pearson': float(corr),
-                        })
-                except:
-                    pass
-        
-        return sorted(correlations, key=lambda x: abs(x['pearson']), reverse=True)
+        # Every pair from one matrix product, already sorted by strength
+        return [
+            {'col1': pair['col1'], 'col2': pair['col2'], 'pearson': pair['correlation']}
+            for pair in correlations(df)['pairs']
+        ]
     
     @staticmethod
     def find_highly_correlated(correlations: List[Dict], threshold: float = 0.7) -> List[Dict]:
@@ -4,7 +4,7 @@ from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any, List
 import logging
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +58,12 @@ class MongoDB:
         await self.db["analyses"].create_index("upload_id")
         await self.db["analyses"].create_index("created_at")
         await self.db["analyses"].create_index("user_id")
+        await self.db["analyses"].create_index([("upload_id", 1), ("dataset_version", 1)])
+
+        # Index for cached AI results, MongoDB drops them once expired
+        await self.db["ai_results"].create_index("key", unique=True)
+        await self.db["ai_results"].create_index("upload_id")
+        await self.db["ai_results"].create_index("expires_at", expireAfterSeconds=0)
         # Index for shares collection
         await self.db["shares"].create_index("share_id", unique=True)
         await self.db["shares"].create_index("upload_id")
@@ -130,7 +136,8 @@ class MongoDB:
         self,
         upload_id: str,
         analysis_data: Dict[str, Any],
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        dataset_version: Optional[str] = None
     ) -> str:
         """Save data analysis results"""
         if self.db is None:
@@ -139,6 +146,7 @@ class MongoDB:
         analysis_doc = {
             "upload_id": upload_id,
             "user_id": user_id,
+            "dataset_version": dataset_version,
             "analysis": analysis_data,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
@@ -166,6 +174,50 @@ class MongoDB:
         analysis = await self.db["analyses"].find_one({"_id": analysis_id})
         return analysis
     
+    async def get_analysis_for_version(self, upload_id: str, dataset_version: str) -> Optional[Dict]:
+        """Get the analysis computed for a specific version of an upload's dataset"""
+        if self.db is None:
+            raise RuntimeError("Database not connected")
+        
+        analysis = await self.db["analyses"].find_one(
+            {"upload_id": upload_id, "dataset_version": dataset_version},
+            sort=[("created_at", -1)]
+        )
+        return analysis
+    
+    async def save_ai_result(
+        self,
+        key: str,
+        upload_id: str,
+        result: Dict[str, Any],
+        ttl_seconds: int
+    ):
+        """Cache an LLM-backed result under its key until it expires"""
+        if self.db is None:
+            raise RuntimeError("Database not connected")
+        
+        now = datetime.utcnow()
+        await self.db["ai_results"].update_one(
+            {"key": key},
+            {"$set": {
+                "upload_id": upload_id,
+                "result": result,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=ttl_seconds)
+            }},
+            upsert=True
+        )
+    
+    async def get_ai_result(self, key: str) -> Optional[Dict]:
+        """Get a cached LLM-backed result that has not expired yet"""
+        if self.db is None:
+            raise RuntimeError("Database not connected")
+        
+        # The TTL monitor only runs about once a minute, so filter on expiry too
+        return await self.db["ai_results"].find_one(
+            {"key": key, "expires_at": {"$gt": datetime.utcnow()}}
+        )
+    
     async def get_user_uploads(
         self,
         user_id: str,
@@ -0,0 +1,114 @@
+"""
+Ingest-time dtype optimization: integers are downcast to the smallest type that holds
+them, floats to float32 where no value changes, low-cardinality text becomes a category
+and other text an Arrow-backed string column.
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Dtypes of text columns once optimized, for select_dtypes
+TEXT_DTYPES = ['object', 'category', 'string']
+
+ARROW_STRING = pd.StringDtype("pyarrow")
+
+# Integer types tried in order; int64 is what the parsers produce
+SMALL_INTEGERS = (np.int8, np.int16, np.int32)
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """Bytes held by a frame's columns, strings included"""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def _downcast_integer(series: pd.Series) -> pd.Series:
+    if series.empty:
+        return series
+    low, high = series.min(), series.max()
+    for kind in SMALL_INTEGERS:
+        info = np.iinfo(kind)
+        if info.min <= low and high <= info.max:
+            return series.astype(kind)
+    return series
+
+
+def _downcast_float(series: pd.Series) -> pd.Series:
+    values = series.to_numpy()
+    with np.errstate(over='ignore'):
+        # Values out of float32 range become infinite and fail the comparison
+        narrow = values.astype(np.float32)
+    same = (narrow == values) | np.isnan(values)
+    return series.astype(np.float32) if same.all() else series
+
+
+def _encode_text(series: pd.Series, category_max_ratio: float, category_max_unique: int) -> pd.Series:
+    # Mixed, bytes or non-text object columns are left for the store to normalize
+    if pd.api.types.infer_dtype(series, skipna=True) != 'string':
+        return series
+    distinct = series.nunique(dropna=True)
+    if distinct <= category_max_unique and distinct <= category_max_ratio * len(series):
+        return series.astype('category')
+    return series.astype(ARROW_STRING)
+
+
+def optimize_dtypes(
+    df: pd.DataFrame,
+    category_max_ratio: float = 0.5,
+    category_max_unique: int = 10_000
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Frame with compact dtypes and a report of the memory before and after and of every
+    column that changed type. Text columns with at most category_max_unique distinct
+    values, covering at most category_max_ratio of the rows, become categories.
+    """
+    before = frame_memory(df)
+    optimized = df.copy(deep=False)
+    changed: Dict[str, Dict[str, str]] = {}
+    for col, dtype in df.dtypes.items():
+        series = df[col]
+        if isinstance(dtype, np.dtype) and dtype.kind == 'i':
+            series = _downcast_integer(series)
+        elif dtype == np.float64:
+            series = _downcast_float(series)
+        elif dtype == object:
+            series = _encode_text(series, category_max_ratio, category_max_unique)
+        if series.dtype != dtype:
+            optimized[col] = series
+            changed[str(col)] = {'from': str(dtype), 'to': str(series.dtype)}
+
+    after = frame_memory(optimized)
+    logger.info(f"Optimized dtypes of {len(changed)} column(s): {before:,} -> {after:,} bytes")
+    return optimized, {
+        'before_bytes': before,
+        'after_bytes': after,
+        'reduction': float(1 - after / before) if before else 0.0,
+        'columns': changed,
+    }
+
+
+def _wide_dtype(dtype: Any) -> Optional[type]:
+    """int64 or float64 for a small integer or float32 dtype, None for any other"""
+    if isinstance(dtype, np.dtype) and dtype.kind in 'if' and dtype.itemsize < 8:
+        return np.int64 if dtype.kind == 'i' else np.float64
+    return None
+
+
+def widen(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Columns of a frame with small integers and float32 widened to int64 and float64,
+    so arithmetic on them cannot overflow or lose precision
+    """
+    wide = {col: _wide_dtype(dtype) for col, dtype in df.dtypes.items()}
+    wide = {col: dtype for col, dtype in wide.items() if dtype is not None}
+    return df.astype(wide) if wide else df
+
+
+def widen_series(series: pd.Series) -> pd.Series:
+    """widen() for one column; aggregates of float32 are float32 and show its rounding"""
+    wide = _wide_dtype(series.dtype)
+    return series.astype(wide) if wide is not None else series
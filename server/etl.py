@@ -0,0 +1,264 @@
+"""
+ETL operations on DataFrames, shared by the single-step endpoints and the pipeline.
+
+A step is a plain dict so it can be sent to worker processes and stored in the history:
+{"op": "clean", "action": "drop_na", "column": None}, {"op": "calculate", "new_column": ...,
+"expression": ...} or {"op": "cast", "column": ..., "target_type": ...}.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dtypes import widen, widen_series
+from rowhash import deduplicate
+
+logger = logging.getLogger(__name__)
+
+# Simple security: substrings never allowed in a calculated-column expression
+FORBIDDEN_EXPRESSION_TOKENS = ["import", "eval", "exec", "os", "sys", "__", "builtins", "lambda"]
+
+# Clean actions that rewrite a column's text with the str method of the same name
+TEXT_ACTIONS = ("strip", "title")
+
+
+class OperationError(ValueError):
+    """Raised when an ETL step cannot be applied"""
+
+
+class ExpressionError(OperationError):
+    """Raised when a calculated-column expression cannot be evaluated"""
+
+
+def is_forbidden_expression(expression: str) -> bool:
+    """Check an expression against the disallowed tokens"""
+    return any(f in expression for f in FORBIDDEN_EXPRESSION_TOKENS)
+
+
+def _narrow(df: pd.DataFrame, columns: List[str]) -> List[str]:
+    """Numeric columns among the given ones stored in fewer than 8 bytes"""
+    return [col for col in columns if pd.api.types.is_numeric_dtype(df[col]) and df[col].dtype.itemsize < 8]
+
+
+def evaluate_expression(df: pd.DataFrame, expression: str) -> pd.Series:
+    """
+    Evaluate a column expression, numexpr first and the python engine as a fallback.
+    Downcast numeric columns it names are widened first, so results do not overflow.
+    """
+    named = [col for col in df.columns if str(col) in expression]
+    if _narrow(df, named):
+        df = widen(df[named])
+    # numexpr cannot read nullable or Arrow-backed columns, go straight to the python engine
+    engine = 'python' if any(not isinstance(df[col].dtype, np.dtype) for col in named) else None
+    try:
+        try:
+            return df.eval(expression, engine=engine)
+        except Exception:
+            # Fallback to python engine for more complex expressions or backtick issues
+            return df.eval(expression, engine='python')
+    except Exception as e:
+        raise ExpressionError(str(e))
+
+
+def _fill_mean(series: pd.Series) -> pd.Series:
+    """Gaps filled with the mean; float32 is widened first so the mean is written unrounded"""
+    series = widen_series(series) if series.dtype == np.float32 else series
+    return series.fillna(series.mean())
+
+
+def apply_clean(
+    df: pd.DataFrame,
+    action: str,
+    column: Optional[str] = None,
+    row_hashes: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    Drop missing values or duplicates, fill numeric gaps with the mean, or strip or
+    title-case the text of a column (strip, title).
+    row_hashes, one per row of df, spare drop_duplicates from hashing the whole frame.
+    """
+    if action == "drop_na":
+        if column:
+            df = df.dropna(subset=[column])
+        else:
+            df = df.dropna()
+    elif action == "drop_duplicates":
+        df = df.drop_duplicates() if row_hashes is None else deduplicate(df, row_hashes)
+    if action in ("drop_na", "drop_duplicates"):
+        # The filtered rows are already a new frame; a shallow copy drops pandas' slice
+        # marker so later steps can write columns without a SettingWithCopyWarning
+        df = df.copy(deep=False)
+    elif action == "fill_mean":
+        if column and pd.api.types.is_numeric_dtype(df[column]):
+            # Needs numeric, fills with mean
+            df[column] = _fill_mean(df[column])
+        elif not column:
+            # Fill all numeric with mean
+            numeric_cols = df.select_dtypes(include=[np.number]).columns
+            for col in numeric_cols:
+                df[col] = _fill_mean(df[col])
+    elif action in TEXT_ACTIONS and column:
+        # Values are treated as text, missing ones stay missing
+        series = df[column]
+        df[column] = getattr(series.astype(str).str, action)().where(series.notna())
+    return df
+
+
+def apply_calculate(df: pd.DataFrame, new_column: str, expression: str) -> pd.DataFrame:
+    """Add or replace a column computed from an expression"""
+    df[new_column] = evaluate_expression(df, expression)
+    return df
+
+
+def apply_cast(df: pd.DataFrame, column: str, target_type: str) -> pd.DataFrame:
+    """Convert a column to numeric, datetime or string"""
+    try:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Convert the values, not the categories, so the result is a plain column
+            series = series.astype(object)
+        if target_type == "numeric":
+            df[column] = pd.to_numeric(series, errors='coerce')
+        elif target_type == "datetime":
+            df[column] = pd.to_datetime(series, errors='coerce')
+        elif target_type == "string":
+            df[column] = series.astype(str)
+        else:
+            raise ValueError("Invalid target type")
+    except Exception as e:
+        raise OperationError(f"Casting error: {str(e)}")
+    return df
+
+
+def apply_step(df: pd.DataFrame, step: Dict[str, Any], row_hashes: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """Apply one step to a frame the caller owns, returns the resulting frame"""
+    op = step.get("op")
+    if op == "clean":
+        return apply_clean(df, step["action"], step.get("column"), row_hashes)
+    if op == "calculate":
+        return apply_calculate(df, step["new_column"], step["expression"])
+    if op == "cast":
+        return apply_cast(df, step["column"], step["target_type"])
+    raise OperationError(f"Unknown operation: {op}")
+
+
+def apply_steps(
+    df: pd.DataFrame,
+    steps: List[Dict[str, Any]],
+    row_hashes: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    Apply steps in order; errors name the failing step when there is more than one.
+    row_hashes are the stored hashes of df's rows, which must be labelled by position
+    (DatasetStore.load_for_update); drop_duplicates uses them until a step writes a column.
+    """
+    for i, step in enumerate(steps):
+        try:
+            hashes = None
+            if row_hashes is not None and step.get("action") == "drop_duplicates":
+                hashes = row_hashes[df.index.to_numpy()]
+            df = apply_step(df, step, hashes)
+            if not filters_rows([step]):
+                row_hashes = None
+            continue
+        except KeyError as e:
+            error = OperationError(f"Column {str(e)} not found")
+        except OperationError as e:
+            error = e
+        if len(steps) > 1:
+            error = type(error)(f"Step {i + 1} ({step.get('op')}): {str(error)}")
+        raise error
+    return df
+
+
+def changed_columns(steps: List[Dict[str, Any]]) -> Optional[List[str]]:
+    """Columns the steps write, or None when a step may change rows or many columns"""
+    changed: List[str] = []
+    for step in steps:
+        if step.get("op") == "calculate":
+            changed.append(step["new_column"])
+        elif step.get("op") == "cast":
+            changed.append(step["column"])
+        elif step.get("op") == "clean" and step.get("action") in ("fill_mean", *TEXT_ACTIONS) and step.get("column"):
+            changed.append(step["column"])
+        else:
+            return None
+    return list(dict.fromkeys(changed))
+
+
+def filters_rows(steps: List[Dict[str, Any]]) -> bool:
+    """Whether the steps only drop rows, leaving the values of the rows kept unchanged"""
+    return all(step.get("op") == "clean" and step.get("action") in ("drop_na", "drop_duplicates") for step in steps)
+
+
+def _fusable(step: Dict[str, Any]) -> Optional[str]:
+    """Kind of run a step can be fused into, None when it must run alone"""
+    if step.get("op") == "calculate" and step["new_column"].isidentifier():
+        return "eval"
+    if step.get("op") == "clean" and step.get("action") == "fill_mean":
+        return "fillna"
+    return None
+
+
+def _fill_means(df: pd.DataFrame, steps: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Several fill_mean steps as one fillna call; filling a column twice changes nothing"""
+    columns: List[str] = []
+    for step in steps:
+        if step.get("column"):
+            if pd.api.types.is_numeric_dtype(df[step["column"]]):
+                columns.append(step["column"])
+        else:
+            columns.extend(df.select_dtypes(include=[np.number]).columns)
+    columns = list(dict.fromkeys(columns))
+    for col in columns:
+        # Widened like _fill_mean, so both paths write the same dtype
+        if df[col].dtype == np.float32:
+            df[col] = widen_series(df[col])
+    if columns:
+        df = df.fillna(value={col: df[col].mean() for col in columns})
+    return df
+
+
+def _eval_run(df: pd.DataFrame, steps: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Several calculations as one multi-line eval, widening the columns they read like evaluate_expression"""
+    expressions = "\n".join(f"{step['new_column']} = {step['expression']}" for step in steps)
+    narrow = _narrow(df, [col for col in df.columns if str(col) in expressions])
+    if not narrow:
+        return df.eval(expressions)
+    wide = widen(df[narrow])
+    frame = df.copy(deep=False)
+    for col in narrow:
+        frame[col] = wide[col]
+    result = frame.eval(expressions)
+    for step in steps:
+        df[step["new_column"]] = result[step["new_column"]]
+    return df
+
+
+def materialize(df: pd.DataFrame, steps: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Replay recorded steps on a frame the caller owns. Steps were validated when they
+    were recorded, so runs of calculations become one multi-line eval and runs of
+    fill_mean one fillna; a fused run that fails is replayed step by step.
+    """
+    i = 0
+    while i < len(steps):
+        kind = _fusable(steps[i])
+        j = i + 1
+        while kind and j < len(steps) and _fusable(steps[j]) == kind:
+            j += 1
+        run = steps[i:j]
+        if len(run) == 1:
+            df = apply_step(df, run[0])
+        else:
+            try:
+                if kind == "eval":
+                    df = _eval_run(df, run)
+                else:
+                    df = _fill_means(df, run)
+            except Exception:
+                df = apply_steps(df, run)
+        i = j
+    return df
@@ -0,0 +1,98 @@
+"""
+Thread and process pools for CPU-bound pandas work, so handlers never block the event loop
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_endpoint_limits(spec: str) -> Dict[str, int]:
+    """Parse 'upload=2,analysis=4' into {'upload': 2, 'analysis': 4}"""
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class DatasetExecutor:
+    """
+    Dispatch blocking work to a thread pool (small frames) or a process pool (large frames).
+    Process-pool tasks receive an upload_id and load the stored columnar file themselves,
+    so DataFrames are never pickled across the process boundary.
+    """
+
+    def __init__(
+        self,
+        thread_workers: int,
+        process_workers: int,
+        endpoint_limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 4,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+        start_method: str = "spawn"
+    ):
+        self.thread_pool = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="dataset")
+        self.process_workers = process_workers
+        self.endpoint_limits = endpoint_limits or {}
+        self.default_limit = default_limit
+        self._initializer = initializer
+        self._initargs = initargs
+        self._start_method = start_method
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def process_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Process pool, started on first use; None when disabled"""
+        if self._process_pool is None and self.process_workers > 0:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context(self._start_method),
+                initializer=self._initializer,
+                initargs=self._initargs,
+            )
+        return self._process_pool
+
+    def _semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        if endpoint not in self._semaphores:
+            limit = self.endpoint_limits.get(endpoint, self.default_limit)
+            self._semaphores[endpoint] = asyncio.Semaphore(limit)
+        return self._semaphores[endpoint]
+
+    async def run(self, endpoint: str, func: Callable, *args: Any, process: bool = False, **kwargs: Any) -> Any:
+        """
+        Run func(*args, **kwargs) off the event loop, at most N at a time per endpoint.
+        With process=True func must be a module-level function taking picklable arguments.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self.process_pool if process else None
+        async with self._semaphore(endpoint):
+            return await loop.run_in_executor(pool or self.thread_pool, partial(func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load per endpoint for monitoring"""
+        return {
+            "endpoints": {
+                name: {
+                    "limit": self.endpoint_limits.get(name, self.default_limit),
+                    "available": sem._value,
+                }
+                for name, sem in self._semaphores.items()
+            },
+            "process_pool_started": self._process_pool is not None,
+        }
+
+    def shutdown(self):
+        """Stop both pools"""
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
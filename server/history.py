@@ -0,0 +1,360 @@
+"""
+Version history for stored datasets, kept as column-level deltas
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from storage import DatasetStore
+
+logger = logging.getLogger(__name__)
+
+
+class VersionHistory:
+    """
+    Undo/redo history for datasets held in a DatasetStore.
+
+    ETL steps are undone by popping them off the store's operation plan. Every edit is also
+    recorded here (checkpoint before it, record after it), which is what lets undo and redo
+    cross a base that replaced the plan, such as a plan compaction.
+
+    Every version is a manifest listing the base's columns as references to content-addressed
+    single-column Parquet blobs, plus the plan that was on top of it. A column that did not
+    change is shared by all versions that contain it, so an edit only writes the columns it
+    touched, and a version that only differs by its plan writes no data at all. The first
+    version of a dataset is a full snapshot of every column. Manifests live in one index.json
+    per upload with a position pointer, so moving between versions never scans the directory.
+
+        history/<upload_id>/index.json
+        history/<upload_id>/columns/<digest>.parquet
+    """
+
+    INDEX_NAME = "index.json"
+    BLOB_DIR = "columns"
+
+    def __init__(
+        self,
+        root: Path,
+        store: DatasetStore,
+        max_versions: int = 20,
+        max_bytes: int = 256 * 1024 * 1024
+    ):
+        self.root = Path(root)
+        self.root.mkdir(exist_ok=True)
+        self.store = store
+        self.max_versions = max_versions
+        self.max_bytes = max_bytes
+        self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+
+    def checkpoint(self, upload_id: str):
+        """
+        Make sure the stored dataset is the current version in the history.
+        Call before an edit; a no-op when it is already recorded.
+        """
+        with self._lock(upload_id):
+            index = self._load_index(upload_id)
+            if self._ensure_current(upload_id, index):
+                self._save_index(upload_id, index)
+
+    def record(self, upload_id: str, operation: Dict[str, Any]):
+        """
+        Append the stored dataset as a new version after an edit, dropping any redo steps.
+        An edit that only added to the plan shares the previous version's columns; a new base
+        has every column hashed and only new data written.
+        An edit that left the content unchanged kept the version token and is not recorded.
+        """
+        with self._lock(upload_id):
+            index = self._load_index(upload_id)
+            if index["entries"] and index["entries"][index["position"]]["version"] == self.store.version(upload_id):
+                return
+            self._append(upload_id, index, operation)
+            self._save_index(upload_id, index)
+
+    def undo(self, upload_id: str) -> bool:
+        """Undo the last planned step, or restore the previous version; False when there is none"""
+        with self._lock(upload_id):
+            if self.store.undo_step(upload_id):
+                return True
+            index = self._load_index(upload_id)
+            if not index["entries"]:
+                return False
+            entry = index["entries"][index["position"]]
+            if entry["plan"] and entry["base_version"] == self.store.version(upload_id):
+                # Every planned step of the current version is undone, go to the version before it.
+                # When that is this base recorded before its plan was compacted, undo into that plan
+                previous = index["entries"][index["position"] - 1] if index["position"] > 0 else None
+                if previous is not None and previous["version"] == entry["base_version"] and previous["plan"]:
+                    self._restore(upload_id, previous)
+                    self.store.undo_step(upload_id)
+                    index["position"] -= 1
+                    self._save_index(upload_id, index)
+                    return True
+                return self._move(upload_id, index, -1)
+            # Record unsaved changes first so they can be redone
+            self._ensure_current(upload_id, index)
+            entry = index["entries"][index["position"]]
+            if entry["plan"]:
+                # The base was compacted since, put the plan back and undo its last step;
+                # steps undone on the compacted base still apply on top of the same content
+                self._restore(upload_id, entry, redo=self.store.read_schema(upload_id).get("redo", []))
+                self.store.undo_step(upload_id)
+                self._save_index(upload_id, index)
+                return True
+            return self._move(upload_id, index, -1)
+
+    def redo(self, upload_id: str) -> bool:
+        """Redo the last undone step, or restore the next version; False when there is none"""
+        with self._lock(upload_id):
+            if self.store.redo_step(upload_id):
+                return True
+            index = self._load_index(upload_id)
+            if not index["entries"]:
+                return False
+            self._ensure_current(upload_id, index)
+            following = index["entries"][index["position"] + 1] if index["position"] + 1 < len(index["entries"]) else None
+            if following is not None and following["plan"] and following["base_version"] == self.store.version(upload_id):
+                # The next version is a plan on top of the current content, redo it one step at a time
+                self._restore(upload_id, {**following, "plan": []}, redo=following["plan"][::-1])
+                self.store.redo_step(upload_id)
+                index["position"] += 1
+                self._save_index(upload_id, index)
+                return True
+            return self._move(upload_id, index, 1)
+
+    def compact(self, upload_id: str, max_steps: int) -> bool:
+        """Fold a plan of max_steps or more into a new base, recording the old one first"""
+        with self._lock(upload_id):
+            if len(self.store.plan(upload_id)) < max_steps:
+                return False
+            index = self._load_index(upload_id)
+            if self._ensure_current(upload_id, index):
+                self._save_index(upload_id, index)
+            self.store.compact(upload_id)
+            logger.info(f"Compacted the operation plan of {upload_id}")
+            return True
+
+    def describe(self, upload_id: str) -> Dict[str, Any]:
+        """Versions and the current position, for the API"""
+        index = self._load_index(upload_id)
+        return {
+            "position": index["position"],
+            "plan_steps": len(self.store.plan(upload_id)),
+            "versions": [
+                {"id": e["id"], "operation": e["operation"], "rows": e["rows"], "changes": e["changes"],
+                 "created_at": e["created_at"]}
+                for e in index["entries"]
+            ],
+            "bytes": sum(index["blobs"].values()),
+        }
+
+    def migrate_legacy(self) -> int:
+        """Import legacy full-copy snapshots (CSV or Parquet files per timestamp) into the index"""
+        migrated = 0
+        for folder in sorted(p for p in self.root.iterdir() if p.is_dir()):
+            legacy = sorted(
+                (p for p in folder.iterdir() if p.suffix in (".csv", ".parquet")),
+                key=os.path.getmtime
+            )
+            if not legacy:
+                continue
+            upload_id = folder.name
+            with self._lock(upload_id):
+                index = self._load_index(upload_id)
+                for path in legacy:
+                    try:
+                        df = pd.read_csv(path) if path.suffix == ".csv" else pd.read_parquet(path)
+                        sidecar = path.with_suffix(DatasetStore.SCHEMA_SUFFIX)
+                        version = None
+                        if sidecar.exists():
+                            with open(sidecar, "r", encoding="utf-8") as f:
+                                version = json.load(f).get("version")
+                        df = DatasetStore._prepare_frame(df)
+                        version = version or uuid.uuid4().hex
+                        self._push(index, {
+                            "version": version,
+                            "base_version": version,
+                            "columns": [[name, self._write_blob(upload_id, index, df[name])] for name in df.columns],
+                            "rows": int(len(df)),
+                            "base_rows": int(len(df)),
+                            "plan": [],
+                            "fingerprint": None,
+                            "changes": None,
+                            "operation": {"action": "snapshot", "legacy": path.name},
+                        }, truncate=False)
+                        self._enforce_limits(upload_id, index)
+                        path.unlink()
+                        if sidecar.exists():
+                            sidecar.unlink()
+                        migrated += 1
+                    except Exception as e:
+                        logger.error(f"Failed to migrate history file {path}: {str(e)}")
+                self._save_index(upload_id, index)
+        return migrated
+
+    def _move(self, upload_id: str, index: Dict[str, Any], step: int) -> bool:
+        target = index["position"] + step
+        # Skip versions with the same content as the current one
+        schema = self.store.read_schema(upload_id) or {}
+        version, content = schema.get("version"), schema.get("fingerprint")
+        while 0 <= target < len(index["entries"]) and (
+            index["entries"][target]["version"] == version
+            or (content is not None and index["entries"][target]["fingerprint"] == content)
+        ):
+            target += step
+        if not 0 <= target < len(index["entries"]):
+            self._save_index(upload_id, index)
+            return False
+
+        entry = index["entries"][target]
+        self._restore(upload_id, entry)
+        index["position"] = target
+        self._save_index(upload_id, index)
+        logger.info(f"Moved {upload_id} to history version {entry['id']}")
+        return True
+
+    def _restore(self, upload_id: str, entry: Dict[str, Any], redo: Optional[List[Dict[str, Any]]] = None):
+        df = pd.DataFrame({name: self._read_blob(upload_id, digest) for name, digest in entry["columns"]})
+        # Restoring the original version tokens lets cached analyses be reused
+        self.store.restore(upload_id, df, entry["base_version"], entry["plan"], redo=redo)
+
+    def _ensure_current(self, upload_id: str, index: Dict[str, Any]) -> bool:
+        """Append the stored dataset when it is not the current version, True if it was appended"""
+        version = self.store.version(upload_id)
+        if version is None:
+            return False
+        entries = index["entries"]
+        if entries and entries[index["position"]]["version"] == version:
+            return False
+        self._append(upload_id, index, {"action": "snapshot"})
+        return True
+
+    def _append(self, upload_id: str, index: Dict[str, Any], operation: Dict[str, Any]):
+        schema = self.store.read_schema(upload_id)
+        base = schema.get("base", schema)
+        entries = index["entries"]
+        previous = entries[index["position"]] if entries else None
+
+        if previous is not None and previous["base_version"] == base["version"]:
+            # Same base, only the plan on top of it differs
+            columns = previous["columns"]
+        else:
+            # Blobs are content-addressed, columns the previous version holds are not written again
+            names = [c["name"] for c in base["columns"]]
+            frame = self.store.load_base_columns(upload_id, names)
+            columns = [[name, self._write_blob(upload_id, index, frame[name])] for name in names]
+
+        self._push(index, {
+            "version": schema["version"],
+            "base_version": base["version"],
+            "columns": columns,
+            "rows": schema["rows"],
+            "base_rows": base["rows"],
+            "plan": schema.get("plan", []),
+            "fingerprint": schema.get("fingerprint"),
+            "changes": schema.get("changes"),
+            "operation": operation,
+        }, truncate=True)
+        self._enforce_limits(upload_id, index)
+
+    @staticmethod
+    def _push(index: Dict[str, Any], entry: Dict[str, Any], truncate: bool):
+        if truncate:
+            # A new edit after an undo discards the redo steps
+            del index["entries"][index["position"] + 1:]
+        index["entries"].append({
+            "id": index["next_id"],
+            **entry,
+            "created_at": datetime.utcnow().isoformat(),
+        })
+        index["next_id"] += 1
+        index["position"] = len(index["entries"]) - 1
+
+    def _enforce_limits(self, upload_id: str, index: Dict[str, Any]):
+        """Drop the oldest versions beyond max_versions or max_bytes, then their unused blobs"""
+        entries = index["entries"]
+        while index["position"] > 0 and (
+            len(entries) > self.max_versions or self._referenced_bytes(index) > self.max_bytes
+        ):
+            entries.pop(0)
+            index["position"] -= 1
+
+        referenced = {digest for e in entries for _, digest in e["columns"]}
+        for digest in [d for d in index["blobs"] if d not in referenced]:
+            self._blob_path(upload_id, digest).unlink(missing_ok=True)
+            del index["blobs"][digest]
+
+    @staticmethod
+    def _referenced_bytes(index: Dict[str, Any]) -> int:
+        referenced = {digest for e in index["entries"] for _, digest in e["columns"]}
+        return sum(index["blobs"].get(d, 0) for d in referenced)
+
+    @staticmethod
+    def _digest(series: pd.Series) -> str:
+        """Content hash of a column's values and dtype"""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(series.dtype).encode("utf-8"))
+        try:
+            h.update(pd.util.hash_pandas_object(series, index=False).values.tobytes())
+        except TypeError:
+            # Unhashable cell values, store the column without deduplication
+            h.update(uuid.uuid4().bytes)
+        return h.hexdigest()
+
+    def _write_blob(self, upload_id: str, index: Dict[str, Any], series: pd.Series) -> str:
+        digest = self._digest(series)
+        if digest in index["blobs"]:
+            return digest
+        path = self._blob_path(upload_id, digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        pd.DataFrame({"values": series.reset_index(drop=True)}).to_parquet(
+            tmp_path, index=False, compression=self.store.compression
+        )
+        os.replace(tmp_path, path)
+        index["blobs"][digest] = path.stat().st_size
+        return digest
+
+    def _read_blob(self, upload_id: str, digest: str) -> pd.Series:
+        return pd.read_parquet(self._blob_path(upload_id, digest))["values"]
+
+    def _blob_path(self, upload_id: str, digest: str) -> Path:
+        return self.root / upload_id / self.BLOB_DIR / f"{digest}.parquet"
+
+    def _index_path(self, upload_id: str) -> Path:
+        return self.root / upload_id / self.INDEX_NAME
+
+    def _load_index(self, upload_id: str) -> Dict[str, Any]:
+        path = self._index_path(upload_id)
+        if not path.exists():
+            return {"position": -1, "next_id": 0, "entries": [], "blobs": {}}
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        for entry in index["entries"]:
+            # Versions recorded before operation plans existed
+            entry.setdefault("base_version", entry["version"])
+            entry.setdefault("base_rows", entry["rows"])
+            entry.setdefault("plan", [])
+            # Versions recorded before row hashes existed
+            entry.setdefault("fingerprint", None)
+            entry.setdefault("changes", None)
+        return index
+
+    def _save_index(self, upload_id: str, index: Dict[str, Any]):
+        path = self._index_path(upload_id)
+        path.parent.mkdir(exist_ok=True)
+        DatasetStore._write_json(path, index)
+
+    def _lock(self, upload_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks[upload_id]
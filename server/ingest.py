@@ -0,0 +1,97 @@
+"""
+Streaming, size-bounded ingestion of uploaded files
+"""
+
+import io
+import logging
+from typing import BinaryIO, Iterable
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class FileTooLargeError(Exception):
+    """Raised when an uploaded file crosses the configured size limit"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"File exceeds the maximum upload size of {round(max_bytes / (1024 * 1024), 2):g} MB")
+
+
+class SizeLimitedReader(io.RawIOBase):
+    """
+    Read-only view over an upload that fails as soon as more than max_bytes are consumed.
+    Parsers pull from it in small chunks, so the raw bytes are never held in memory at once.
+    """
+
+    def __init__(self, raw: BinaryIO, max_bytes: int):
+        self._raw = raw
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._raw.read(len(buffer))
+        if not chunk:
+            return 0
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.max_bytes:
+            raise FileTooLargeError(self.max_bytes)
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def file_size(raw: BinaryIO) -> int:
+    """Size of a seekable upload without reading it"""
+    position = raw.tell()
+    raw.seek(0, io.SEEK_END)
+    size = raw.tell()
+    raw.seek(position)
+    return size
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversize request bodies on upload routes while they are still streaming in,
+    instead of after the whole file has been spooled to disk.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes + MULTIPART_OVERHEAD
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        detail = str(FileTooLargeError(self.max_bytes - MULTIPART_OVERHEAD))
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            logger.warning(f"Rejected upload of {int(content_length):,} bytes on {scope['path']}")
+            response = JSONResponse(status_code=413, content={"detail": detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Propagates out of form parsing as-is and is answered with 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,163 @@
+"""
+Shared async client for Groq chat completions, pooled and bounded
+"""
+
+import asyncio
+import logging
+import random
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when the LLM API cannot produce a completion"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class LLMClient:
+    """
+    Chat-completions client on one pooled httpx.AsyncClient.
+    Connections are kept alive between calls, at most max_concurrency requests are
+    in flight, and timeouts, 429s and 5xx responses are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str],
+        model: str,
+        timeout: float = 30.0,
+        max_connections: int = 10,
+        max_concurrency: int = 8,
+        max_retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client, created on first use so it binds to the running event loop"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+            )
+        return self._client
+
+    def _slot(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Backoff before the next attempt, honouring a numeric Retry-After header"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.replace(".", "", 1).isdigit():
+                return min(float(retry_after), self.max_backoff)
+        delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+        return delay * (0.5 + random.random() / 2)
+
+    async def chat(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        json_mode: bool = False,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Send a single-message chat completion and return the reply text"""
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if temperature is not None:
+            payload["temperature"] = temperature
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+
+        async with self._slot():
+            self.requests += 1
+            for attempt in range(self.max_retries + 1):
+                last_attempt = attempt == self.max_retries
+                try:
+                    response = await self.client.post(
+                        "/chat/completions", json=payload, timeout=timeout or self.timeout
+                    )
+                except httpx.TimeoutException as e:
+                    if last_attempt:
+                        self.failures += 1
+                        raise LLMError(504, f"LLM request timed out: {str(e) or type(e).__name__}")
+                    response = None
+                except httpx.TransportError as e:
+                    if last_attempt:
+                        self.failures += 1
+                        raise LLMError(502, f"LLM connection failed: {str(e) or type(e).__name__}")
+                    response = None
+                else:
+                    if response.status_code == 200:
+                        try:
+                            body = response.json()
+                            break
+                        except ValueError as e:
+                            # A truncated or non-JSON body is retried like a 502
+                            if last_attempt:
+                                self.failures += 1
+                                raise LLMError(502, f"LLM returned invalid JSON: {str(e)}")
+                    elif last_attempt or response.status_code not in RETRY_STATUSES:
+                        self.failures += 1
+                        raise LLMError(response.status_code, response.text)
+
+                self.retries += 1
+                delay = self._delay(attempt, response)
+                logger.warning(f"LLM call failed (attempt {attempt + 1}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        try:
+            return body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            logger.error(f"Unexpected LLM response: {body}")
+            raise LLMError(502, "LLM returned an unexpected response format")
+
+    def stats(self) -> Dict[str, Any]:
+        """Call counters for monitoring"""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,76 @@
+"""
+Local stand-in for the Groq chat-completions API, for tests and offline development.
+
+    uvicorn llm_stub:app --port 8100
+    GROQ_API_URL=http://127.0.0.1:8100/openai/v1 uvicorn main:app
+
+LLM_STUB_DELAY adds latency (seconds) and LLM_STUB_FAIL_RATE makes that share of
+requests answer 503, to exercise timeouts and retries. LLM_STUB_RETRY_AFTER sends a
+Retry-After header (seconds) with those 503s.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="LLM stub")
+
+STUB_DELAY = float(os.getenv("LLM_STUB_DELAY", 0))
+STUB_FAIL_RATE = float(os.getenv("LLM_STUB_FAIL_RATE", 0))
+STUB_RETRY_AFTER = os.getenv("LLM_STUB_RETRY_AFTER")
+
+# One object that satisfies every JSON prompt the API sends
+STUB_JSON = {
+    "trend": "Stub trend",
+    "prediction": "Values keep rising",
+    "confidence": 80,
+    "drivers": ["Stub driver 1", "Stub driver 2"],
+    "finding": "Stub finding",
+    "root_cause": "Stub root cause",
+    "advice": ["Stub advice 1", "Stub advice 2", "Stub advice 3"],
+    "cleaning_steps": [],
+}
+
+STUB_TEXT = "- Stub insight one\n- Stub insight two\n- Stub insight three"
+
+stats = {"requests": 0, "failures": 0}
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    """Answer like the OpenAI-compatible endpoint, with canned content"""
+    body = await request.json()
+    stats["requests"] += 1
+
+    if STUB_DELAY:
+        await asyncio.sleep(STUB_DELAY)
+    if STUB_FAIL_RATE and random.random() < STUB_FAIL_RATE:
+        stats["failures"] += 1
+        headers = {"Retry-After": STUB_RETRY_AFTER} if STUB_RETRY_AFTER else None
+        return JSONResponse(status_code=503, content={"error": {"message": "stub overloaded"}}, headers=headers)
+
+    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+    content = json.dumps(STUB_JSON) if json_mode else STUB_TEXT
+    return {
+        "id": f"stub-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    }
+
+
+@app.get("/stats")
+async def stub_stats():
+    """Request counters, for asserting on retries"""
+    return stats
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("LLM_STUB_PORT", 8100)))
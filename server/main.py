@@ -1,16 +1,18 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Response
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import pandas as pd
 import numpy as np
+import io
 from io import BytesIO
+import asyncio
 import logging
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Awaitable, Callable
 from datetime import datetime
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import json
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pathlib import Path
 import os
 import sys
@@ -38,48 +40,104 @@ else:
 # Setup local storage for persistence
 UPLOAD_DIR = Path(__file__).parent / "uploads"
 HISTORY_DIR = Path(__file__).parent / "history"
+CHART_CACHE_DIR = Path(__file__).parent / "chart_cache"
 UPLOAD_DIR.mkdir(exist_ok=True)
 HISTORY_DIR.mkdir(exist_ok=True)
 
-class HistoryManager:
-    @staticmethod
-    def save_version(upload_id: str):
-        """Save current state of file to history before modification"""
-        source = UPLOAD_DIR / f"{upload_id}.csv"
-        if not source.exists():
-            return
-        
-        # Keep up to 5 versions
-        version_folder = HISTORY_DIR / upload_id
-        version_folder.mkdir(exist_ok=True)
-        
-        versions = sorted(list(version_folder.glob("*.csv")), key=os.path.getmtime)
-        if len(versions) >= 5:
-            os.remove(versions[0]) # Delete oldest
-            
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        target = version_folder / f"{timestamp}.csv"
-        import shutil
-        shutil.copy2(source, target)
-        logger.info(f"Saved version for {upload_id} at {timestamp}")
-
-    @staticmethod
-    def rollback(upload_id: str) -> bool:
-        """Restore last version"""
-        version_folder = HISTORY_DIR / upload_id
-        if not version_folder.exists():
-            return False
-            
-        versions = sorted(list(version_folder.glob("*.csv")), key=os.path.getmtime)
-        if not versions:
-            return False
-            
-        last_version = versions[-1]
-        target = UPLOAD_DIR / f"{upload_id}.csv"
-        import shutil
-        shutil.move(str(last_version), str(target))
-        logger.info(f"Rolled back {upload_id} to {last_version.name}")
-        return True
+sys.path.append(os.path.dirname(__file__))
+from config import settings
+from storage import DatasetStore
+from cache import ChartImageCache, DatasetCache, ResultCache
+from chart_proxy import ChartProxy, ChartRenderError
+from history import VersionHistory
+from etl import TEXT_ACTIONS, ExpressionError, OperationError, changed_columns, is_forbidden_expression
+from aggregation import ChartSpecError
+from correlation import METHODS as CORRELATION_METHODS, CorrelationError
+from ingest import FileTooLargeError, UploadSizeLimitMiddleware
+from dtypes import optimize_dtypes
+from analyzer import DataAnalyzer, PREDICTION_PROMPT_VERSION, ADVICE_PROMPT_VERSION
+from executor import DatasetExecutor, parse_endpoint_limits
+from llm import LLMClient, LLMError
+from serialization import FastJSONResponse, frame_response, negotiate_format
+import tasks
+
+# Uploaded datasets are kept as typed columnar files; CSV is only an export format
+dataset_cache = DatasetCache(max_bytes=settings.DATASET_CACHE_MAX_BYTES)
+dataset_store = DatasetStore(
+    UPLOAD_DIR,
+    compression=settings.DATASET_COMPRESSION,
+    cache=dataset_cache,
+    row_group_size=settings.DATASET_ROW_GROUP_SIZE,
+    summary_bins=settings.MAX_HISTOGRAM_BINS,
+    summary_top_k=settings.SUMMARY_TOP_K,
+)
+
+# CPU-bound pandas work runs in pools; worker processes open the store from disk
+tasks.register_store(dataset_store)
+dataset_executor = DatasetExecutor(
+    thread_workers=settings.THREAD_POOL_WORKERS,
+    process_workers=settings.PROCESS_POOL_WORKERS,
+    endpoint_limits=parse_endpoint_limits(settings.EXECUTOR_ENDPOINT_LIMITS),
+    initializer=tasks.init_worker,
+    initargs=(
+        str(UPLOAD_DIR), settings.DATASET_COMPRESSION, settings.DATASET_ROW_GROUP_SIZE,
+        settings.MAX_HISTOGRAM_BINS, settings.SUMMARY_TOP_K,
+    ),
+)
+
+
+def use_process_pool(upload_id: str) -> bool:
+    """Large datasets are processed in worker processes, small ones in threads"""
+    schema = dataset_store.read_schema(upload_id)
+    if not schema:
+        return False
+    return schema["rows"] * len(schema["columns"]) >= settings.PROCESS_POOL_MIN_CELLS
+
+# One pooled client for every Groq call, so a slow completion never blocks the event loop
+llm_client = LLMClient(
+    base_url=settings.GROQ_API_URL,
+    api_key=groq_key,
+    model=settings.GROQ_MODEL,
+    timeout=settings.LLM_TIMEOUT,
+    max_connections=settings.LLM_MAX_CONNECTIONS,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_retries=settings.LLM_MAX_RETRIES,
+    backoff=settings.LLM_BACKOFF_SECONDS,
+)
+
+# Chart images rendered by QuickChart.io, cached on disk by config
+chart_proxy = ChartProxy(
+    base_url=settings.CHART_API_URL,
+    cache=ChartImageCache(CHART_CACHE_DIR, max_bytes=settings.CHART_CACHE_MAX_BYTES),
+    timeout=settings.CHART_TIMEOUT,
+    max_connections=settings.CHART_MAX_CONNECTIONS,
+)
+
+# Frontend analysis payloads keyed by (upload_id, dataset version)
+analysis_cache = ResultCache(max_entries=settings.ANALYSIS_CACHE_SIZE)
+
+# LLM answers keyed by (upload_id, dataset version, kind, prompt version, model)
+ai_cache = ResultCache(max_entries=settings.AI_CACHE_SIZE, ttl=settings.AI_CACHE_TTL)
+
+# Chart data keyed by (upload_id, dataset version, spec)
+chart_data_cache = ResultCache(max_entries=settings.CHART_DATA_CACHE_SIZE)
+
+# Correlation matrices keyed by (upload_id, dataset version, method, columns, threshold, top_k, min_periods)
+correlation_cache = ResultCache(max_entries=settings.CORRELATION_CACHE_SIZE)
+
+# Sorted row positions for /api/rows, keyed by (upload_id, dataset version, column, descending)
+row_order_cache = ResultCache(max_entries=settings.ROW_ORDER_CACHE_SIZE)
+
+# Exact re-analyses of sampled payloads running in the background, keyed by (upload_id, dataset version)
+exact_analysis_jobs: Dict[Any, asyncio.Task] = {}
+
+# Undo/redo history, stored as column-level deltas next to the datasets
+version_history = VersionHistory(
+    HISTORY_DIR,
+    dataset_store,
+    max_versions=settings.HISTORY_MAX_VERSIONS,
+    max_bytes=settings.HISTORY_MAX_BYTES,
+)
 
 # Pydantic models for Data ETL
 class CleanRequest(BaseModel):
@@ -94,12 +152,38 @@ class CastRequest(BaseModel):
     column: str
     target_type: str
 
+class PipelineStep(BaseModel):
+    # Exactly one of these, applied in list order
+    clean: Optional[CleanRequest] = None
+    calculate: Optional[CalculateRequest] = None
+    cast: Optional[CastRequest] = None
+
+    def to_step(self) -> Dict[str, Any]:
+        """Plain step dict understood by etl.apply_steps"""
+        ops = [(op, getattr(self, op)) for op in ("clean", "calculate", "cast") if getattr(self, op) is not None]
+        if len(ops) != 1:
+            raise HTTPException(status_code=400, detail="Each pipeline step needs exactly one of clean, calculate or cast")
+        op, params = ops[0]
+        return {"op": op, **params.model_dump()}
+
+class PipelineRequest(BaseModel):
+    steps: List[PipelineStep]
+    dry_run: bool = False  # return the analysis of the result without saving it
+
 class ChatRequest(BaseModel):
     message: str
 
+class ChartDataRequest(BaseModel):
+    kind: str  # "groupby", "histogram", "timeseries" or "series"
+    x: str
+    y: Optional[str] = None
+    agg: str = "count"  # count, sum, mean, median, min or max
+    bins: int = Field(settings.MAX_HISTOGRAM_BINS, ge=1, le=1000)
+    freq: Optional[str] = None  # pandas offset alias for time buckets, picked from max_points when unset
+    max_points: int = Field(settings.MAX_CHART_POINTS, ge=3, le=settings.CHART_POINTS_LIMIT)
+    limit: int = Field(20, ge=1, le=1000)  # groups returned by groupby
+
 # Import database module
-import sys
-sys.path.append(os.path.dirname(__file__))
 from database import init_db, close_db, get_db
 
 
@@ -107,7 +191,8 @@ from database import init_db, close_db, get_db
 app = FastAPI(
     title="QuickCharts API",
     description="Data visualization and analysis API", 
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Exception handlers for better error reporting and CORS support on errors
@@ -139,6 +224,8 @@ async def http_exception_handler(request, exc):
     )
 
 # Add Middleware BEFORE including routes
+# Registered before CORS so its 413 responses still get CORS headers
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.MAX_FILE_SIZE, paths=["/api/upload"])
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -171,340 +258,200 @@ async def startup_event():
     except Exception as e:
         logger.warning(f"Database initialization failed: {str(e)}. Continuing without persistence.")
 
+    # One-time migration of legacy CSV uploads and full-copy history snapshots; a no-op once converted
+    migrated = dataset_store.migrate_csv_uploads() + version_history.migrate_legacy()
+    if migrated:
+        logger.info(f"Migrated {migrated} legacy file(s) to columnar storage")
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database on shutdown"""
+    dataset_executor.shutdown()
+    await llm_client.aclose()
+    await chart_proxy.aclose()
     try:
         await close_db()
         logger.info("Database closed on shutdown")
     except Exception as e:
         logger.warning(f"Database shutdown error: {str(e)}")
 
-class DataAnalyzer:
-    """Analyze uploaded data files"""
-    
-    @staticmethod
-    def read_file(file: UploadFile) -> Optional[pd.DataFrame]:
-        """Read CSV or Excel file"""
+async def stored_analysis(upload_id: str, version: Optional[str]) -> Optional[Dict]:
+    """Analysis payload of one dataset version from memory, then MongoDB"""
+    result = analysis_cache.get((upload_id, version)) if version else None
+    if result is None and version:
         try:
-            filename = file.filename.lower()
-            
-            # Reset file pointer - CRITICAL FIX!
-            file.file.seek(0)
-            
-            if filename.endswith('.csv'):
-                content = file.file.read()
-                df = pd.read_csv(BytesIO(content))
-            elif filename.endswith(('.xlsx', '.xls')):
-                content = file.file.read()
-                df = pd.read_excel(BytesIO(content))
-            else:
-                return None
-                
-            return df
+            db = await get_db()
+            doc = await db.get_analysis_for_version(upload_id, version)
+            if doc:
+                result = doc["analysis"]
+                analysis_cache.put((upload_id, version), result)
         except Exception as e:
-            logger.error(f"Error reading file: {str(e)}")
-            return None
-    
-    @staticmethod
-    def analyze_columns(df: pd.DataFrame) -> Dict[str, Any]:
-        """Analyze each column in the dataframe"""
-        analysis = {}
-        
-        for col in df.columns:
-            col_data = df[col]
-            
-            analysis[col] = {
-                'dtype': str(col_data.dtype),
-                'unique': int(col_data.nunique()),
-                'missing': int(col_data.isna().sum()),
-                'missing_percent': float(col_data.isna().sum() / len(df)),
-            }
-            
-            # Numeric statistics
-            if pd.api.types.is_numeric_dtype(col_data):
-                analysis[col].update({
-                    'mean': float(col_data.mean()) if not col_data.isna().all() else None,
-                    'median': float(col_data.median()) if not col_data.isna().all() else None,
-                    'std': float(col_data.std()) if not col_data.isna().all() else None,
-                    'min': float(col_data.min()) if not col_data.isna().all() else None,
-                    'max': float(col_data.max()) if not col_data.isna().all() else None,
-                    '25%': float(col_data.quantile(0.25)) if not col_data.isna().all() else None,
-                    '75%': float(col_data.quantile(0.75)) if not col_data.isna().all() else None,
-                })
-        
-        return analysis
-    
-    @staticmethod
-    def generate_insights(df: pd.DataFrame, analysis: Dict) -> List[Dict]:
-        """Generate AI-like insights from data"""
-        insights = []
-        
-        # Check for missing values
-        total_missing = df.isna().sum().sum()
-        if total_missing > 0:
-            missing_percent = (total_missing / (len(df) * len(df.columns))) * 100
-            insights.append({
-                'type': 'alert',
-                'title': 'Missing Data Detected',
-                'message': f'Found {total_missing:,} missing values ({missing_percent:.1f}% of total data)',
-                'description': 'Missing values can affect analysis accuracy. Consider imputation or removal.',
-                'recommendation': 'Clean missing values using forward fill, interpolation, or removal strategies.'
-            })
-        
-        # Check for duplicates
-        duplicates = df.duplicated().sum()
-        if duplicates > 0:
-            insights.append({
-                'type': 'alert',
-                'title': 'Duplicate Rows Found',
-                'message': f'Detected {duplicates} duplicate rows',
-                'description': 'Duplicate rows can skew analysis results.',
-                'recommendation': 'Remove duplicate rows to improve data quality.'
-            })
-        
-        # Numeric column insights
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        
-        for col in numeric_cols[:5]:  # Limit to first 5 numeric columns
-            col_data = df[col].dropna()
-            
-            if len(col_data) > 0:
-                mean = col_data.mean()
-                std = col_data.std()
-                
-                # Check for outliers (simple z-score)
-                if std > 0:
-                    z_scores = np.abs((col_data - mean) / std)
-                    outliers = (z_scores > 3).sum()
-                    
-                    if outliers > 0:
-                        insights.append({
-                            'type': 'general',
-                            'title': f'Outliers in {col}',
-                            'message': f'Found {outliers} potential outliers (|z-score| > 3)',
-                            'description': f'Column "{col}" has {outliers} values that deviate significantly from the mean.',
-                            'metrics': {
-                                'mean': float(mean),
-                                'std_dev': float(std),
-                                'outlier_count': int(outliers)
-                            }
-                        })
-        
-        # Data completeness
-        completeness = 1 - (total_missing / (len(df) * len(df.columns)))
-        insights.append({
-            'type': 'general',
-            'title': 'Data Completeness',
-            'message': f'Dataset is {completeness*100:.1f}% complete',
-            'description': f'Your dataset has good data quality with {completeness*100:.1f}% completeness.',
-            'metrics': {
-                'completeness_score': float(completeness)
-            }
-        })
-        
-        return insights
-    
-    @staticmethod
-    def detect_anomalies(df: pd.DataFrame) -> List[Dict]:
-        """Detect statistical anomalies in numeric columns"""
-        anomalies = []
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        
-        for col in numeric_cols:
-            col_data = df[col].dropna()
-            if len(col_data) < 10: continue
-            
-            # Simple IQR based anomaly detection
-            Q1 = col_data.quantile(0.25)
-            Q3 = col_data.quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            outlier_indices = col_data[(col_data < lower_bound) | (col_data > upper_bound)].index.tolist()
-            if len(outlier_indices) > 0:
-                anomalies.append({
-                    "column": col,
-                    "count": len(outlier_indices),
-                    "percentage": (len(outlier_indices) / len(df)) * 100,
-                    "example_indices": outlier_indices[:5]
-                })
-        return anomalies
-
-    @staticmethod
-    async def get_auto_summary(df: pd.DataFrame) -> str:
-        """Generate a 3-bullet point TL;DR using Groq (Llama 3)"""
+            logger.warning(f"Analysis lookup failed: {str(e)}")
+    return result
+
+
+async def get_dataset_analysis(
+    upload_id: str,
+    filename: str,
+    user_id: Optional[str] = None,
+    fresh: bool = False,
+    previous: Optional[Dict] = None,
+    changed: Optional[List[str]] = None
+) -> Dict:
+    """
+    Analysis payload for the current version of a stored dataset.
+    Served from memory, then MongoDB, and only recomputed when neither has it.
+    Pass fresh=True right after a write, when no tier can know the new version yet;
+    previous and changed then let only the edited columns be re-analyzed.
+    """
+    version = dataset_store.version(upload_id)
+    result = analysis_cache.get((upload_id, version)) if version else None
+    if result is None and not fresh:
+        result = await stored_analysis(upload_id, version)
+
+    preview = None
+    if result is None:
+        result = await dataset_executor.run(
+            "analysis", tasks.analyze_dataset, upload_id, filename,
+            previous=previous, changed=changed, process=use_process_pool(upload_id)
+        )
+        # The preview frame is attached per response, cached payloads stay small
+        result = dict(result)
+        preview = result.pop("data")
+        if version:
+            analysis_cache.put((upload_id, version), result)
+            try:
+                db = await get_db()
+                await db.save_analysis(upload_id, result, user_id=user_id, dataset_version=version)
+            except Exception as e:
+                logger.warning(f"Analysis save failed: {str(e)}")
+
+    if preview is None:
+        preview = await dataset_executor.run("rows", dataset_store.load_rows, upload_id, 0, settings.PREVIEW_ROWS)
+    # Stored with the dataset at write time, so this is a small file read
+    summaries = await dataset_executor.run("rows", dataset_store.summaries, upload_id)
+
+    # Cached payloads are shared, hand out a copy with request-specific metadata
+    response = {k: v for k, v in result.items() if k not in ("_id", "upload_id", "public", "ai_summary", "data")}
+    response["data"] = preview
+    response["summaries"] = summaries
+    response["metadata"] = {**result["metadata"], "filename": filename}
+    response["upload_id"] = upload_id
+    return response
+
+
+async def get_ai_result(
+    upload_id: str,
+    kind: str,
+    prompt_version: str,
+    compute: Callable[[pd.DataFrame, LLMClient], Awaitable[Dict]],
+    refresh: bool = False
+) -> Dict:
+    """
+    LLM-backed result for the current version of a stored dataset.
+    Served from memory, then MongoDB, and only sent to the model when neither has it
+    or refresh=True. Error payloads are never cached.
+    """
+    version = dataset_store.version(upload_id)
+    key = (upload_id, version, kind, prompt_version, llm_client.model)
+    db_key = ":".join(str(part) for part in key)
+
+    if version and not refresh:
+        result = ai_cache.get(key)
+        if result is not None:
+            return result
         try:
-            head = df.head(10).to_csv(index=False)
-            info = df.describe().to_string()
-            
-            prompt = f"Analyze this dataset and provide exactly 3 bullet points summarizing the most interesting trends or facts. Keep it punchy.\nData Sample:\n{head}\nStats:\n{info}"
-            
-            api_key = os.getenv("GROQ_API_KEY")
-            url = "https://api.groq.com/openai/v1/chat/completions"
-            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-            payload = {
-                "model": "llama-3.3-70b-versatile",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.5
-            }
-            
-            response = requests.post(url, json=payload, headers=headers)
-            if response.status_code != 200:
-                logger.error(f"Groq Summary Error: {response.text}")
-                return "Dataset analysis ready."
-                
-            return response.json()["choices"][0]["message"]["content"]
+            db = await get_db()
+            doc = await db.get_ai_result(db_key)
+            if doc:
+                ai_cache.put(key, doc["result"])
+                return doc["result"]
         except Exception as e:
-            logger.error(f"Auto-summary error: {str(e)}")
-            return "Dataset uploaded. Ready for analysis."
-    
-    @staticmethod
-    async def get_predictions(df: pd.DataFrame) -> Dict:
-        """Generate AI-powered predictions and forecasts"""
+            logger.warning(f"AI result lookup failed: {str(e)}")
+
+    # Read-only, so the memory-mapped copy shared by every worker will do
+    df = await dataset_executor.run("rows", dataset_store.load_mapped, upload_id)
+    result = await compute(df, llm_client)
+    if version and "error" not in result:
+        ai_cache.put(key, result)
         try:
-            head = df.head(10).to_csv(index=False)
-            stats = df.describe(include='all').to_string()
-            
-            prompt = f"""You are a predictive analyst. Based on this dataset sample and statistics:
-Dataset Sample:
-{head}
-Stats:
-{stats}
-
-Task:
-1. Identify the most important numerical trend to forecast.
-2. Provide a 'Prediction' (what will happen next).
-3. Provide a 'Confidence Score' (0-100%).
-4. List 2 'Key Drivers' for this prediction.
-
-Return a JSON object:
-{{
-  "trend": "string",
-  "prediction": "string",
-  "confidence": number,
-  "drivers": ["string", "string"]
-}}
-Only return JSON."""
-            
-            api_key = os.getenv("GROQ_API_KEY")
-            url = "https://api.groq.com/openai/v1/chat/completions"
-            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-            payload = {
-                "model": "llama-3.3-70b-versatile",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.4,
-                "response_format": {"type": "json_object"}
-            }
-            
-            response = requests.post(url, json=payload, headers=headers)
-            if response.status_code != 200:
-                return {"error": "Prediction engine temporarily offline"}
-                
-            return json.loads(response.json()["choices"][0]["message"]["content"])
+            db = await get_db()
+            await db.save_ai_result(db_key, upload_id, result, ttl_seconds=settings.AI_CACHE_TTL)
         except Exception as e:
-            logger.error(f"Prediction error: {str(e)}")
-            return {"error": "Failed to generate predictions"}
+            logger.warning(f"AI result save failed: {str(e)}")
+    return result
 
-    @staticmethod
-    async def get_causes_advice(df: pd.DataFrame) -> Dict:
-        """Analyze root causes and provide business advice"""
-        try:
-            head = df.head(10).to_csv(index=False)
-            stats = df.describe(include='all').to_string()
-            
-            prompt = f"""You are a Strategic Business Consultant. Analyze this data:
-{stats}
 
-Task:
-1. Identify a significant pattern/issue.
-2. Explain the likely 'Root Cause'.
-3. Provide 3 actionable 'Strategic Advice' points.
+def data_format(request: Request, fmt: Optional[str]) -> str:
+    """Format for a data payload: records, columnar or arrow, from ?format= or Accept"""
+    try:
+        return negotiate_format(fmt, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-Return a JSON object:
-{{
-  "finding": "string",
-  "root_cause": "string",
-  "advice": ["string", "string", "string"]
-}}
-Only return JSON."""
-            
-            api_key = os.getenv("GROQ_API_KEY")
-            url = "https://api.groq.com/openai/v1/chat/completions"
-            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-            payload = {
-                "model": "llama-3.3-70b-versatile",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.6,
-                "response_format": {"type": "json_object"}
-            }
-            
-            response = requests.post(url, json=payload, headers=headers)
-            if response.status_code != 200:
-                return {"error": "Consultation service temporarily offline"}
-                
-            return json.loads(response.json()["choices"][0]["message"]["content"])
-        except Exception as e:
-            logger.error(f"Advice error: {str(e)}")
-            return {"error": "Failed to generate causes and advice"}
-
-    @staticmethod
-    def assess_data_quality(df: pd.DataFrame) -> Dict:
-        """Assess overall data quality"""
-        total_cells = len(df) * len(df.columns)
-        missing_count = df.isna().sum().sum()
-        duplicate_count = df.duplicated().sum()
-        
-        quality_score = 1 - (missing_count / total_cells) - (duplicate_count / len(df) * 0.1)
-        quality_score = max(0, min(1, quality_score))
-        
-        issues = []
-        if missing_count > 0:
-            issues.append(f"Contains {missing_count:,} missing values")
-        if duplicate_count > 0:
-            issues.append(f"Contains {duplicate_count:,} duplicate rows")
-        if len(df.columns) > 50:
-            issues.append("Dataset has many columns, consider dimensionality reduction")
-        if len(df) < 10:
-            issues.append("Dataset is very small, analysis may be limited")
-        
-        return {
-            'quality_score': float(quality_score),
-            'missing_count': int(missing_count),
-            'duplicate_count': int(duplicate_count),
-            'completeness': float(1 - (missing_count / total_cells)),
-            'issues': issues
-        }
-    
-    @staticmethod
-    def prepare_for_frontend(df: pd.DataFrame, filename: str) -> Dict:
-        """Prepare data for frontend consumption"""
-        # Limit data for preview (first 1000 rows max)
-        preview_df = df.head(1000)
-        data = preview_df.fillna("").to_dict('records')
-        columns = list(df.columns)
-        
-        # Analyze full dataset
-        analysis = DataAnalyzer.analyze_columns(df)
-        insights = DataAnalyzer.generate_insights(df, analysis)
-        data_quality = DataAnalyzer.assess_data_quality(df)
-        anomalies = DataAnalyzer.detect_anomalies(df)
-        
-        return {
-            'data': data,
-            'columns': columns,
-            'analysis': analysis,
-            'insights': insights,
-            'data_quality': data_quality,
-            'anomalies': anomalies,
-            'metadata': {
-                'filename': filename,
-                'rows': int(len(df)),
-                'columns': int(len(df.columns)),
-                'uploaded_at': datetime.now().isoformat()
-            }
-        }
+
+def validate_etl_steps(steps: List[Dict[str, Any]]):
+    """Reject steps before any work is done"""
+    if not steps:
+        raise HTTPException(status_code=400, detail="No operations given")
+    for step in steps:
+        if step["op"] == "calculate" and is_forbidden_expression(step["expression"]):
+            raise HTTPException(status_code=400, detail="Disallowed expression")
+
+
+def etl_http_error(e: OperationError) -> HTTPException:
+    """400 response for a step that could not be applied"""
+    if isinstance(e, ExpressionError):
+        logger.error(f"Eval error: {str(e)}")
+        return HTTPException(status_code=400, detail=f"Expression Error: {str(e)}. Tip: Enclose column names with spaces in backticks like `My Column`.")
+    return HTTPException(status_code=400, detail=str(e))
+
+
+async def apply_etl_steps(upload: Dict, upload_id: str, steps: List[Dict[str, Any]], user_id: str) -> Dict:
+    """
+    Apply ETL steps to a stored dataset as one edit: one load, one plan entry and one
+    analysis pass. Large datasets are processed in a worker process.
+    """
+    validate_etl_steps(steps)
+    previous_version = dataset_store.version(upload_id)
+    await dataset_executor.run("history", version_history.checkpoint, upload_id)
+
+    # Steps are appended to the dataset's operation plan, the stored base is not rewritten
+    try:
+        await dataset_executor.run(
+            "etl", tasks.apply_pipeline, upload_id, steps, process=use_process_pool(upload_id)
+        )
+    except OperationError as e:
+        raise etl_http_error(e)
+    # Same base as the checkpoint, so the new version only adds a manifest entry
+    await dataset_executor.run("history", version_history.record, upload_id, {"action": "etl", "steps": steps})
+    # Long plans are folded into a new base now and then, so cold loads stay cheap
+    await dataset_executor.run("history", version_history.compact, upload_id, settings.PLAN_MAX_STEPS)
+
+    # Re-analyze the changed data once, return new results. Steps that only write some
+    # columns keep the previous analysis of the others
+    changed = changed_columns(steps)
+    previous = await stored_analysis(upload_id, previous_version) if changed is not None else None
+    return await get_dataset_analysis(
+        upload_id, upload["filename"], user_id=user_id, fresh=True, previous=previous, changed=changed
+    )
+
+
+async def compute_exact_analysis(upload_id: str, filename: str, version: str, user_id: Optional[str] = None):
+    """Replace the sampled analysis of one dataset version with an exact one"""
+    result = await dataset_executor.run(
+        "analysis", tasks.analyze_dataset, upload_id, filename, exact=True, process=use_process_pool(upload_id)
+    )
+    result = {k: v for k, v in result.items() if k != "data"}
+    if dataset_store.version(upload_id) != version:
+        return  # Written meanwhile, the new version is analyzed on its own
+    analysis_cache.put((upload_id, version), result)
+    try:
+        db = await get_db()
+        await db.save_analysis(upload_id, result, user_id=user_id, dataset_version=version)
+    except Exception as e:
+        logger.warning(f"Exact analysis save failed: {str(e)}")
+    logger.info(f"Exact analysis ready for {upload_id} version {version}")
 
 
 @app.get("/health")
@@ -517,36 +464,43 @@ async def health_check():
         db_status = "connected"
     except Exception as e:
         db_status = f"disconnected: {str(e)}"
-    return {"status": "ok", "database": db_status}
+    return {
+        "status": "ok",
+        "database": db_status,
+        "dataset_cache": dataset_cache.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "ai_cache": ai_cache.stats(),
+        "row_order_cache": row_order_cache.stats(),
+        "chart_data_cache": chart_data_cache.stats(),
+        "correlation_cache": correlation_cache.stats(),
+        "exact_analysis_jobs": len(exact_analysis_jobs),
+        "executor": dataset_executor.stats(),
+        "llm": llm_client.stats(),
+        "chart_proxy": chart_proxy.stats(),
+    }
 
 @app.get("/chart")
-async def get_chart(c: str, w: int = 500, h: int = 300, f: str = 'png', v: Optional[str] = '3'):
+async def get_chart(request: Request, c: str, w: int = 500, h: int = 300, f: str = 'png', v: Optional[str] = '3'):
     """
     Proxy to QuickChart.io for generating chart images
     This allows the frontend to use the local API for chart generation
     """
-    import httpx
-    import urllib.parse
-    from fastapi.responses import Response
-    
-    # Re-encode the configuration to ensure it's a valid URL parameter
-    # The 'c' parameter from FastAPI is already decoded, so we MUST re-encode it
-    encoded_c = urllib.parse.quote(c)
-    
-    # QuickChart.io URL with version support (default to v3 for modern plugins syntax)
-    qc_url = f"https://quickchart.io/chart?c={encoded_c}&w={w}&h={h}&f={f}&v={v}"
+    # A config always renders to the same image, so its content address is a strong ETag
+    etag = f'"{ChartProxy.cache_key(c, w, h, f, v)}"'
+    cache_headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.CHART_CACHE_MAX_AGE}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=cache_headers)
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(qc_url, timeout=15.0)
-            if response.status_code == 200:
-                media_type = f"image/{f}" if f in ['png', 'jpg', 'jpeg'] else "image/png"
-                if f == 'pdf': media_type = "application/pdf"
-                
-                return Response(content=response.content, media_type=media_type)
-            else:
-                logger.error(f"QuickChart API error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=response.status_code, detail=f"Chart generation failed: {response.text}")
+        # QuickChart.io with version support (default to v3 for modern plugins syntax)
+        content = await chart_proxy.render(c, w, h, f, v)
+        media_type = f"image/{f}" if f in ['png', 'jpg', 'jpeg'] else "image/png"
+        if f == 'pdf': media_type = "application/pdf"
+        
+        return Response(content=content, media_type=media_type, headers=cache_headers)
+    except ChartRenderError as e:
+        logger.error(f"QuickChart API error: {e.status_code} - {e.detail}")
+        raise HTTPException(status_code=500, detail=f"Chart generation failed: {e.detail}")
     except Exception as e:
         logger.error(f"Error proxying chart request: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Chart generation error: {str(e)}")
@@ -567,7 +521,10 @@ async def upload_file(file: UploadFile = File(...), current_user: dict = Depends
         logger.info(f"Processing file: {file.filename} (size: {file.size})")
         
         # Read file
-        df = DataAnalyzer.read_file(file)
+        try:
+            df = await dataset_executor.run("upload", DataAnalyzer.read_file, file)
+        except FileTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
         if df is None:
             raise HTTPException(
                 status_code=400,
@@ -581,8 +538,14 @@ async def upload_file(file: UploadFile = File(...), current_user: dict = Depends
         if len(df.columns) == 0:
             raise HTTPException(status_code=400, detail="File has no columns")
         
+        # Compact dtypes before anything holds on to the frame
+        df, memory = await dataset_executor.run(
+            "upload", optimize_dtypes, df, settings.CATEGORY_MAX_RATIO, settings.CATEGORY_MAX_UNIQUE
+        )
+        
         # Prepare response
-        result = DataAnalyzer.prepare_for_frontend(df, file.filename)
+        result = await dataset_executor.run("analysis", DataAnalyzer.prepare_for_frontend, df, file.filename)
+        result['metadata']['memory'] = memory
         
         # Save to MongoDB if available
         try:
@@ -594,15 +557,22 @@ async def upload_file(file: UploadFile = File(...), current_user: dict = Depends
                 metadata={
                     'rows': len(df),
                     'columns': len(df.columns),
+                    'memory': memory,
                 }
             )
             
-            # Persist data permanently as CSV
-            file_path = UPLOAD_DIR / f"{upload_id}.csv"
-            df.to_csv(file_path, index=False)
+            # Persist data permanently in columnar form
+            schema = await dataset_executor.run("upload", dataset_store.save, upload_id, df)
+            file_path = dataset_store.data_path(upload_id)
             
-            # Save analysis results
-            analysis_id = await db.save_analysis(upload_id, result, user_id=current_user["id"])
+            # Save analysis results, keyed by the stored version so later reads reuse them
+            stored = {k: v for k, v in result.items() if k != "data"}
+            analysis_cache.put((upload_id, schema["version"]), stored)
+            analysis_id = await db.save_analysis(
+                upload_id, stored, user_id=current_user["id"], dataset_version=schema["version"]
+            )
+            result = dict(result)
+            result['summaries'] = dataset_store.summaries(upload_id)
             result['_id'] = str(analysis_id)
             result['upload_id'] = str(upload_id)  # Pass back to frontend
             
@@ -611,7 +581,7 @@ async def upload_file(file: UploadFile = File(...), current_user: dict = Depends
             logger.warning(f"Database save failed: {str(db_error)}. Continuing without persistence.")
         
         logger.info(f"Successfully processed file: {file.filename} ({len(df)} rows, {len(df.columns)} columns)")
-        return result
+        return FastJSONResponse(result)
         
     except HTTPException:
         raise
@@ -633,28 +603,68 @@ async def get_recent_uploads(current_user: dict = Depends(get_current_user)):
         return {"uploads": [], "error": str(e)}
 
 @app.get("/api/uploads/{upload_id}")
-async def get_upload_data(upload_id: str, current_user: dict = Depends(get_current_user)):
+async def get_upload_data(
+    upload_id: str,
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format"),
+    current_user: dict = Depends(get_current_user)
+):
     """Retrieve existing data without re-uploading (Option 2)"""
     try:
+        frame_format = data_format(request, fmt)
         db = await get_db()
         upload = await db.get_upload(upload_id)
         if not upload or upload.get("user_id") != current_user["id"]:
             raise HTTPException(status_code=404, detail="Upload not found")
         
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        if not file_path.exists():
+        if not dataset_store.exists(upload_id):
             raise HTTPException(status_code=404, detail="File lost from server")
             
-        df = pd.read_csv(file_path)
-        result = DataAnalyzer.prepare_for_frontend(df, upload["filename"])
-        result["upload_id"] = upload_id
-        return result
+        result = await get_dataset_analysis(upload_id, upload["filename"], user_id=current_user["id"])
+        return frame_response(result, frame_format)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error retrieving file: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/uploads/{upload_id}/exact")
+async def request_exact_analysis(upload_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Upgrade a sampled analysis to an exact one in the background. Returns 202 while it
+    runs; once "ready", GET /api/uploads/{upload_id} serves the exact payload.
+    """
+    try:
+        db = await get_db()
+        upload = await db.get_upload(upload_id)
+        if not upload or upload.get("user_id") != current_user["id"]:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if not dataset_store.exists(upload_id):
+            raise HTTPException(status_code=404, detail="File lost from server")
+
+        version = dataset_store.version(upload_id)
+        key = (upload_id, version)
+        job = exact_analysis_jobs.get(key)
+        if job is None:
+            current = await get_dataset_analysis(upload_id, upload["filename"], user_id=current_user["id"])
+            if not current.get("sampling", {}).get("sampled"):
+                return {"status": "ready", "version": version}
+            job = asyncio.ensure_future(
+                compute_exact_analysis(upload_id, upload["filename"], version, user_id=current_user["id"])
+            )
+            exact_analysis_jobs[key] = job
+        elif job.done():
+            exact_analysis_jobs.pop(key, None)
+            if job.exception() is not None:
+                raise HTTPException(status_code=500, detail=f"Exact analysis failed: {str(job.exception())}")
+            return {"status": "ready", "version": version}
+        return JSONResponse({"status": "running", "version": version}, status_code=202)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting exact analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/clean/{upload_id}")
 async def clean_data(upload_id: str, request: CleanRequest, current_user: dict = Depends(get_current_user)):
     """Interactively Clean Data (Option 3)"""
@@ -664,43 +674,13 @@ async def clean_data(upload_id: str, request: CleanRequest, current_user: dict =
         if not upload or upload.get("user_id") != current_user["id"]:
             raise HTTPException(status_code=404, detail="Upload not found")
             
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        if not file_path.exists():
+        if not dataset_store.exists(upload_id):
             raise HTTPException(status_code=404, detail="Data file not found")
             
-        df = pd.read_csv(file_path)
-        
-        # Save version before change
-        HistoryManager.save_version(upload_id)
-        
-        # Apply ETL operations
-        if request.action == "drop_na":
-            if request.column:
-                df = df.dropna(subset=[request.column])
-            else:
-                df = df.dropna()
-        elif request.action == "drop_duplicates":
-            df = df.drop_duplicates()
-        elif request.action == "fill_mean":
-            if request.column and pd.api.types.is_numeric_dtype(df[request.column]):
-                # Needs numeric, fills with mean
-                df[request.column] = df[request.column].fillna(df[request.column].mean())
-            elif not request.column:
-                # Fill all numeric with mean
-                numeric_cols = df.select_dtypes(include=[np.number]).columns
-                for col in numeric_cols:
-                    df[col] = df[col].fillna(df[col].mean())
-        
-        # Save modifications permanently back to disk
-        df.to_csv(file_path, index=False)
-        
-        filename = upload["filename"]
-        
-        # Re-analyze newly cleaned data, return new results
-        result = DataAnalyzer.prepare_for_frontend(df, filename)
-        result["upload_id"] = upload_id
-        return result
-        
+        step = {"op": "clean", **request.model_dump()}
+        return FastJSONResponse(await apply_etl_steps(upload, upload_id, [step], current_user["id"]))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error cleaning data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -714,44 +694,11 @@ async def calculate_data(upload_id: str, request: CalculateRequest, current_user
         if not upload or upload.get("user_id") != current_user["id"]:
             raise HTTPException(status_code=404, detail="Upload not found")
 
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        if not file_path.exists():
+        if not dataset_store.exists(upload_id):
             raise HTTPException(status_code=404, detail="Data file not found")
             
-        df = pd.read_csv(file_path)
-        
-        # Save version before change
-        HistoryManager.save_version(upload_id)
-        
-        # Simple security: filter out dangerous characters in expression
-        forbidden = ["import", "eval", "exec", "os", "sys", "__", "builtins", "lambda"]
-        if any(f in request.expression for f in forbidden):
-            raise HTTPException(status_code=400, detail="Disallowed expression")
-
-        # Create localized context matching all column names
-        import numexpr
-        
-        try:
-            # First try optimized numexpr engine
-            try:
-                result = df.eval(request.expression)
-                df[request.new_column] = result
-            except:
-                # Fallback to python engine for more complex expressions or backtick issues
-                result = df.eval(request.expression, engine='python')
-                df[request.new_column] = result
-        except Exception as eval_err:
-            logger.error(f"Eval error: {str(eval_err)}")
-            raise HTTPException(status_code=400, detail=f"Expression Error: {str(eval_err)}. Tip: Enclose column names with spaces in backticks like `My Column`.")
-        
-        # Save modifications
-        df.to_csv(file_path, index=False)
-        
-        filename = upload["filename"]
-        
-        result = DataAnalyzer.prepare_for_frontend(df, filename)
-        result["upload_id"] = upload_id
-        return result
+        step = {"op": "calculate", **request.model_dump()}
+        return FastJSONResponse(await apply_etl_steps(upload, upload_id, [step], current_user["id"]))
     except HTTPException:
         raise
     except Exception as e:
@@ -767,37 +714,51 @@ async def cast_data(upload_id: str, request: CastRequest, current_user: dict = D
         if not upload or upload.get("user_id") != current_user["id"]:
             raise HTTPException(status_code=404, detail="Upload not found")
 
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        if not file_path.exists():
+        if not dataset_store.exists(upload_id):
             raise HTTPException(status_code=404, detail="Data file not found")
             
-        df = pd.read_csv(file_path)
-        
-        # Save version before change
-        HistoryManager.save_version(upload_id)
-        
+        step = {"op": "cast", **request.model_dump()}
+        return FastJSONResponse(await apply_etl_steps(upload, upload_id, [step], current_user["id"]))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in casting: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/pipeline/{upload_id}")
+async def run_pipeline(upload_id: str, request: PipelineRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Apply an ordered list of clean/calculate/cast steps in one round trip.
+    The result is saved as a single version and analyzed once; with dry_run it is only previewed.
+    """
+    try:
+        db = await get_db()
+        upload = await db.get_upload(upload_id)
+        if not upload or upload.get("user_id") != current_user["id"]:
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+        if not dataset_store.exists(upload_id):
+            raise HTTPException(status_code=404, detail="Data file not found")
+
+        steps = [step.to_step() for step in request.steps]
+        if not request.dry_run:
+            return FastJSONResponse(await apply_etl_steps(upload, upload_id, steps, current_user["id"]))
+
+        validate_etl_steps(steps)
         try:
-            if request.target_type == "numeric":
-                df[request.column] = pd.to_numeric(df[request.column], errors='coerce')
-            elif request.target_type == "datetime":
-                df[request.column] = pd.to_datetime(df[request.column], errors='coerce')
-            elif request.target_type == "string":
-                df[request.column] = df[request.column].astype(str)
-            else:
-                raise HTTPException(status_code=400, detail="Invalid target type")
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Casting error: {str(e)}")
-            
-        df.to_csv(file_path, index=False)
-        filename = upload["filename"]
-        
-        result = DataAnalyzer.prepare_for_frontend(df, filename)
+            result = await dataset_executor.run(
+                "analysis", tasks.preview_pipeline, upload_id, steps, upload["filename"],
+                process=use_process_pool(upload_id)
+            )
+        except OperationError as e:
+            raise etl_http_error(e)
         result["upload_id"] = upload_id
-        return result
+        result["dry_run"] = True
+        return FastJSONResponse(result)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in casting: {str(e)}")
+        logger.error(f"Error in pipeline: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/tts")
@@ -860,22 +821,24 @@ async def create_share_link(upload_id: str, current_user: dict = Depends(get_cur
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/public/{share_id}")
-async def get_public_dashboard(share_id: str):
+async def get_public_dashboard(share_id: str, request: Request, fmt: Optional[str] = Query(None, alias="format")):
     """Fetch public dashboard data"""
     try:
+        frame_format = data_format(request, fmt)
         db = await get_db()
         share = await db.get_share(share_id)
         if not share:
             raise HTTPException(status_code=404, detail="Public dashboard not found")
             
         upload_id = share["upload_id"]
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        df = pd.read_csv(file_path)
+        if not dataset_store.exists(upload_id):
+            raise HTTPException(status_code=404, detail="Data file not found")
         
         # Prepare for public (limited metadata)
-        result = DataAnalyzer.prepare_for_frontend(df, "shared_dashboard.csv")
+        result = await get_dataset_analysis(upload_id, "shared_dashboard.csv")
+        del result["upload_id"]
         result["public"] = True
-        return result
+        return frame_response(result, frame_format)
     except HTTPException:
         raise
     except Exception as e:
@@ -886,11 +849,10 @@ async def get_public_dashboard(share_id: str):
 async def chat_with_data(upload_id: str, request: ChatRequest):
     """Chat with your data using Groq (Llama 3) - Supports NL2Viz"""
     try:
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        if not file_path.exists():
+        if not dataset_store.exists(upload_id):
             raise HTTPException(status_code=404, detail="Data file not found")
             
-        df = pd.read_csv(file_path)
+        df = await dataset_executor.run("rows", dataset_store.load_mapped, upload_id)
         
         # Prepare context
         df_head = df.head(5).to_csv(index=False)
@@ -923,26 +885,11 @@ Example for a bar chart:
 }}
 ```
 """
-        api_key = os.getenv("GROQ_API_KEY")
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-        payload = {
-            "model": "llama-3.3-70b-versatile",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7
-        }
-        
-        response = requests.post(url, json=payload, headers=headers)
-        if response.status_code != 200:
-            logger.error(f"Groq API Error: {response.status_code} - {response.text}")
-            raise HTTPException(status_code=response.status_code, detail=f"AI Brain error: {response.text}")
-            
-        resp_json = response.json()
-        if "choices" not in resp_json:
-            logger.error(f"Unexpected Groq response: {resp_json}")
-            raise HTTPException(status_code=500, detail="AI Brain returned an unexpected response format")
-            
-        resp_text = resp_json["choices"][0]["message"]["content"]
+        try:
+            resp_text = await llm_client.chat(prompt, temperature=0.7)
+        except LLMError as e:
+            logger.error(f"Groq API Error: {e.status_code} - {e.detail}")
+            raise HTTPException(status_code=e.status_code, detail=f"AI Brain error: {e.detail}")
         
         # Check for chart config
         chart_config = None
@@ -974,63 +921,234 @@ Example for a bar chart:
 async def export_data(upload_id: str, fmt: str):
     """Export dataset in various formats (Professional Module)"""
     try:
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        if not file_path.exists():
+        if not dataset_store.exists(upload_id):
             raise HTTPException(status_code=404, detail="Data file not found")
             
-        df = pd.read_csv(file_path)
-        
-        if fmt == "csv":
-            content = df.to_csv(index=False)
-            return Response(content=content, media_type="text/csv", headers={"Content-Disposition": f"attachment; filename=export_{upload_id}.csv"})
-        elif fmt == "json":
-            content = df.to_json(orient="records")
-            return Response(content=content, media_type="application/json", headers={"Content-Disposition": f"attachment; filename=export_{upload_id}.json"})
-        elif fmt == "excel":
+        media_types = {
+            "csv": ("text/csv", "csv"),
+            "json": ("application/json", "json"),
             # Uses openpyxl which is in requirements.txt
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False)
-            content = output.getvalue()
-            return Response(content=content, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers={"Content-Disposition": f"attachment; filename=export_{upload_id}.xlsx"})
-        else:
+            "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+        }
+        if fmt not in media_types:
             raise HTTPException(status_code=400, detail="Unsupported format")
+        
+        media_type, extension = media_types[fmt]
+        content = await dataset_executor.run(
+            "export", tasks.export_dataset, upload_id, fmt, process=use_process_pool(upload_id)
+        )
+        return Response(content=content, media_type=media_type, headers={"Content-Disposition": f"attachment; filename=export_{upload_id}.{extension}"})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Export error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/rows/{upload_id}")
+async def get_rows(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.ROWS_PAGE_MAX),
+    columns: Optional[str] = None,
+    sort: Optional[str] = None,
+    desc: bool = False,
+    fmt: Optional[str] = Query(None, alias="format"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    A window of a stored dataset: offset/limit rows, optionally only some (comma-separated)
+    columns and sorted by one column. Reads only the row groups it needs when it can.
+    Rows come as records, columnar JSON or an Arrow stream (?format= or Accept).
+    """
+    try:
+        frame_format = data_format(request, fmt)
+        db = await get_db()
+        upload = await db.get_upload(upload_id)
+        if not upload or upload.get("user_id") != current_user["id"]:
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+        schema = dataset_store.read_schema(upload_id)
+        if not schema or not dataset_store.exists(upload_id):
+            raise HTTPException(status_code=404, detail="Data file not found")
+
+        names = [c["name"] for c in schema["columns"]]
+        selected = [c for c in columns.split(",") if c] if columns else None
+        unknown = [c for c in (selected or []) + ([sort] if sort else []) if c not in names]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown column(s): {', '.join(unknown)}")
+
+        order = None
+        if sort:
+            key = (upload_id, schema["version"], sort, desc)
+            order = row_order_cache.get(key)
+            if order is None:
+                order = await dataset_executor.run("rows", tasks.sort_order, upload_id, sort, desc)
+                row_order_cache.put(key, order)
+
+        rows = await dataset_executor.run("rows", tasks.read_rows, upload_id, offset, limit, selected, order)
+        return frame_response({
+            "upload_id": upload_id,
+            "version": schema["version"],
+            "offset": offset,
+            "limit": limit,
+            "total": schema["rows"],
+            "columns": selected or names,
+            "sort": sort,
+            "desc": desc,
+            "rows": rows,
+        }, frame_format)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Rows error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/summaries/{upload_id}")
+async def get_summaries(upload_id: str, columns: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Precomputed histograms (numeric, datetime) and top-k counts (other columns) per column"""
+    db = await get_db()
+    upload = await db.get_upload(upload_id)
+    if not upload or upload.get("user_id") != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if not dataset_store.exists(upload_id):
+        raise HTTPException(status_code=404, detail="Data file not found")
+    summaries = await dataset_executor.run("rows", dataset_store.summaries, upload_id)
+    if columns:
+        summaries = {c: summaries[c] for c in columns.split(",") if c in summaries}
+    return {"upload_id": upload_id, "version": dataset_store.version(upload_id), "columns": summaries}
+
+@app.post("/api/chart-data/{upload_id}")
+async def get_chart_data(upload_id: str, request: ChartDataRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Chart data over the whole dataset: group-by aggregates, histogram bins, time buckets,
+    or an x/y series downsampled with LTTB to max_points. Cached per dataset version and spec.
+    """
+    try:
+        db = await get_db()
+        upload = await db.get_upload(upload_id)
+        if not upload or upload.get("user_id") != current_user["id"]:
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+        version = dataset_store.version(upload_id)
+        if not version or not dataset_store.exists(upload_id):
+            raise HTTPException(status_code=404, detail="Data file not found")
+
+        spec = request.model_dump()
+        key = (upload_id, version, json.dumps(spec, sort_keys=True))
+        result = chart_data_cache.get(key)
+        if result is None:
+            try:
+                result = await dataset_executor.run(
+                    "charts", tasks.chart_data, upload_id, spec, process=use_process_pool(upload_id)
+                )
+            except ChartSpecError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            chart_data_cache.put(key, result)
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Chart data error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/correlations/{upload_id}")
+async def get_correlations(
+    upload_id: str,
+    method: str = "pearson",
+    columns: Optional[str] = None,
+    threshold: float = Query(settings.CORRELATION_THRESHOLD, ge=0, le=1),
+    top_k: int = Query(settings.CORRELATION_TOP_K, ge=1, le=10_000),
+    min_periods: int = Query(2, ge=2),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Pearson or Spearman correlation matrix of the numeric columns (or the CSV list in
+    columns) over the whole dataset, plus the top_k pairs with |r| >= threshold.
+    Missing values are handled pairwise. Cached per dataset version and parameters.
+    """
+    try:
+        db = await get_db()
+        upload = await db.get_upload(upload_id)
+        if not upload or upload.get("user_id") != current_user["id"]:
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+        version = dataset_store.version(upload_id)
+        if not version or not dataset_store.exists(upload_id):
+            raise HTTPException(status_code=404, detail="Data file not found")
+        if method not in CORRELATION_METHODS:
+            raise HTTPException(status_code=400, detail=f"Unknown correlation method '{method}'")
+
+        names = [c for c in columns.split(",") if c] if columns else None
+        key = (upload_id, version, method, tuple(names) if names else None, threshold, top_k, min_periods)
+        result = correlation_cache.get(key)
+        if result is None:
+            try:
+                result = await dataset_executor.run(
+                    "correlations", tasks.correlations, upload_id, method, names, threshold, top_k, min_periods,
+                    process=use_process_pool(upload_id)
+                )
+            except CorrelationError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            correlation_cache.put(key, result)
+        return FastJSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Correlation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/undo/{upload_id}")
 async def undo_data(upload_id: str):
     """Rollback last data modification"""
     try:
-        if HistoryManager.rollback(upload_id):
+        if await dataset_executor.run("history", version_history.undo, upload_id):
             db = await get_db()
             upload = await db.get_upload(upload_id)
-            file_path = UPLOAD_DIR / f"{upload_id}.csv"
-            df = pd.read_csv(file_path)
             
-            result = DataAnalyzer.prepare_for_frontend(df, upload["filename"] if upload else "restored.csv")
-            result["upload_id"] = upload_id
-            return result
+            # A restored version usually has its analysis cached already
+            return FastJSONResponse(await get_dataset_analysis(upload_id, upload["filename"] if upload else "restored.csv"))
         else:
             raise HTTPException(status_code=400, detail="No more reversible steps")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Undo error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/redo/{upload_id}")
+async def redo_data(upload_id: str):
+    """Re-apply the last undone data modification"""
+    try:
+        if await dataset_executor.run("history", version_history.redo, upload_id):
+            db = await get_db()
+            upload = await db.get_upload(upload_id)
+            return FastJSONResponse(await get_dataset_analysis(upload_id, upload["filename"] if upload else "restored.csv"))
+        else:
+            raise HTTPException(status_code=400, detail="No more steps to redo")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Redo error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/history/{upload_id}")
+async def get_history(upload_id: str):
+    """List the stored versions of a dataset and the current position"""
+    return version_history.describe(upload_id)
+
 @app.post("/api/smart-clean/{upload_id}")
 async def smart_clean_data(upload_id: str):
     """AI-powered smart cleaning using Groq (Llama 3)"""
     try:
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        if not file_path.exists():
+        if not dataset_store.exists(upload_id):
             raise HTTPException(status_code=404, detail="Data file not found")
             
-        df = pd.read_csv(file_path)
-        HistoryManager.save_version(upload_id)
+        # The prompt only needs the first rows, read without loading the whole dataset
+        df = await dataset_executor.run("rows", dataset_store.load_rows, upload_id, 0, 10)
         
         # Prepare data sample
-        sample = df.head(10).to_csv(index=False)
+        sample = df.to_csv(index=False)
         cols = list(df.columns)
         
         prompt = f"""You are a senior data engineer. Dataset columns: {cols}
@@ -1048,76 +1166,69 @@ Structure:
 }}
 Only return the JSON.
 """
-        api_key = os.getenv("GROQ_API_KEY")
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-        payload = {
-            "model": "llama-3.3-70b-versatile",
-            "messages": [{"role": "user", "content": prompt}],
-            "response_format": {"type": "json_object"}
-        }
-        
-        response = requests.post(url, json=payload, headers=headers)
-        if response.status_code != 200:
-            logger.error(f"Groq Clean Error: {response.text}")
-            raise HTTPException(status_code=response.status_code, detail="AI Cleaning service unavailable")
-            
-        steps = response.json()["choices"][0]["message"]["content"]
+        try:
+            steps = await llm_client.chat(prompt, json_mode=True)
+        except LLMError as e:
+            logger.error(f"Groq Clean Error: {e.detail}")
+            raise HTTPException(status_code=e.status_code, detail="AI Cleaning service unavailable")
         
         try:
-            steps_dict = json.loads(steps)
-            for step in steps_dict.get("cleaning_steps", []):
-                col = step.get("column")
-                action = step.get("action")
-                if col in df.columns:
-                    if action == "strip":
-                        df[col] = df[col].astype(str).str.strip()
-                    elif action == "title":
-                        df[col] = df[col].astype(str).str.title()
-                    elif action == "auto_date":
-                        df[col] = pd.to_datetime(df[col], errors='coerce')
-            
-            df.to_csv(file_path, index=False)
-            db = await get_db()
-            upload = await db.get_upload(upload_id)
-            result = DataAnalyzer.prepare_for_frontend(df, upload["filename"] if upload else "smart_cleaned.csv")
-            result["upload_id"] = upload_id
-            result["ai_summary"] = "AI-Driven data standardization complete."
-            return result
-            
+            cleaning_steps = json.loads(steps).get("cleaning_steps", [])
         except Exception as json_err:
             logger.error(f"Failed to parse AI response: {str(json_err)}")
             raise HTTPException(status_code=500, detail="AI returned invalid cleaning instructions")
+        
+        # Recorded as ETL steps, so the edit is one plan entry that undo/redo can step over
+        etl_steps = []
+        for step in cleaning_steps:
+            col = step.get("column")
+            action = step.get("action")
+            if col in cols:
+                if action in TEXT_ACTIONS:
+                    etl_steps.append({"op": "clean", "action": action, "column": col})
+                elif action == "auto_date":
+                    etl_steps.append({"op": "cast", "column": col, "target_type": "datetime"})
+        
+        db = await get_db()
+        upload = await db.get_upload(upload_id) or {"filename": "smart_cleaned.csv"}
+        if etl_steps:
+            result = await apply_etl_steps(upload, upload_id, etl_steps, upload.get("user_id"))
+        else:
+            result = await get_dataset_analysis(upload_id, upload["filename"], user_id=upload.get("user_id"))
+        result["ai_summary"] = "AI-Driven data standardization complete."
+        return FastJSONResponse(result)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Smart Clean error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/predict/{upload_id}")
-async def get_data_predictions(upload_id: str):
-    """Fetch AI predictions for a specific dataset"""
+async def get_data_predictions(upload_id: str, refresh: bool = False):
+    """Fetch AI predictions for a specific dataset, ?refresh=1 skips the cache"""
     try:
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        if not file_path.exists():
+        if not dataset_store.exists(upload_id):
             raise HTTPException(status_code=404, detail="Data file not found")
             
-        df = pd.read_csv(file_path)
-        predictions = await DataAnalyzer.get_predictions(df)
+        predictions = await get_ai_result(
+            upload_id, "predictions", PREDICTION_PROMPT_VERSION, DataAnalyzer.get_predictions, refresh=refresh
+        )
         return predictions
     except Exception as e:
         logger.error(f"Prediction route error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/advice/{upload_id}")
-async def get_data_advice(upload_id: str):
-    """Fetch AI root cause analysis and advice"""
+async def get_data_advice(upload_id: str, refresh: bool = False):
+    """Fetch AI root cause analysis and advice, ?refresh=1 skips the cache"""
     try:
-        file_path = UPLOAD_DIR / f"{upload_id}.csv"
-        if not file_path.exists():
+        if not dataset_store.exists(upload_id):
             raise HTTPException(status_code=404, detail="Data file not found")
             
-        df = pd.read_csv(file_path)
-        advice = await DataAnalyzer.get_causes_advice(df)
+        advice = await get_ai_result(
+            upload_id, "advice", ADVICE_PROMPT_VERSION, DataAnalyzer.get_causes_advice, refresh=refresh
+        )
         return advice
     except Exception as e:
         logger.error(f"Advice route error: {str(e)}")
@@ -0,0 +1,247 @@
+"""
+Vectorized per-column profiling used by DataAnalyzer.analyze_columns
+"""
+
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from sketches import HyperLogLog, TDigest, approximate_distinct, heavy_hitters
+
+logger = logging.getLogger(__name__)
+
+# Order matters: it is the order of keys in the per-column numeric stats
+NUMERIC_STATS = ['mean', 'median', 'std', 'min', 'max', '25%', '75%']
+
+# Quantile stats estimated from a t-digest in approximate mode
+SKETCH_QUANTILES = {'25%': 0.25, 'median': 0.5, '75%': 0.75}
+
+
+def numeric_columns(df: pd.DataFrame) -> List[str]:
+    """Columns that get numeric statistics, same rule as pd.api.types.is_numeric_dtype"""
+    return [col for col, dtype in df.dtypes.items() if pd.api.types.is_numeric_dtype(dtype)]
+
+
+def _numeric_groups(df: pd.DataFrame, columns: List[str]) -> Dict[Any, List[str]]:
+    """
+    Group numeric columns so each group can be stacked into one 2D array.
+    Plain numpy int/float columns keep their dtype (exact ints), everything else
+    (bool, nullable Int64/Float64) is compared as float64 with NaN for missing.
+    """
+    groups: Dict[Any, List[str]] = {}
+    for col in columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iuf':
+            groups.setdefault(dtype, []).append(col)
+        else:
+            groups.setdefault(np.dtype('float64'), []).append(col)
+    return groups
+
+
+def _sorted_block_stats(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Statistics for a (columns, rows) array from a single sort along each row.
+    NaNs sort to the end, so the valid values of every column are a sorted prefix.
+    """
+    n_cols, n_rows = values.shape
+    if n_rows == 0:
+        empty = np.full(n_cols, np.nan)
+        return {'missing': np.zeros(n_cols, dtype=np.int64), 'unique': np.zeros(n_cols, dtype=np.int64),
+                **{name: empty for name in NUMERIC_STATS}}
+
+    ordered = np.sort(values, axis=1)
+    is_float = ordered.dtype.kind == 'f'
+
+    if is_float:
+        missing = np.isnan(ordered).sum(axis=1)
+    else:
+        missing = np.zeros(n_cols, dtype=np.int64)
+    count = n_rows - missing
+    has_values = count > 0
+    cols = np.arange(n_cols)
+
+    # Distinct values: transitions in the sorted row. Every position from the
+    # last valid value into the NaN tail counts as a transition, so subtract those.
+    if n_rows > 1:
+        transitions = (ordered[:, 1:] != ordered[:, :-1]).sum(axis=1)
+    else:
+        transitions = np.zeros(n_cols, dtype=np.int64)
+    unique = np.where(has_values, transitions - missing + 1, 0)
+
+    # Linear interpolation between order statistics, as np.percentile/pd.quantile do
+    def order_quantile(q: float) -> np.ndarray:
+        position = q * np.maximum(count - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        low_values = ordered[cols, lower].astype('float64')
+        high_values = ordered[cols, upper].astype('float64')
+        return np.where(has_values, low_values + (high_values - low_values) * (position - lower), np.nan)
+
+    last = np.maximum(count - 1, 0)
+    stats = {
+        'missing': missing,
+        'unique': unique,
+        'min': np.where(has_values, ordered[:, 0].astype('float64'), np.nan),
+        'max': np.where(has_values, ordered[cols, last].astype('float64'), np.nan),
+        '25%': order_quantile(0.25),
+        'median': order_quantile(0.5),
+        '75%': order_quantile(0.75),
+    }
+
+    # Mean and sample std in place on the sorted copy, zeroing the NaN tail
+    work = ordered if is_float and ordered.dtype == np.float64 else ordered.astype('float64')
+    tail = np.arange(n_rows)[None, :] >= count[:, None] if is_float else None
+    if tail is not None:
+        work[tail] = 0.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = work.sum(axis=1) / count
+        np.subtract(work, mean[:, None], out=work)
+        if tail is not None:
+            work[tail] = 0.0
+        np.square(work, out=work)
+        std = np.sqrt(work.sum(axis=1) / (count - 1))
+    stats['mean'] = np.where(has_values, mean, np.nan)
+    stats['std'] = np.where(count > 1, std, np.nan)
+    return stats
+
+
+def numeric_block_stats(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """
+    Compute every numeric statistic for many columns at once.
+    Returns a frame indexed by column name with NUMERIC_STATS plus 'missing' and 'unique'.
+    """
+    parts = []
+    for dtype, group in _numeric_groups(df, columns).items():
+        # A consolidated block is stored column-major, so .T is usually a free view
+        if dtype.kind == 'f':
+            values = df[group].to_numpy(dtype=dtype, na_value=np.nan).T
+        else:
+            values = df[group].to_numpy(dtype=dtype).T
+        parts.append(pd.DataFrame(_sorted_block_stats(values), index=group))
+    return pd.concat(parts).loc[columns]
+
+
+def _approximate_numeric(
+    series: pd.Series,
+    hll_precision: int,
+    compression: float,
+    chunk_size: int = 1_000_000
+) -> Dict[str, Any]:
+    """
+    One pass over a numeric column in chunks: exact mean/std/min/max, sketched quartiles
+    and distinct count. Only one chunk is ever copied, unlike the block sort.
+    """
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    distinct, digest = HyperLogLog(hll_precision), TDigest(compression)
+    count, mean, m2 = 0, 0.0, 0.0
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        chunk = chunk[~np.isnan(chunk)]
+        if len(chunk) == 0:
+            continue
+        distinct.add_hashes(pd.util.hash_array(chunk))
+        digest.update(chunk)
+        # Chan et al. pairwise update of mean and sum of squared deviations
+        chunk_mean = float(chunk.mean())
+        chunk_m2 = float(np.square(chunk - chunk_mean).sum())
+        delta, total = chunk_mean - mean, count + len(chunk)
+        mean += delta * len(chunk) / total
+        m2 += chunk_m2 + delta * delta * count * len(chunk) / total
+        count = total
+
+    profile: Dict[str, Any] = {'unique': distinct.estimate()}
+    error_bounds: Dict[str, Any] = {'unique': {'relative_error': distinct.relative_error}}
+    if count:
+        profile.update({
+            'mean': mean,
+            'std': float(np.sqrt(m2 / (count - 1))) if count > 1 else None,
+            'min': digest.min,
+            'max': digest.max,
+        })
+        for name, q in SKETCH_QUANTILES.items():
+            profile[name] = digest.quantile(q)
+            error_bounds[name] = {'rank_error': digest.rank_error(q)}
+    else:
+        profile.update({name: None for name in NUMERIC_STATS})
+    profile['approximate'] = list(error_bounds)
+    profile['error_bounds'] = error_bounds
+    return profile
+
+
+def profile_columns_approximate(
+    df: pd.DataFrame,
+    hll_precision: int = 14,
+    compression: float = 200,
+    top_k: int = 5
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Same schema as profile_columns, for very large frames: distinct counts come from
+    HyperLogLog, quartiles from a t-digest and text columns get count-min heavy hitters.
+    Each column lists its estimated stats under 'approximate' with their 'error_bounds'.
+    """
+    n_rows = len(df)
+    num_cols = set(numeric_columns(df))
+    missing = df.isna().sum()
+
+    analysis = {}
+    for col, dtype in df.dtypes.items():
+        col_missing = int(missing[col])
+        analysis[col] = {
+            'dtype': str(dtype),
+            'missing': col_missing,
+            'missing_percent': float(col_missing / n_rows) if n_rows else 0.0,
+        }
+        if col in num_cols:
+            analysis[col].update(_approximate_numeric(df[col], hll_precision, compression))
+        else:
+            distinct = approximate_distinct(df[col], hll_precision)
+            hitters = heavy_hitters(df[col], k=top_k)
+            analysis[col].update({
+                'unique': distinct['value'],
+                'top_values': hitters['top'],
+                'approximate': ['unique', 'top_values'],
+                'error_bounds': {
+                    'unique': {'relative_error': distinct['relative_error']},
+                    'top_values': {'max_overcount': hitters['error_bound']},
+                },
+            })
+    return analysis
+
+
+def _concat(parts: List[Any]) -> pd.Series:
+    """Per-column counts from the parts that have any; pandas deprecates concatenating empty ones"""
+    parts = [part for part in parts if part is not None and len(part)]
+    return pd.concat(parts) if parts else pd.Series(dtype='int64')
+
+
+def profile_columns(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Per-column profile with the same schema as the original column-by-column loop"""
+    n_rows = len(df)
+    num_cols = numeric_columns(df)
+    stats = numeric_block_stats(df, num_cols) if num_cols else pd.DataFrame()
+
+    # Non-numeric columns still need hashing for distinct counts
+    other_cols = [col for col in df.columns if col not in stats.index]
+    missing = _concat([stats.get('missing'), df[other_cols].isna().sum()])
+    unique = _concat([stats.get('unique'), df[other_cols].nunique()])
+
+    analysis = {}
+    for col, dtype in df.dtypes.items():
+        col_missing = int(missing[col])
+        analysis[col] = {
+            'dtype': str(dtype),
+            'unique': int(unique[col]),
+            'missing': col_missing,
+            'missing_percent': float(col_missing / n_rows) if n_rows else 0.0,
+        }
+
+        if col in stats.index:
+            all_missing = col_missing == n_rows
+            row = stats.loc[col]
+            analysis[col].update({
+                name: None if all_missing else float(row[name]) for name in NUMERIC_STATS
+            })
+
+    return analysis
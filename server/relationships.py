@@ -0,0 +1,148 @@
+"""
+How much numeric columns vary by category: one-way ANOVA of every categorical x numeric
+pair. Each categorical column is factorized once and its group counts, sums and sums of
+squares are taken for all numeric columns with np.bincount, so there is no groupby per pair.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+logger = logging.getLogger(__name__)
+
+# Cohen's conventional eta-squared bounds for small, medium and large effects
+EFFECT_SIZES = ((0.14, 'large'), (0.06, 'medium'), (0.01, 'small'))
+
+
+def categorical_frame_columns(df: pd.DataFrame) -> List[str]:
+    """Columns rows are grouped by: text, categorical and boolean columns"""
+    return df.select_dtypes(include=['object', 'category', 'string', 'bool']).columns.tolist()
+
+
+def effect_label(eta_squared: float) -> str:
+    """Conventional size of an eta-squared effect"""
+    for bound, label in EFFECT_SIZES:
+        if eta_squared >= bound:
+            return label
+    return 'negligible'
+
+
+def group_codes(series: pd.Series) -> np.ndarray:
+    """Integer group of every row, -1 where the category is missing"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(dtype=np.int64)
+    return pd.factorize(series, use_na_sentinel=True)[0].astype(np.int64, copy=False)
+
+
+class NumericBlock:
+    """
+    The numeric columns prepared once for every categorical column: centered on their mean
+    (so the sums of squares below do not cancel out), zero where missing, column-major so
+    each column is one contiguous bincount weight array.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: List[str]):
+        values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        present = np.isfinite(values)
+        means = np.where(present, values, 0.0).sum(axis=0) / np.maximum(present.sum(axis=0), 1)
+        centered = np.where(present, values - means, 0.0)
+        self.columns = columns
+        self.values = np.asfortranarray(centered)
+        self.squares = np.asfortranarray(centered * centered)
+        # Only columns with missing values need their own per-group counts
+        self.present = {j: np.asfortranarray(present[:, j], dtype=np.float64)
+                        for j in np.flatnonzero(~present.all(axis=0))}
+
+    def group_sums(self, codes: np.ndarray, n_groups: int):
+        """(groups, columns) counts, sums and sums of squares; rows without a category are dropped"""
+        # Missing categories go to one extra bin, cut off below
+        bins = np.where(codes < 0, n_groups, codes)
+        width = n_groups + 1
+        m = len(self.columns)
+        counts = np.empty((width, m))
+        sums = np.empty((width, m))
+        squares = np.empty((width, m))
+        all_rows = np.bincount(bins, minlength=width).astype(np.float64)
+        for j in range(m):
+            counts[:, j] = np.bincount(bins, weights=self.present[j], minlength=width) if j in self.present else all_rows
+            sums[:, j] = np.bincount(bins, weights=self.values[:, j], minlength=width)
+            squares[:, j] = np.bincount(bins, weights=self.squares[:, j], minlength=width)
+        return counts[:n_groups], sums[:n_groups], squares[:n_groups]
+
+
+def anova(counts: np.ndarray, sums: np.ndarray, squares: np.ndarray) -> Dict[str, np.ndarray]:
+    """One-way ANOVA of each column of (groups, columns) group totals, all columns at once"""
+    n = counts.sum(axis=0)
+    total = sums.sum(axis=0)
+    groups = np.count_nonzero(counts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correction = total * total / n
+        ss_total = squares.sum(axis=0) - correction
+        ss_between = np.where(counts > 0, sums * sums / np.where(counts > 0, counts, 1), 0.0).sum(axis=0) - correction
+        ss_between = np.clip(ss_between, 0.0, np.maximum(ss_total, 0.0))
+        ss_within = ss_total - ss_between
+        df_between, df_within = groups - 1, n - groups
+        f = (ss_between / df_between) / (ss_within / df_within)
+        eta_squared = ss_between / ss_total
+    valid = (groups >= 2) & (df_within > 0) & (ss_total > 0)
+    f = np.where(valid, f, np.nan)
+    return {
+        'eta_squared': np.where(valid, eta_squared, np.nan),
+        'f_statistic': f,
+        'p_value': np.where(valid, stats.f.sf(f, np.maximum(df_between, 1), np.maximum(df_within, 1)), np.nan),
+        'groups': groups,
+        'rows': n.astype(np.int64),
+    }
+
+
+def categorical_effects(
+    df: pd.DataFrame,
+    categorical: Optional[List[str]] = None,
+    numeric: Optional[List[str]] = None,
+    min_effect: float = 0.0,
+    alpha: Optional[float] = None,
+    max_groups: int = 1000,
+    top_k: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Eta squared, F statistic and p-value of every categorical x numeric pair with
+    eta squared >= min_effect (and p < alpha, if given), strongest first. Categorical
+    columns with more than max_groups categories, like identifiers, are skipped.
+    """
+    if categorical is None:
+        categorical = categorical_frame_columns(df)
+    if numeric is None:
+        numeric = df.select_dtypes(include=[np.number]).columns.tolist()
+    if not categorical or not numeric:
+        return []
+
+    block = NumericBlock(df, numeric)
+    results = []
+    for cat_col in categorical:
+        codes = group_codes(df[cat_col])
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+        if n_groups < 2 or n_groups > max_groups:
+            logger.debug(f"Skipping '{cat_col}' for categorical effects: {n_groups} categories")
+            continue
+        effects = anova(*block.group_sums(codes, n_groups))
+        keep = np.isfinite(effects['eta_squared']) & (effects['eta_squared'] >= min_effect)
+        if alpha is not None:
+            keep &= effects['p_value'] < alpha
+        for j in np.flatnonzero(keep):
+            eta_squared = float(effects['eta_squared'][j])
+            results.append({
+                'categorical': cat_col,
+                'numeric': numeric[j],
+                'eta_squared': eta_squared,
+                'f_statistic': float(effects['f_statistic'][j]),
+                'p_value': float(effects['p_value'][j]),
+                'groups': int(effects['groups'][j]),
+                'rows': int(effects['rows'][j]),
+                'effect': effect_label(eta_squared),
+            })
+
+    results.sort(key=lambda r: r['eta_squared'], reverse=True)
+    return results[:top_k]
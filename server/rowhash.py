@@ -0,0 +1,115 @@
+"""
+Row hashes of a dataset: one uint64 per row, computed once per version and shared by
+duplicate counting, deduplication and change detection.
+
+A row's hash is the wrapping sum of its cells' column hashes, each salted with the
+column name. Because the sum can be taken apart, rewriting some columns only needs the
+old and new values of those columns hashed, not the whole frame.
+"""
+
+import hashlib
+import logging
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, spreads the salt over every bit"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _salt(name: str) -> np.uint64:
+    return np.uint64(int.from_bytes(hashlib.blake2b(str(name).encode("utf-8"), digest_size=8).digest(), "little"))
+
+
+def column_hashes(series: pd.Series, name: str) -> np.ndarray:
+    """Hash of every cell of a column, salted with its name so equal values in two columns differ"""
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind == 'f':
+        # duplicated() treats -0.0 as 0.0 and every NaN alike, their bits differ
+        values = series.to_numpy()
+        series = pd.Series(np.where(np.isnan(values), np.nan, values + 0.0).astype(values.dtype, copy=False))
+    elif series.dtype.kind == 'f':
+        # Nullable floats keep missing values in a mask, only -0.0 needs folding
+        series = series + 0.0
+    try:
+        values = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    except TypeError:
+        # Unhashable cells such as lists are compared by their text
+        values = pd.util.hash_pandas_object(series.astype(str), index=False).to_numpy()
+    return _mix(values ^ _salt(name))
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash of every row, independent of the column order"""
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    for col in df.columns:
+        hashes += column_hashes(df[col], col)
+    return hashes
+
+
+def update_row_hashes(
+    hashes: np.ndarray,
+    before: pd.DataFrame,
+    after: pd.DataFrame,
+    columns: Iterable[str]
+) -> np.ndarray:
+    """
+    Row hashes of after from those of before, when only the given columns were added,
+    replaced or removed and the rows are the same
+    """
+    hashes = hashes.copy()
+    for col in dict.fromkeys(columns):
+        if col in before.columns:
+            hashes -= column_hashes(before[col], col)
+        if col in after.columns:
+            hashes += column_hashes(after[col], col)
+    return hashes
+
+
+def duplicate_mask(df: pd.DataFrame, hashes: np.ndarray) -> np.ndarray:
+    """
+    Rows equal to an earlier row, like DataFrame.duplicated(). Only rows sharing a hash
+    with another row are compared, so a hash collision never counts as a duplicate.
+    """
+    candidates = np.flatnonzero(pd.Series(hashes, copy=False).duplicated(keep=False).to_numpy())
+    mask = np.zeros(len(df), dtype=bool)
+    if len(candidates):
+        mask[candidates] = df.iloc[candidates].duplicated().to_numpy()
+    return mask
+
+
+def count_duplicates(df: pd.DataFrame, hashes: np.ndarray) -> int:
+    """Number of rows equal to an earlier row"""
+    return int(duplicate_mask(df, hashes).sum())
+
+
+def deduplicate(df: pd.DataFrame, hashes: np.ndarray) -> pd.DataFrame:
+    """DataFrame.drop_duplicates() through the row hashes, keeping the first of each row"""
+    mask = duplicate_mask(df, hashes)
+    return df[~mask] if mask.any() else df
+
+
+def fingerprint(df: pd.DataFrame, hashes: np.ndarray) -> str:
+    """Content hash of a whole dataset: column names and types, and the row hashes in order"""
+    h = hashlib.blake2b(digest_size=16)
+    for col, dtype in df.dtypes.items():
+        h.update(f"{col}\0{dtype}\0".encode("utf-8"))
+    h.update(np.ascontiguousarray(hashes).tobytes())
+    return h.hexdigest()
+
+
+def row_changes(before: np.ndarray, after: np.ndarray) -> Dict[str, int]:
+    """Rows added and removed between two versions, compared as multisets of row hashes"""
+    old_values, old_counts = np.unique(before, return_counts=True)
+    new_values, new_counts = np.unique(after, return_counts=True)
+    common, old_at, new_at = np.intersect1d(old_values, new_values, assume_unique=True, return_indices=True)
+    kept = int(np.minimum(old_counts[old_at], new_counts[new_at]).sum())
+    return {"added": int(len(after) - kept), "removed": int(len(before) - kept), "unchanged": kept}
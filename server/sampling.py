@@ -0,0 +1,63 @@
+"""
+Seeded uniform row samples for exploration-grade insights on large datasets, and the
+confidence intervals of shares estimated from them.
+"""
+
+import logging
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+logger = logging.getLogger(__name__)
+
+
+def sample_positions(n_rows: int, size: int, seed: int = 0) -> np.ndarray:
+    """
+    Sorted positions of a uniform sample without replacement. The same seed and row
+    count always give the same rows, like a reservoir filled in one pass.
+    """
+    if size >= n_rows:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n_rows, size=size, replace=False))
+
+
+def sample_frame(df: pd.DataFrame, size: int, seed: int = 0) -> pd.DataFrame:
+    """Sampled rows in their original order, keeping the original index labels"""
+    return df.take(sample_positions(len(df), size, seed))
+
+
+def proportion_interval(hits: int, n: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Wilson score interval of a share estimated from hits out of n sampled rows"""
+    if n == 0:
+        return 0.0, 1.0
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    p = hits / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return float(max(center - half, 0.0)), float(min(center + half, 1.0))
+
+
+def share_estimate(hits: int, n: int, population: int, confidence: float = 0.95) -> Dict[str, Any]:
+    """Count of a population estimated from a sample share, with its interval in rows"""
+    low, high = proportion_interval(hits, n, confidence)
+    return {
+        'count': int(round(hits / n * population)) if n else 0,
+        'count_low': int(np.floor(low * population)),
+        'count_high': int(np.ceil(high * population)),
+    }
+
+
+def sampling_info(total_rows: int, sample_size: int, seed: int, confidence: float) -> Dict[str, Any]:
+    """How a payload was computed, reported next to the estimates"""
+    return {
+        'sampled': sample_size < total_rows,
+        'method': 'uniform',
+        'sample_size': int(sample_size),
+        'total_rows': int(total_rows),
+        'fraction': float(sample_size / total_rows) if total_rows else 1.0,
+        'seed': int(seed),
+        'confidence': float(confidence),
+    }
@@ -0,0 +1,144 @@
+"""
+Responses that encode DataFrames and numpy values without going through Python objects.
+
+Data payloads can be sent in three formats: row records (the default), columnar JSON
+and an Arrow IPC stream, picked with ?format= or the Accept header.
+"""
+
+import logging
+import uuid
+from typing import Any, Dict, Optional
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+from fastapi.responses import JSONResponse, Response
+
+logger = logging.getLogger(__name__)
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNAR_MEDIA_TYPE = "application/vnd.quickcharts.columnar+json"
+FRAME_FORMATS = ("records", "columnar", "arrow")
+
+
+def frame_to_json(df: pd.DataFrame) -> bytes:
+    """
+    Rows of a frame as a JSON array of records, encoded column-wise by pandas' C writer.
+    Missing and infinite values become null, dates ISO 8601 strings.
+    """
+    return df.to_json(orient="records", date_format="iso", double_precision=15).encode("utf-8")
+
+
+def frame_to_columnar(df: pd.DataFrame) -> bytes:
+    """
+    A frame as {"columns": [...], "dtypes": [...], "values": [[...], ...]} with one
+    array per column, so column names are written once instead of once per row.
+    """
+    values = b",".join(
+        df[col].to_json(orient="values", date_format="iso", double_precision=15).encode("utf-8")
+        for col in df.columns
+    )
+    header = dumps({"columns": list(df.columns), "dtypes": [str(t) for t in df.dtypes]})
+    return header[:-1] + b',"values":[' + values + b"]}"
+
+
+def frame_to_arrow(df: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """A frame as an Arrow IPC stream; metadata is stored as JSON in the schema under 'payload'"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"payload": dumps(metadata)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """Frame format from an explicit ?format= value, else from the Accept header"""
+    if requested:
+        if requested not in FRAME_FORMATS:
+            raise ValueError(f"Unsupported format: {requested}. Use one of {', '.join(FRAME_FORMATS)}")
+        return requested
+    accept = accept or ""
+    if ARROW_MEDIA_TYPE in accept:
+        return "arrow"
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return "columnar"
+    return "records"
+
+
+def frame_response(content: Dict[str, Any], frame_format: str = "records") -> Response:
+    """
+    Response for a payload holding a DataFrame. For arrow the (first) frame is the
+    stream and the rest of the payload, with its key under 'frame', the schema metadata.
+    """
+    if frame_format != "arrow":
+        return FastJSONResponse(content, frame_format=frame_format)
+    key = next(k for k, v in content.items() if isinstance(v, pd.DataFrame))
+    metadata = {k: v for k, v in content.items() if k != key}
+    metadata["frame"] = key
+    return Response(frame_to_arrow(content[key], metadata), media_type=ARROW_MEDIA_TYPE)
+
+
+def _default(obj: Any) -> Any:
+    """Types orjson does not encode on its own"""
+    if isinstance(obj, pd.DataFrame):
+        # Nested frames are rare, the top-level ones are spliced by FastJSONResponse
+        return orjson.loads(frame_to_json(obj))
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.tolist()
+    if isinstance(obj, pd.Timestamp):
+        return None if pd.isna(obj) else obj.isoformat()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # Mongo ObjectIds and anything else with a faithful string form
+    return str(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Encode a payload; NaN and infinity become null"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered by orjson, with numpy scalars and arrays encoded natively.
+
+    DataFrames among the top-level values of a dict payload (e.g. the preview 'data')
+    are written by frame_to_json (or frame_to_columnar) and spliced into the document,
+    so no per-cell Python objects are built. Return an instance from the endpoint so
+    FastAPI does not run jsonable_encoder over the payload first.
+    """
+
+    def __init__(self, content: Any, frame_format: str = "records", **kwargs):
+        # Set before the base class renders the body
+        self.frame_format = frame_format
+        super().__init__(content, **kwargs)
+        if frame_format == "columnar":
+            self.headers["content-type"] = COLUMNAR_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        if not isinstance(content, dict):
+            return dumps(content)
+
+        frames: Dict[bytes, pd.DataFrame] = {}
+        payload = {}
+        for key, value in content.items():
+            if isinstance(value, pd.DataFrame):
+                marker = f"__frame_{uuid.uuid4().hex}__"
+                frames[orjson.dumps(marker)] = value
+                value = marker
+            payload[key] = value
+
+        encode = frame_to_columnar if self.frame_format == "columnar" else frame_to_json
+        body = dumps(payload)
+        for marker, df in frames.items():
+            body = body.replace(marker, encode(df), 1)
+        return body
@@ -0,0 +1,269 @@
+"""
+Mergeable sketches for approximate statistics on very large columns: HyperLogLog for
+distinct counts, a merging t-digest for quantiles and count-min for heavy hitters.
+All of them take whole numpy arrays or pandas Series at once, there is no per-value loop.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+_U64 = np.uint64
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, spreads every input bit over the whole word"""
+    with np.errstate(over="ignore"):
+        x = x + _U64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> _U64(27))) * _U64(0x94D049BB133111EB)
+        return x ^ (x >> _U64(31))
+
+
+def _hash_strings(values: pa.Array) -> np.ndarray:
+    """
+    Hash strings straight from the Arrow buffers: each byte is weighted by a random
+    word for its position and the sums are taken per string with one reduceat.
+    pandas hashes object values one at a time, which is several times slower.
+    """
+    values = pc.cast(values, pa.large_binary())
+    offsets = np.frombuffer(values.buffers()[1], dtype=np.int64)[values.offset:values.offset + len(values) + 1]
+    data = np.frombuffer(values.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]] if len(values) else np.empty(0, np.uint8)
+    starts, lengths = offsets[:-1] - offsets[0], np.diff(offsets)
+
+    sums = np.zeros(len(lengths), dtype=_U64)
+    if len(data):
+        positions = np.arange(len(data)) - np.repeat(starts, lengths)
+        weights = _mix(np.arange(int(lengths.max()), dtype=_U64))
+        with np.errstate(over="ignore"):
+            contributions = (data.astype(_U64) + _U64(1)) * weights[positions]
+        non_empty = lengths > 0
+        sums[non_empty] = np.add.reduceat(contributions, starts[non_empty])
+    return _mix(sums ^ lengths.astype(_U64))
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """64-bit hashes of the non-missing values of a column; equal values hash equally"""
+    present = series.dropna()
+    if isinstance(present.dtype, pd.CategoricalDtype):
+        # Hash each category once, rows only look their code up
+        return hash_values(pd.Series(present.cat.categories))[present.cat.codes.to_numpy()]
+    if pd.api.types.is_string_dtype(present) and not pd.api.types.is_numeric_dtype(present):
+        try:
+            return _hash_strings(pa.array(present, type=pa.large_string()))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass  # not all values are strings
+    return pd.util.hash_pandas_object(present, index=False).to_numpy()
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Number of significant bits of each uint64, from the float exponent"""
+    # Exact below 2**53; above that a value within 2**-53 of a power of two may count one bit more
+    return np.frexp(values.astype(np.float64))[1].astype(np.int64)
+
+
+class HyperLogLog:
+    """Distinct-count sketch with 2**precision registers, relative error about 1.04 / sqrt(m)"""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        """Add pre-hashed values (uint64)"""
+        if len(hashes) == 0:
+            return
+        p = _U64(self.precision)
+        index = (hashes >> (_U64(64) - p)).astype(np.int64)
+        rest = hashes & ((_U64(1) << (_U64(64) - p)) - _U64(1))
+        rank = (64 - self.precision) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def add(self, series: pd.Series, chunk_size: int = 1_000_000):
+        """Add the non-missing values of a column, a chunk of rows at a time"""
+        for start in range(0, len(series), chunk_size):
+            self.add_hashes(hash_values(series.iloc[start:start + chunk_size]))
+
+    def merge(self, other: "HyperLogLog"):
+        """Fold another sketch of the same precision into this one"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate, relative to the true count"""
+        return float(1.04 / np.sqrt(self.m))
+
+    def estimate(self) -> int:
+        """Estimated number of distinct values"""
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class TDigest:
+    """
+    Merging t-digest: centroids are small near the tails and large in the middle, so
+    extreme quantiles stay accurate with a bounded number of centroids (about compression).
+    """
+
+    def __init__(self, compression: float = 200):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        """Merge sorted (mean, weight) pairs into centroids"""
+        cumulative = np.cumsum(weights)
+        q_left = (cumulative - weights) / cumulative[-1]
+        # Scale function k1 = compression / 2pi * asin(2q - 1): a centroid may span at most one
+        # unit of k. The unit edges are mapped back to q once and looked up, instead of
+        # taking asin of every point.
+        k = np.arange(1, int(np.ceil(self.compression / 2)) + 1) - self.compression / 4
+        edges = (np.sin(2 * np.pi * k / self.compression) + 1) / 2
+        starts = np.unique(np.r_[0, np.searchsorted(q_left, edges)])
+        starts = starts[starts < len(weights)]
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def update(self, values: np.ndarray):
+        """Add finite values (a chunk of a column)"""
+        values = values[np.isfinite(values)].astype(np.float64, copy=False)
+        if len(values) == 0:
+            return
+        values = np.sort(values)
+        self.min = min(self.min, float(values[0]))
+        self.max = max(self.max, float(values[-1]))
+        # The few existing centroids are inserted into the sorted chunk, no full re-sort
+        at = np.searchsorted(values, self.means)
+        self._compress(np.insert(values, at, self.means), np.insert(np.ones(len(values)), at, self.weights))
+
+    def merge(self, other: "TDigest"):
+        """Fold another digest into this one"""
+        if other.count == 0:
+            return
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        means, weights = np.r_[self.means, other.means], np.r_[self.weights, other.weights]
+        order = np.argsort(means, kind="stable")
+        self._compress(means[order], weights[order])
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile, interpolated between centroid midpoints"""
+        if len(self.weights) == 0:
+            return float("nan")
+        total = self.count
+        mids = (np.cumsum(self.weights) - self.weights / 2) / total
+        return float(np.interp(q, np.r_[0.0, mids, 1.0], np.r_[self.min, self.means, self.max]))
+
+    def rank_error(self, q: float) -> float:
+        """Bound on the rank error at q: half the share of rows in the centroid holding q"""
+        if len(self.weights) == 0:
+            return 0.0
+        cumulative = np.cumsum(self.weights) / self.count
+        i = min(int(np.searchsorted(cumulative, q)), len(self.weights) - 1)
+        return float(self.weights[i] / self.count / 2)
+
+
+class CountMinSketch:
+    """
+    Frequency sketch of width x depth counters. Estimates never undercount; they overcount
+    by at most e / width * total with probability 1 - exp(-depth).
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 5, seed: int = 0):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        # Odd multipliers keep the multiply-shift hashes well spread
+        self.multipliers = rng.integers(1, 2 ** 63, size=depth, dtype=np.uint64) | _U64(1)
+        self.total = 0
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        with np.errstate(over="ignore"):
+            mixed = hashes[None, :] * self.multipliers[:, None]
+        return (mixed >> _U64(32)).astype(np.int64) % self.width
+
+    def add_hashes(self, hashes: np.ndarray):
+        """Count pre-hashed values (uint64)"""
+        columns = self._columns(hashes)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], minlength=self.width)
+        self.total += len(hashes)
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        """Estimated counts of pre-hashed values"""
+        columns = self._columns(hashes)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    @property
+    def error_bound(self) -> float:
+        """Largest overcount, as a share of all counted values"""
+        return float(np.e / self.width)
+
+
+def heavy_hitters(
+    series: pd.Series,
+    k: int = 5,
+    sample_size: int = 10_000,
+    width: int = 2048,
+    depth: int = 5,
+    seed: int = 0,
+    chunk_size: int = 1_000_000
+) -> Dict[str, Any]:
+    """
+    Approximate most frequent values: candidates come from a seeded sample, their counts
+    from a count-min sketch over the whole column.
+    """
+    present = series.dropna()
+    sketch = CountMinSketch(width, depth, seed)
+    for start in range(0, len(present), chunk_size):
+        sketch.add_hashes(hash_values(present.iloc[start:start + chunk_size]))
+    sample = present.sample(min(sample_size, len(present)), random_state=seed) if len(present) else present
+    candidates = sample.drop_duplicates()
+    if candidates.empty:
+        return {"top": [], "error_bound": 0}
+    counts = sketch.estimate_hashes(hash_values(candidates))
+    order = np.argsort(-counts, kind="stable")[:k]
+    return {
+        "top": [{"value": str(candidates.iloc[i]), "count": int(counts[i])} for i in order],
+        # Counts may be high by at most this many rows (with probability 1 - exp(-depth))
+        "error_bound": int(np.ceil(sketch.error_bound * sketch.total)),
+    }
+
+
+def approximate_quantiles(
+    values: np.ndarray,
+    quantiles: List[float],
+    compression: float = 200,
+    chunk_size: int = 1_000_000
+) -> Dict[float, Dict[str, float]]:
+    """Quantiles of a numeric array from a t-digest built chunk by chunk, with rank error bounds"""
+    digest = TDigest(compression)
+    for start in range(0, len(values), chunk_size):
+        digest.update(values[start:start + chunk_size])
+    return {q: {"value": digest.quantile(q), "rank_error": digest.rank_error(q)} for q in quantiles}
+
+
+def approximate_distinct(series: pd.Series, precision: int = 14) -> Dict[str, float]:
+    """Distinct non-missing values of a column from a HyperLogLog sketch"""
+    sketch = HyperLogLog(precision)
+    sketch.add(series)
+    return {"value": sketch.estimate(), "relative_error": sketch.relative_error}
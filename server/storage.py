@@ -0,0 +1,662 @@
+"""
+Columnar dataset storage for uploaded files
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from cache import DatasetCache
+from dtypes import ARROW_STRING, optimize_dtypes
+from etl import changed_columns, filters_rows, materialize
+from rowhash import fingerprint, row_changes, row_hashes, update_row_hashes
+from sampling import sample_positions as draw_sample
+from summaries import column_summaries
+
+logger = logging.getLogger(__name__)
+
+ARROW_STRING_TYPES = {pa.string(): ARROW_STRING, pa.large_string(): ARROW_STRING}
+
+
+class DatasetStore:
+    """
+    Persist datasets as compressed Parquet files with a JSON schema sidecar.
+
+    ETL edits do not rewrite the Parquet file: they are appended to an operation plan in
+    the sidecar and replayed on top of the immutable base when the dataset is loaded.
+    The sidecar's top-level version, rows and columns always describe the dataset as
+    read, base and plan included.
+
+    Every write also stores per-column summaries (histograms and top-k counts) for the
+    new version in a second sidecar, so charts can be drawn without reading the data,
+    and the hash of every row in a third. The row hashes give each version a content
+    fingerprint: saving a dataset whose content did not change keeps its version.
+    The seeded row sample that insights of large datasets run on is kept the same way,
+    drawn on first use for each version.
+
+    Read-only endpoints load the current version from an uncompressed Arrow IPC copy
+    that is memory-mapped instead of parsed, written on first use for each version.
+    """
+
+    DATA_SUFFIX = ".parquet"
+    SCHEMA_SUFFIX = ".schema.json"
+    SUMMARY_SUFFIX = ".summary.json"
+    ROWHASH_SUFFIX = ".rowhash.npz"
+    SAMPLE_SUFFIX = ".sample.npz"
+    MAPPED_SUFFIX = ".arrow"
+    LOCK_SUFFIX = ".lock"
+    # Keys of a base or plan entry mirrored at the top level of the sidecar
+    CURRENT_KEYS = ("version", "rows", "columns", "fingerprint", "changes")
+
+    def __init__(
+        self,
+        root: Path,
+        compression: str = "zstd",
+        cache: Optional[DatasetCache] = None,
+        row_group_size: int = 100_000,
+        summary_bins: int = 20,
+        summary_top_k: int = 10
+    ):
+        self.root = Path(root)
+        self.root.mkdir(exist_ok=True)
+        self.compression = compression
+        self.cache = cache
+        self.row_group_size = row_group_size
+        self.summary_bins = summary_bins
+        self.summary_top_k = summary_top_k
+        # Uploads whose lock the current thread holds, so locked methods can call each other
+        self._held = threading.local()
+
+    def data_path(self, upload_id: str) -> Path:
+        """Path of the Parquet file holding the dataset"""
+        return self.root / f"{upload_id}{self.DATA_SUFFIX}"
+
+    def schema_path(self, upload_id: str) -> Path:
+        """Path of the schema sidecar for the dataset"""
+        return self.root / f"{upload_id}{self.SCHEMA_SUFFIX}"
+
+    def summary_path(self, upload_id: str) -> Path:
+        """Path of the per-column summaries of the dataset"""
+        return self.root / f"{upload_id}{self.SUMMARY_SUFFIX}"
+
+    def row_hash_path(self, upload_id: str) -> Path:
+        """Path of the row hashes of the dataset"""
+        return self.root / f"{upload_id}{self.ROWHASH_SUFFIX}"
+
+    def sample_path(self, upload_id: str) -> Path:
+        """Path of the sampled row positions of the dataset"""
+        return self.root / f"{upload_id}{self.SAMPLE_SUFFIX}"
+
+    def mapped_path(self, upload_id: str, version: str) -> Path:
+        """Path of the memory-mappable copy of one version of the dataset"""
+        return self.root / f"{upload_id}.{version}{self.MAPPED_SUFFIX}"
+
+    def lock_path(self, upload_id: str) -> Path:
+        """Path of the file locked while the dataset's sidecars are updated"""
+        return self.root / f"{upload_id}{self.LOCK_SUFFIX}"
+
+    @contextmanager
+    def lock(self, upload_id: str) -> Iterator[None]:
+        """
+        Exclusive lock on one upload across threads and worker processes. Hold it around a
+        read-modify-write of the sidecar, or around loading, editing and appending steps.
+        """
+        held = self._held.__dict__.setdefault("uploads", set())
+        if upload_id in held:
+            yield
+            return
+        with open(self.lock_path(upload_id), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            held.add(upload_id)
+            try:
+                yield
+            finally:
+                held.discard(upload_id)
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def exists(self, upload_id: str) -> bool:
+        """Check whether a dataset is stored for the upload"""
+        return self.data_path(upload_id).exists()
+
+    def load(self, upload_id: str) -> pd.DataFrame:
+        """
+        Load a stored dataset with its original dtypes.
+        The frame may be shared through the cache, callers must not modify it in place.
+        """
+        path = self.data_path(upload_id)
+        if not path.exists():
+            raise FileNotFoundError(f"No dataset stored for upload {upload_id}")
+
+        version = self.version(upload_id)
+        if self.cache is not None:
+            df = self.cache.get(upload_id, version)
+            if df is not None:
+                return df
+
+        df = pd.read_parquet(path)
+        plan = self.plan(upload_id)
+        if plan:
+            df = materialize(df, [step for entry in plan for step in entry["steps"]])
+            df.index = pd.RangeIndex(len(df))
+        if self.cache is not None:
+            self.cache.put(upload_id, df, version)
+        return df
+
+    def load_mapped(self, upload_id: str) -> pd.DataFrame:
+        """
+        Read-only frame of the current version for endpoints that never modify it.
+        The Arrow copy is mapped rather than read, so workers share its pages through the
+        OS page cache and the load time barely depends on the size of the dataset: numeric
+        columns without missing values and string columns are views on the mapping.
+        Writing to the frame fails; use load_for_update for that.
+        """
+        version = self.version(upload_id)
+        if version is None:
+            raise FileNotFoundError(f"No dataset stored for upload {upload_id}")
+        if self.cache is not None:
+            df = self.cache.get(upload_id, version)
+            if df is not None:
+                return df
+
+        table = self._mapped_table(upload_id, version)
+        if table is None:
+            self._write_mapped(upload_id, version)
+            table = self._mapped_table(upload_id, version)
+            if table is None:
+                # Replaced by a newer version meanwhile
+                return self.load(upload_id)
+        # Text stays in the mapped Arrow buffers instead of becoming Python strings
+        return table.to_pandas(split_blocks=True, types_mapper=ARROW_STRING_TYPES.get)
+
+    def load_for_update(self, upload_id: str) -> pd.DataFrame:
+        """
+        Load a private copy of a dataset that can be modified and saved back.
+        Rows are labelled by position, so row_hashes(upload_id)[df.index] follows row filters.
+        """
+        return self.load(upload_id).copy()
+
+    def load_columns(self, upload_id: str, columns: List[str]) -> pd.DataFrame:
+        """Load some columns of a stored dataset, from the cache when it holds the current version"""
+        if self.cache is not None:
+            df = self.cache.get(upload_id, self.version(upload_id))
+            if df is not None:
+                return df[columns]
+        if self.plan(upload_id):
+            return self.load(upload_id)[columns]
+        return pd.read_parquet(self.data_path(upload_id), columns=columns)
+
+    def load_base_columns(self, upload_id: str, columns: List[str]) -> pd.DataFrame:
+        """Load some columns of the Parquet base, without the plan applied"""
+        if not self.plan(upload_id):
+            return self.load_columns(upload_id, columns)
+        return pd.read_parquet(self.data_path(upload_id), columns=columns)
+
+    def load_rows(
+        self,
+        upload_id: str,
+        offset: int,
+        limit: int,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Load a window of rows in stored order. Without a cached frame the window is sliced
+        from the mapped copy, which is written first when a plan would otherwise have to be
+        replayed; without either only the row groups that overlap it are read from Parquet.
+        """
+        version = self.version(upload_id)
+        cached = self.cache.get(upload_id, version) if self.cache is not None else None
+        if cached is not None:
+            df = cached if columns is None else cached[columns]
+            return df.iloc[offset:offset + limit].reset_index(drop=True)
+
+        mapped = self._mapped_table(upload_id, version) if version else None
+        if mapped is None and self.plan(upload_id):
+            self._write_mapped(upload_id, version)
+            mapped = self._mapped_table(upload_id, version)
+        if mapped is not None:
+            window = mapped.slice(offset, limit)
+            return (window if columns is None else window.select(columns)).to_pandas()
+
+        parquet = pq.ParquetFile(self.data_path(upload_id))
+        groups: List[int] = []
+        start = skip = 0
+        for i in range(parquet.num_row_groups):
+            end = start + parquet.metadata.row_group(i).num_rows
+            if end > offset and start < offset + limit:
+                if not groups:
+                    skip = offset - start
+                groups.append(i)
+            start = end
+        if not groups:
+            table = parquet.schema_arrow.empty_table()
+            return (table if columns is None else table.select(columns)).to_pandas()
+        return parquet.read_row_groups(groups, columns=columns).slice(skip, limit).to_pandas()
+
+    def take_rows(self, upload_id: str, positions: Any, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load the rows at some positions, in the order given"""
+        df = self.load(upload_id) if columns is None else self.load_columns(upload_id, columns)
+        return df.iloc[positions].reset_index(drop=True)
+
+    def save(self, upload_id: str, df: pd.DataFrame, version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Write a dataset as a new base with an empty plan, replacing any previous version.
+        Pass version to restore an earlier state under its original version token.
+        """
+        with self.lock(upload_id):
+            df = self._prepare_frame(df)
+            hashes = row_hashes(df)
+            content = fingerprint(df, hashes)
+            current = self.read_schema(upload_id)
+            if version is None and current is not None and current.get("fingerprint") == content:
+                logger.info(f"Dataset {upload_id} unchanged, keeping version {current['version']}")
+                return current
+            previous = self._read_row_hashes(upload_id, current["version"]) if version is None and current else None
+            path = self.data_path(upload_id)
+
+            # Write to a temp file first so readers never see a half-written dataset
+            tmp_path = path.with_suffix(".tmp")
+            self._write_parquet(df, tmp_path)
+            os.replace(tmp_path, path)
+
+            changes = row_changes(previous, hashes) if previous is not None else None
+            schema = self._build_schema(df, version, content, changes)
+            self._write_json(self.schema_path(upload_id), schema)
+            self._write_row_hashes(upload_id, schema["version"], hashes)
+            # Restoring a version under its own token keeps the summaries already stored for it
+            if self._read_summaries(upload_id, schema["version"]) is None:
+                self._write_summaries(upload_id, schema["version"], df)
+
+            # Replace the cached frame in place so the next read is a hit
+            if self.cache is not None:
+                self.cache.put(upload_id, df, schema["version"])
+            return schema
+
+    def append_steps(self, upload_id: str, steps: List[Dict[str, Any]], df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Record ETL steps on top of the stored dataset without rewriting it.
+        df is the result of applying them, it becomes the cached copy of the new version.
+        """
+        with self.lock(upload_id):
+            schema = self.read_schema(upload_id)
+            previous = self._read_summaries(upload_id, schema["version"])
+            previous_hashes = self._read_row_hashes(upload_id, schema["version"])
+            positions = df.index.to_numpy()
+            df = self._prepare_frame(df)
+            hashes = self._derive_row_hashes(upload_id, steps, df, previous_hashes, positions)
+            changes = row_changes(previous_hashes, hashes) if previous_hashes is not None else None
+            entry = self._describe(df, uuid.uuid4().hex, fingerprint(df, hashes), changes)
+            entry["steps"] = steps
+            schema["plan"] = self.plan(upload_id) + [entry]
+            schema["redo"] = []
+            schema = self._write_current(upload_id, schema, entry)
+            self._write_row_hashes(upload_id, schema["version"], hashes)
+            # Steps that only rewrite some columns only need those summaries recomputed
+            changed = changed_columns(steps)
+            if previous is not None and changed is not None:
+                self._write_summaries(upload_id, schema["version"], df, previous, changed)
+            else:
+                self._write_summaries(upload_id, schema["version"], df)
+
+            if self.cache is not None:
+                self.cache.put(upload_id, df, schema["version"])
+            return schema
+
+    def undo_step(self, upload_id: str) -> bool:
+        """Drop the last planned step, False when the plan is empty"""
+        with self.lock(upload_id):
+            schema = self.read_schema(upload_id)
+            plan = self.plan(upload_id)
+            if not plan:
+                return False
+            schema["redo"] = schema.get("redo", []) + [plan.pop()]
+            schema["plan"] = plan
+            # The previous version token comes back, so cached frames and analyses are reused
+            self._write_current(upload_id, schema, plan[-1] if plan else schema["base"])
+            return True
+
+    def redo_step(self, upload_id: str) -> bool:
+        """Re-apply the last undone step, False when there is none"""
+        with self.lock(upload_id):
+            schema = self.read_schema(upload_id)
+            redo = schema.get("redo", [])
+            if not redo:
+                return False
+            entry = redo.pop()
+            schema["plan"] = self.plan(upload_id) + [entry]
+            schema["redo"] = redo
+            self._write_current(upload_id, schema, entry)
+            return True
+
+    def plan(self, upload_id: str) -> List[Dict[str, Any]]:
+        """Steps recorded on top of the base, each with the version it produced"""
+        schema = self.read_schema(upload_id)
+        return list(schema.get("plan", [])) if schema else []
+
+    def base_version(self, upload_id: str) -> Optional[str]:
+        """Version token of the Parquet base"""
+        schema = self.read_schema(upload_id)
+        if not schema:
+            return None
+        return schema.get("base", schema)["version"]
+
+    def restore(
+        self,
+        upload_id: str,
+        df: pd.DataFrame,
+        base_version: str,
+        plan: List[Dict[str, Any]],
+        redo: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Write a base under its original version token and put a plan (and redo steps) back on top of it"""
+        with self.lock(upload_id):
+            schema = self.save(upload_id, df, version=base_version)
+            if not plan and not redo:
+                return schema
+            schema["plan"] = plan
+            schema["redo"] = redo or []
+            if not plan:
+                return self._write_current(upload_id, schema, schema["base"])
+            self.invalidate(upload_id)
+            return self._write_current(upload_id, schema, plan[-1])
+
+    def compact(self, upload_id: str) -> Dict[str, Any]:
+        """Fold the plan into a new base, keeping the current version token"""
+        with self.lock(upload_id):
+            return self.save(upload_id, self.load(upload_id), version=self.version(upload_id))
+
+    def summaries(self, upload_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-column summaries of the current version. Versions reached by undo or redo
+        may have none stored yet, those are computed and stored on first use.
+        """
+        version = self.version(upload_id)
+        stored = self._read_summaries(upload_id, version)
+        if stored is not None:
+            return stored
+        return self._write_summaries(upload_id, version, self.load(upload_id))
+
+    def row_hashes(self, upload_id: str) -> np.ndarray:
+        """
+        Hash of every row of the current version. Like the summaries, versions reached
+        by undo or redo may have none stored yet, those are computed on first use.
+        """
+        version = self.version(upload_id)
+        stored = self._read_row_hashes(upload_id, version)
+        if stored is not None:
+            return stored
+        hashes = row_hashes(self.load(upload_id))
+        self._write_row_hashes(upload_id, version, hashes)
+        return hashes
+
+    def sample_positions(self, upload_id: str, size: int, seed: int) -> np.ndarray:
+        """
+        Sorted positions of the seeded sample of the current version's rows. Drawn once
+        per version, size and seed, so repeated insight and anomaly runs reuse the rows.
+        """
+        version = self.version(upload_id)
+        path = self.sample_path(upload_id)
+        if path.exists():
+            with np.load(path) as stored:
+                if str(stored["version"]) == version and int(stored["size"]) == size and int(stored["seed"]) == seed:
+                    return stored["positions"]
+        positions = draw_sample(self.read_schema(upload_id)["rows"], size, seed)
+        with self.lock(upload_id):
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                np.savez(f, version=np.array(version), size=size, seed=seed, positions=positions)
+            os.replace(tmp_path, path)
+        return positions
+
+    def read_schema(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Read the schema sidecar without touching the data file"""
+        path = self.schema_path(upload_id)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def version(self, upload_id: str) -> Optional[str]:
+        """Version token of the stored dataset, changes on every save"""
+        schema = self.read_schema(upload_id)
+        return schema.get("version") if schema else None
+
+    def invalidate(self, upload_id: str):
+        """Forget any cached copy after the files were changed outside of save()"""
+        if self.cache is not None:
+            self.cache.invalidate(upload_id)
+
+    def delete(self, upload_id: str):
+        """Remove a stored dataset and its sidecar"""
+        self.invalidate(upload_id)
+        for path in self.root.glob(f"{upload_id}.*{self.MAPPED_SUFFIX}"):
+            path.unlink(missing_ok=True)
+        for path in (self.data_path(upload_id), self.schema_path(upload_id), self.summary_path(upload_id),
+                     self.row_hash_path(upload_id), self.sample_path(upload_id), self.lock_path(upload_id)):
+            if path.exists():
+                path.unlink()
+
+    def migrate_csv_uploads(self) -> int:
+        """One-time conversion of legacy per-upload CSV files into the columnar format"""
+        migrated = 0
+        for csv_path in sorted(self.root.glob("*.csv")):
+            upload_id = csv_path.stem
+            try:
+                if not self.exists(upload_id):
+                    self.save(upload_id, optimize_dtypes(pd.read_csv(csv_path))[0])
+                csv_path.unlink()
+                migrated += 1
+                logger.info(f"Migrated {csv_path.name} to {self.data_path(upload_id).name}")
+            except Exception as e:
+                logger.error(f"Failed to migrate {csv_path.name}: {str(e)}")
+        return migrated
+
+    def _write_parquet(self, df: pd.DataFrame, path: Path):
+        """
+        Write one row group at a time so only a slice of the frame is ever
+        converted to Arrow, instead of a second full copy of the dataset.
+        """
+        schema = self._keep_string_storage(pa.Schema.from_pandas(df, preserve_index=False), df)
+        with pq.ParquetWriter(path, schema, compression=self.compression) as writer:
+            for start in range(0, max(len(df), 1), self.row_group_size):
+                chunk = df.iloc[start:start + self.row_group_size]
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+    @staticmethod
+    def _keep_string_storage(schema: pa.Schema, df: pd.DataFrame) -> pa.Schema:
+        """
+        Name each string column's storage in the pandas metadata, which only says 'string',
+        so Arrow-backed columns are read back Arrow-backed instead of as Python strings
+        """
+        storage = {str(col): dtype.storage for col, dtype in df.dtypes.items() if isinstance(dtype, pd.StringDtype)}
+        if not storage:
+            return schema
+        metadata = schema.pandas_metadata
+        for column in metadata["columns"]:
+            if column["name"] in storage:
+                column["numpy_type"] = f"string[{storage[column['name']]}]"
+        return schema.with_metadata({**schema.metadata, b"pandas": json.dumps(metadata).encode("utf-8")})
+
+    def _mapped_table(self, upload_id: str, version: str) -> Optional[pa.Table]:
+        """The Arrow copy of a version mapped into memory, None when it was not written"""
+        try:
+            source = pa.memory_map(str(self.mapped_path(upload_id, version)))
+        except FileNotFoundError:
+            return None
+        # The table's buffers point into the mapping and keep it open
+        return pa.ipc.open_file(source).read_all()
+
+    def _write_mapped(self, upload_id: str, version: str):
+        """
+        Write the Arrow copy of a version as one uncompressed record batch, so every
+        column is a single contiguous buffer pandas can use in place, and remove the
+        copies of other versions. Readers that still map those keep them until they let go.
+        """
+        df = self.load(upload_id)
+        table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+        # from_pandas turns NaN into nulls, which pandas would have to fill back in
+        for i, col in enumerate(df.columns):
+            if df[col].dtype.kind == 'f':
+                table = table.set_column(i, table.field(i), pa.array(df[col].to_numpy(), from_pandas=False))
+        table = table.replace_schema_metadata(self._keep_string_storage(table.schema, df).metadata)
+
+        path = self.mapped_path(upload_id, version)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(df), 1))
+        os.replace(tmp_path, path)
+        for stale in self.root.glob(f"{upload_id}.*{self.MAPPED_SUFFIX}"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    def _read_summaries(self, upload_id: str, version: Optional[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Stored summaries if they describe the given version"""
+        path = self.summary_path(upload_id)
+        if version is None or not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        return stored["columns"] if stored.get("version") == version else None
+
+    def _write_summaries(
+        self,
+        upload_id: str,
+        version: str,
+        df: pd.DataFrame,
+        previous: Optional[Dict[str, Dict[str, Any]]] = None,
+        changed: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Summarize a version, reusing previous summaries for the columns not in changed"""
+        if previous is None or changed is None:
+            columns = column_summaries(df, self.summary_bins, self.summary_top_k)
+        else:
+            fresh = column_summaries(df, self.summary_bins, self.summary_top_k, columns=changed)
+            columns = {col: fresh[col] if col in fresh else previous[col] for col in df.columns}
+        self._write_json(self.summary_path(upload_id), {"version": version, "columns": columns})
+        return columns
+
+    def _read_row_hashes(self, upload_id: str, version: Optional[str]) -> Optional[np.ndarray]:
+        """Stored row hashes if they describe the given version"""
+        path = self.row_hash_path(upload_id)
+        if version is None or not path.exists():
+            return None
+        with np.load(path) as stored:
+            return stored["hashes"] if str(stored["version"]) == version else None
+
+    def _write_row_hashes(self, upload_id: str, version: str, hashes: np.ndarray):
+        """Atomically store the row hashes of a version"""
+        path = self.row_hash_path(upload_id)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, version=np.array(version), hashes=hashes)
+        os.replace(tmp_path, path)
+
+    def _derive_row_hashes(
+        self,
+        upload_id: str,
+        steps: List[Dict[str, Any]],
+        df: pd.DataFrame,
+        previous: Optional[np.ndarray],
+        positions: np.ndarray
+    ) -> np.ndarray:
+        """
+        Row hashes of the result of steps applied to the stored dataset. Steps that only
+        write some columns rehash those columns, steps that only drop rows keep the hashes
+        of the rows left (positions, from load_for_update's labels); anything else rehashes all.
+        """
+        if previous is not None:
+            changed = changed_columns(steps)
+            if changed is not None and len(df) == len(previous):
+                known = {col["name"] for col in self.read_schema(upload_id)["columns"]}
+                before = self.load_columns(upload_id, [col for col in changed if col in known])
+                return update_row_hashes(previous, before, df, changed)
+            if filters_rows(steps) and (len(positions) == 0 or positions.max() < len(previous)):
+                return previous[positions]
+        return row_hashes(df)
+
+    @staticmethod
+    def _prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """Make a frame storable: string column names and no mixed-type object columns"""
+        # Relabel a shallow copy; reset_index would duplicate every column
+        df = df.copy(deep=False)
+        df.index = pd.RangeIndex(len(df))
+        if not all(isinstance(c, str) for c in df.columns):
+            df.columns = [str(c) for c in df.columns]
+
+        for col in df.select_dtypes(include=["object"]).columns:
+            inferred = pd.api.types.infer_dtype(df[col], skipna=True)
+            if inferred.startswith("mixed") or inferred in ("bytes", "decimal"):
+                # Parquet needs one type per column; keep missing values as missing
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return df
+
+    def _build_schema(
+        self,
+        df: pd.DataFrame,
+        version: Optional[str] = None,
+        content: Optional[str] = None,
+        changes: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Describe the stored dataset"""
+        base = self._describe(df, version or uuid.uuid4().hex, content, changes)
+        return {
+            **base,
+            "format": "parquet",
+            "compression": self.compression,
+            "updated_at": datetime.utcnow().isoformat(),
+            "base": base,
+            "plan": [],
+            "redo": [],
+        }
+
+    @staticmethod
+    def _describe(
+        df: pd.DataFrame,
+        version: str,
+        content: Optional[str] = None,
+        changes: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Version, row count and column types of a frame, with its content fingerprint and
+        the rows added and removed since the version it was derived from
+        """
+        columns: List[Dict[str, str]] = [
+            {"name": col, "dtype": str(dtype)} for col, dtype in df.dtypes.items()
+        ]
+        return {"version": version, "rows": int(len(df)), "columns": columns,
+                "fingerprint": content, "changes": changes}
+
+    def _write_current(self, upload_id: str, schema: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+        """Point the sidecar's top-level description at a base or plan entry and write it"""
+        schema.setdefault("base", {k: schema.get(k) for k in self.CURRENT_KEYS})
+        schema.update({k: current.get(k) for k in self.CURRENT_KEYS})
+        schema["updated_at"] = datetime.utcnow().isoformat()
+        self._write_json(self.schema_path(upload_id), schema)
+        return schema
+
+    @staticmethod
+    def _write_json(path: Path, payload: Dict[str, Any]):
+        """Atomically write a JSON document"""
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    store = DatasetStore(Path(__file__).parent / "uploads")
+    count = store.migrate_csv_uploads()
+    logger.info(f"Migrated {count} CSV upload(s)")
@@ -0,0 +1,67 @@
+"""
+Compact per-column summaries computed when a dataset is written: fixed-bin histograms
+for numeric and datetime columns, top-k value counts for everything else.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from aggregation import histogram
+
+logger = logging.getLogger(__name__)
+
+
+def _datetime_histogram(series: pd.Series, bins: int) -> Dict[str, Any]:
+    """Fixed-width time bins, edges as ISO 8601 strings"""
+    times = series.dt.tz_convert(None) if series.dt.tz is not None else series
+    present = times.dropna()
+    if present.empty:
+        return {"bins": [], "missing": int(len(series))}
+    values = present.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    counts, edges = np.histogram(values, bins=bins)
+    edges = pd.to_datetime(edges.astype(np.int64)).map(pd.Timestamp.isoformat)
+    return {
+        "bins": [
+            {"start": edges[i], "end": edges[i + 1], "count": int(counts[i])}
+            for i in range(len(counts))
+        ],
+        "missing": int(len(series) - len(present)),
+    }
+
+
+def _top_values(series: pd.Series, top_k: int) -> Dict[str, Any]:
+    """Most frequent values, with how many rows the rest cover"""
+    counts = series.value_counts(dropna=True, sort=True)
+    # Categorical columns also count categories no row holds any more
+    counts = counts[counts > 0]
+    top = counts.head(top_k)
+    return {
+        "top": [{"value": str(value), "count": int(count)} for value, count in top.items()],
+        "other": int(counts.sum() - top.sum()),
+        "distinct": int(len(counts)),
+        "missing": int(series.isna().sum()),
+    }
+
+
+def summarize_column(series: pd.Series, bins: int = 20, top_k: int = 10) -> Dict[str, Any]:
+    """Histogram or top-k summary of one column"""
+    if pd.api.types.is_bool_dtype(series):
+        return {"kind": "categorical", **_top_values(series, top_k)}
+    if pd.api.types.is_numeric_dtype(series):
+        return {"kind": "numeric", **histogram(series, bins)}
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return {"kind": "datetime", **_datetime_histogram(series, bins)}
+    return {"kind": "categorical", **_top_values(series, top_k)}
+
+
+def column_summaries(
+    df: pd.DataFrame,
+    bins: int = 20,
+    top_k: int = 10,
+    columns: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Summaries of all (or some) columns of a frame"""
+    return {col: summarize_column(df[col], bins, top_k) for col in (df.columns if columns is None else columns)}
@@ -0,0 +1,174 @@
+"""
+Dataset tasks run by DatasetExecutor, in a worker thread or a worker process.
+
+Tasks take an upload_id instead of a DataFrame and load the stored dataset
+themselves, so nothing large is pickled when they run in the process pool.
+"""
+
+import logging
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from aggregation import chart_data as compute_chart_data, spec_columns
+from analyzer import DataAnalyzer
+from config import settings
+from correlation import correlations as compute_correlations
+from etl import apply_steps
+from storage import DatasetStore
+
+logger = logging.getLogger(__name__)
+
+_store: Optional[DatasetStore] = None
+
+
+def register_store(store: DatasetStore):
+    """Use the API's own (cache-backed) store for tasks run in threads"""
+    global _store
+    _store = store
+
+
+def init_worker(root: str, compression: str, row_group_size: int, summary_bins: int = 20, summary_top_k: int = 10):
+    """Process-pool initializer: open the dataset store from its directory"""
+    global _store
+    _store = DatasetStore(
+        Path(root),
+        compression=compression,
+        row_group_size=row_group_size,
+        summary_bins=summary_bins,
+        summary_top_k=summary_top_k,
+    )
+
+
+def get_store() -> DatasetStore:
+    """Dataset store for the current thread or process"""
+    if _store is None:
+        raise RuntimeError("Dataset store not registered")
+    return _store
+
+
+def analyze_dataset(
+    upload_id: str,
+    filename: str,
+    exact: bool = False,
+    previous: Optional[Dict[str, Any]] = None,
+    changed: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Frontend analysis payload for a stored dataset; exact skips the sampled insights.
+    With the previous version's payload, only the changed columns are re-analyzed.
+    """
+    store = get_store()
+    df = store.load(upload_id)
+    # Frames large enough to be sampled reuse the sample stored with their version
+    positions = None
+    if len(df) >= settings.SAMPLE_MIN_ROWS:
+        positions = store.sample_positions(upload_id, settings.SAMPLE_SIZE, settings.SAMPLE_SEED)
+    return DataAnalyzer.prepare_for_frontend(
+        df, filename, exact=exact, previous=previous, changed=changed,
+        row_hashes=store.row_hashes(upload_id), sample_positions=positions
+    )
+
+
+def apply_pipeline(upload_id: str, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply ETL steps to a stored dataset and record them in its operation plan,
+    the Parquet base is not rewritten. Returns the new schema.
+    """
+    store = get_store()
+    # Held from the load to the append, so a concurrent edit cannot land in between
+    with store.lock(upload_id):
+        df = store.load_for_update(upload_id)
+        df = apply_steps(df, steps, row_hashes=store.row_hashes(upload_id))
+        return store.append_steps(upload_id, steps, df)
+
+
+def preview_pipeline(upload_id: str, steps: List[Dict[str, Any]], filename: str) -> Dict[str, Any]:
+    """Frontend analysis of a stored dataset with ETL steps applied, without saving it"""
+    df = apply_steps(get_store().load_for_update(upload_id), steps)
+    return DataAnalyzer.prepare_for_frontend(df, filename)
+
+
+def sort_order(upload_id: str, column: str, descending: bool = False) -> np.ndarray:
+    """Row positions of a stored dataset sorted by one column, missing values last"""
+    series = get_store().load_columns(upload_id, [column])[column].reset_index(drop=True)
+    order = series.sort_values(ascending=not descending, na_position="last", kind="stable").index
+    # Positions are kept per dataset version, int32 halves their footprint
+    return order.to_numpy(dtype=np.int32 if len(series) < 2 ** 31 else np.int64)
+
+
+def read_rows(
+    upload_id: str,
+    offset: int,
+    limit: int,
+    columns: Optional[List[str]] = None,
+    order: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """A window of rows, in stored order or in the given sort order"""
+    store = get_store()
+    if order is None:
+        return store.load_rows(upload_id, offset, limit, columns)
+    return store.take_rows(upload_id, order[offset:offset + limit], columns)
+
+
+def chart_data(upload_id: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Chart data for a spec over the whole stored dataset, reading only the columns it uses"""
+    store = get_store()
+    schema = store.read_schema(upload_id)
+    if spec["kind"] == "histogram" and spec["bins"] == store.summary_bins:
+        # The default histogram was computed when the dataset was written
+        summary = store.summaries(upload_id).get(spec["x"])
+        if summary is not None and summary["kind"] == "numeric":
+            return {**spec, "agg": spec.get("agg") or "count", "rows": schema["rows"],
+                    "bins": summary["bins"], "missing": summary["missing"]}
+    columns = [c for c in spec_columns(spec) if c in {col["name"] for col in schema["columns"]}]
+    return compute_chart_data(store.load_columns(upload_id, columns), spec)
+
+
+def correlations(
+    upload_id: str,
+    method: str,
+    columns: Optional[List[str]],
+    threshold: float,
+    top_k: int,
+    min_periods: int
+) -> Dict[str, Any]:
+    """Correlation matrix and top pairs of a stored dataset, reading only the columns it needs"""
+    store = get_store()
+    stored = store.read_schema(upload_id)["columns"]
+    if columns is None:
+        names = [col["name"] for col in stored if _is_number(col["dtype"])]
+    else:
+        # Unknown names are left out here and reported by the engine
+        known = {col["name"] for col in stored}
+        names = [c for c in columns if c in known]
+    df = store.load_columns(upload_id, names)
+    return compute_correlations(df, method, columns, threshold, top_k, min_periods)
+
+
+def _is_number(dtype: str) -> bool:
+    """Whether a stored dtype name is numeric and not boolean"""
+    try:
+        dtype = pd.api.types.pandas_dtype(dtype)
+    except TypeError:
+        return False
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def export_dataset(upload_id: str, fmt: str) -> bytes:
+    """Serialize a stored dataset to csv, json or excel, from its memory-mapped copy"""
+    df = get_store().load_mapped(upload_id)
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if fmt == "json":
+        return df.to_json(orient="records").encode("utf-8")
+    if fmt == "excel":
+        # Uses openpyxl which is in requirements.txt
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False)
+        return output.getvalue()
+    raise ValueError(f"Unsupported format: {fmt}")
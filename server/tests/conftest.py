@@ -0,0 +1,24 @@
+"""
+Shared fixtures. The server modules import each other by their bare names, so the
+server directory goes on the path the way the benchmarks put it there.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import tasks  # noqa: E402
+from cache import DatasetCache  # noqa: E402
+from storage import DatasetStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Cache-backed dataset store in a temporary directory, registered for the tasks"""
+    store = DatasetStore(tmp_path / "uploads", cache=DatasetCache(64 * 1024 * 1024))
+    tasks.register_store(store)
+    yield store
+    tasks.register_store(None)
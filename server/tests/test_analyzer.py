@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyzer import DataAnalyzer
+from etl import apply_steps, changed_columns
+
+COMPARED = ("analysis", "insights", "data_quality", "anomalies")
+
+
+def numeric_frame(rows: int = 200) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({col: rng.normal(50, 5, rows) for col in "ABCDEF"})
+    df.loc[:4, "F"] = 10_000.0
+    return df
+
+
+def assert_incremental_matches_full(df, steps):
+    previous = DataAnalyzer.prepare_for_frontend(df, "data.csv")
+    edited = apply_steps(df.copy(), steps)
+    incremental = DataAnalyzer.prepare_for_frontend(
+        edited, "data.csv", previous=previous, changed=changed_columns(steps)
+    )
+    full = DataAnalyzer.prepare_for_frontend(edited, "data.csv")
+    for key in COMPARED:
+        assert incremental[key] == full[key], key
+    return full
+
+
+def test_outliers_of_columns_moving_into_the_first_five_are_scanned():
+    full = assert_incremental_matches_full(numeric_frame(), [{"op": "cast", "column": "B", "target_type": "string"}])
+    assert "Outliers in F" in [insight["title"] for insight in full["insights"]]
+
+
+def test_added_column_keeps_outlier_insights():
+    assert_incremental_matches_full(numeric_frame(), [{"op": "calculate", "new_column": "G", "expression": "A + B"}])
+
+
+@pytest.mark.parametrize("steps", [
+    [{"op": "clean", "action": "fill_mean", "column": "F"}],
+    [{"op": "cast", "column": "A", "target_type": "string"}, {"op": "cast", "column": "A", "target_type": "numeric"}],
+    [{"op": "calculate", "new_column": "C", "expression": "C * 1000"}],
+    [{"op": "calculate", "new_column": "key", "expression": "A > 50"}],
+])
+def test_incremental_analysis_matches_full(steps):
+    df = numeric_frame()
+    df.loc[10:20, "F"] = np.nan
+    df["label"] = np.where(df["A"] > 50, "high", "low")
+    assert_incremental_matches_full(df, steps)
@@ -0,0 +1,38 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from auth import get_current_user
+
+
+class UploadsDB:
+    async def get_upload(self, upload_id):
+        return {"_id": upload_id, "user_id": "owner", "filename": "data.csv"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def get_db():
+        return UploadsDB()
+
+    monkeypatch.setattr(main, "get_db", get_db)
+    main.app.dependency_overrides[get_current_user] = lambda: {"id": "someone-else"}
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("method, path", [
+    ("get", "/api/rows/u"),
+    ("get", "/api/summaries/u"),
+    ("post", "/api/chart-data/u"),
+    ("get", "/api/correlations/u"),
+])
+def test_data_endpoints_check_the_owner(client, method, path):
+    kwargs = {"json": {"kind": "histogram", "x": "n"}} if method == "post" else {}
+    response = getattr(client, method)(path, **kwargs)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Upload not found"
+
+
+def test_data_endpoints_need_a_token():
+    assert TestClient(main.app).get("/api/rows/u").status_code == 401
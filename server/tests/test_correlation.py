@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation import correlations
+
+
+def frame_with_gaps(rows: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    a = rng.normal(size=rows)
+    df = pd.DataFrame({
+        "a": a,
+        "b": a * 2 + rng.normal(size=rows),
+        "c": np.exp(a) + rng.normal(scale=0.5, size=rows),
+        "d": rng.integers(0, 5, rows).astype(float),
+        "e": rng.normal(size=rows),
+    })
+    df.loc[rng.choice(rows, 60, replace=False), "a"] = np.nan
+    df.loc[rng.choice(rows, 40, replace=False), "c"] = np.nan
+    df.loc[df.index[:30], "d"] = np.nan
+    df["e"] = df["e"].where(df["a"].notna())  # same missing rows as a
+    return df
+
+
+@pytest.mark.parametrize("method", ["pearson", "spearman"])
+def test_matches_dataframe_corr_with_missing_values(method):
+    df = frame_with_gaps()
+    result = correlations(df, method=method)
+    expected = df.corr(method=method).to_numpy()
+    np.testing.assert_allclose(result["matrix"], expected, rtol=1e-10, atol=1e-12)
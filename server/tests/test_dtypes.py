@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+import tasks
+from aggregation import group_by
+from dtypes import optimize_dtypes
+
+
+def compact_frame() -> pd.DataFrame:
+    df, _ = optimize_dtypes(pd.DataFrame({
+        "g": ["a", "a", "a", "b", "b", "b"],
+        "v": [10.5, 20.25, np.nan, 1.5, 2.0, 2.25],
+    }))
+    assert df["v"].dtype == np.float32
+    return df
+
+
+def test_group_means_are_not_float32():
+    groups = group_by(compact_frame(), "g", "v", "mean", limit=10)["groups"]
+    assert [group["value"] for group in groups] == [5.75 / 3, 15.375]
+
+
+def test_fill_mean_writes_float64_means(store):
+    store.save("u", compact_frame())
+    tasks.apply_pipeline("u", [
+        {"op": "clean", "action": "fill_mean", "column": "v"},
+        {"op": "clean", "action": "fill_mean", "column": None},
+    ])
+    cached = store.load("u")
+    assert cached["v"].dtype == np.float64
+    assert cached["v"][2] == 36.5 / 5
+    store.cache.clear()
+    pd.testing.assert_frame_equal(store.load("u"), cached)
+
+
+def test_cast_arrow_strings_with_bad_values_to_numeric(store):
+    df, report = optimize_dtypes(pd.DataFrame({
+        "s": [f"{i}.5" for i in range(20)] + ["n/a", "?"],
+        "c": ["x", "y"] * 11,
+    }))
+    assert report["columns"]["s"]["to"] == "string" and df["c"].dtype == "category"
+    store.save("u", df)
+    tasks.apply_pipeline("u", [
+        {"op": "cast", "column": "s", "target_type": "numeric"},
+        {"op": "cast", "column": "c", "target_type": "string"},
+        {"op": "clean", "action": "drop_na", "column": "s"},
+        {"op": "calculate", "new_column": "t", "expression": "s * 2"},
+    ])
+    cached = store.load("u")
+    assert cached["s"].tolist() == [i + 0.5 for i in range(20)]
+    assert cached["c"].tolist() == ["x", "y"] * 10
+    store.cache.clear()
+    pd.testing.assert_frame_equal(store.load("u"), cached)
@@ -0,0 +1,60 @@
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+import tasks
+from history import VersionHistory
+
+EDITS = [
+    [{"op": "calculate", "new_column": "double", "expression": "n * 2"}],
+    [{"op": "clean", "action": "drop_na", "column": "name"}],
+    [{"op": "cast", "column": "name", "target_type": "string"}],
+    [{"op": "calculate", "new_column": "triple", "expression": "n * 3"}],
+]
+
+
+@pytest.fixture
+def history(store, tmp_path):
+    return VersionHistory(tmp_path / "history", store)
+
+
+def frame(store):
+    store.cache.clear()
+    return store.load("u")
+
+
+def edit(store, history, steps):
+    """An ETL edit the way the API applies it; two planned steps are folded into a new base"""
+    history.checkpoint("u")
+    tasks.apply_pipeline("u", steps)
+    history.record("u", {"action": "etl", "steps": steps})
+    history.compact("u", max_steps=2)
+
+
+def test_every_edit_is_recorded(store, history):
+    store.save("u", pd.DataFrame({"name": ["a", None, "c", "d"], "n": [1, 2, 3, 4]}))
+    for steps in EDITS:
+        edit(store, history, steps)
+    described = history.describe("u")
+    assert [version["operation"]["action"] for version in described["versions"]] == ["snapshot"] + ["etl"] * 4
+    assert described["position"] == 4 and described["bytes"] > 0
+
+
+def test_undo_redo_round_trip_across_compaction(store, history):
+    store.save("u", pd.DataFrame({"name": ["a", None, "c", "d"], "n": [1, 2, 3, 4]}))
+    states = [(store.version("u"), frame(store))]
+    for steps in EDITS:
+        edit(store, history, steps)
+        states.append((store.version("u"), frame(store)))
+
+    for version, expected in reversed(states[:-1]):
+        assert history.undo("u")
+        assert store.version("u") == version
+        tm.assert_frame_equal(frame(store), expected)
+    assert not history.undo("u")
+
+    for version, expected in states[1:]:
+        assert history.redo("u")
+        assert store.version("u") == version
+        tm.assert_frame_equal(frame(store), expected)
+    assert not history.redo("u")
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import llm_stub
+from llm import LLMClient, LLMError
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """llm_stub served in-process, with fresh counters and no real sleeping between retries"""
+    monkeypatch.setattr(llm_stub, "stats", {"requests": 0, "failures": 0})
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return delays
+
+
+def stub_client(**kwargs) -> LLMClient:
+    client = LLMClient("http://stub/openai/v1", "key", "stub-model", **kwargs)
+    client._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=llm_stub.app), base_url=client.base_url
+    )
+    return client
+
+
+def chat(client: LLMClient, **kwargs) -> str:
+    async def run():
+        try:
+            return await client.chat("prompt", **kwargs)
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+def fail_first(monkeypatch, failures: int):
+    """Make the stub answer 503 to its first requests only"""
+    draws = iter([0.0] * failures)
+    monkeypatch.setattr(llm_stub, "STUB_FAIL_RATE", 0.5)
+    monkeypatch.setattr(llm_stub, "random", SimpleNamespace(random=lambda: next(draws, 1.0)))
+
+
+def test_json_reply(stub):
+    client = stub_client()
+    assert json.loads(chat(client, json_mode=True)) == llm_stub.STUB_JSON
+    assert client.stats()["requests"] == 1 and client.stats()["retries"] == 0
+
+
+def test_retries_then_succeeds(stub, monkeypatch):
+    fail_first(monkeypatch, 2)
+    client = stub_client(max_retries=2)
+    assert chat(client) == llm_stub.STUB_TEXT
+    assert llm_stub.stats == {"requests": 3, "failures": 2}
+    assert client.stats()["retries"] == 2 and client.stats()["failures"] == 0
+    assert len(stub) == 2
+
+
+def test_retry_after_is_honoured(stub, monkeypatch):
+    fail_first(monkeypatch, 1)
+    monkeypatch.setattr(llm_stub, "STUB_RETRY_AFTER", "3")
+    assert chat(stub_client(max_backoff=8.0)) == llm_stub.STUB_TEXT
+    assert stub == [3.0]
+
+
+def test_retry_after_is_capped(stub, monkeypatch):
+    fail_first(monkeypatch, 1)
+    monkeypatch.setattr(llm_stub, "STUB_RETRY_AFTER", "120")
+    chat(stub_client(max_backoff=8.0))
+    assert stub == [8.0]
+
+
+def test_gives_up_after_max_retries(stub, monkeypatch):
+    monkeypatch.setattr(llm_stub, "STUB_FAIL_RATE", 1.0)
+    client = stub_client(max_retries=2)
+    with pytest.raises(LLMError) as error:
+        chat(client)
+    assert error.value.status_code == 503
+    assert llm_stub.stats["requests"] == 3
+    assert client.stats()["failures"] == 1
+
+
+def scripted_client(bodies, **kwargs) -> LLMClient:
+    """Client whose successive requests get the given raw 200 bodies"""
+    replies = iter(bodies)
+    client = LLMClient("http://stub/openai/v1", "key", "stub-model", **kwargs)
+    client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=next(replies))),
+        base_url=client.base_url,
+    )
+    return client
+
+
+REPLY = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+
+
+def test_truncated_reply_is_retried(stub):
+    client = scripted_client([REPLY[:20], REPLY], max_retries=1)
+    assert chat(client) == "ok"
+    assert client.stats()["retries"] == 1
+
+
+def test_invalid_json_after_retries_is_an_llm_error(stub):
+    client = scripted_client([b"<html>", b"<html>"], max_retries=1)
+    with pytest.raises(LLMError) as error:
+        chat(client)
+    assert error.value.status_code == 502
+    assert client.stats()["failures"] == 1
@@ -0,0 +1,19 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from profiling import profile_columns
+
+
+@pytest.mark.parametrize("df", [
+    pd.DataFrame({"n": [1.0, None, 3.0]}),
+    pd.DataFrame({"s": ["a", None, "a"]}),
+    pd.DataFrame({"n": [1, 2, 2], "s": ["a", "b", None]}),
+])
+def test_profile_counts_without_warnings(df):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        analysis = profile_columns(df)
+    assert {col: info["missing"] for col, info in analysis.items()} == df.isna().sum().to_dict()
+    assert {col: info["unique"] for col, info in analysis.items()} == df.nunique().to_dict()
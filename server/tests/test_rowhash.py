@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rowhash import count_duplicates, deduplicate, row_hashes
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32", "Float64"])
+def test_duplicates_match_pandas(dtype):
+    df = pd.DataFrame({
+        "x": pd.Series([1.5, -0.0, np.nan, 0.0, None, 1.5], dtype=dtype),
+        "k": ["a", "b", "c", "b", "c", "a"],
+    })
+    hashes = row_hashes(df)
+    assert count_duplicates(df, hashes) == int(df.duplicated().sum()) == 3
+    pd.testing.assert_frame_equal(deduplicate(df, hashes), df.drop_duplicates())
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+import storage
+import tasks
+from config import settings
+from sampling import sample_positions
+
+
+def test_sample_is_drawn_once_per_version(store, monkeypatch):
+    monkeypatch.setattr(settings, "SAMPLE_MIN_ROWS", 100)
+    monkeypatch.setattr(settings, "SAMPLE_SIZE", 50)
+    draws = []
+
+    def draw(n_rows, size, seed=0):
+        draws.append(n_rows)
+        return sample_positions(n_rows, size, seed)
+
+    monkeypatch.setattr(storage, "draw_sample", draw)
+    store.save("u", pd.DataFrame({"n": np.arange(500.0)}))
+
+    first = tasks.analyze_dataset("u", "data.csv")
+    second = tasks.analyze_dataset("u", "data.csv")
+    assert draws == [500]
+    assert first["sampling"]["sampled"] and first["sampling"]["sample_size"] == 50
+    assert first["anomalies"] == second["anomalies"]
+    stored = store.sample_positions("u", 50, settings.SAMPLE_SEED)
+    assert (stored == sample_positions(500, 50, settings.SAMPLE_SEED)).all()
+
+    tasks.apply_pipeline("u", [{"op": "clean", "action": "drop_na", "column": None}])
+    store.sample_positions("u", 50, settings.SAMPLE_SEED)
+    assert len(draws) == 2
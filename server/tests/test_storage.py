@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+import tasks
+from dtypes import optimize_dtypes
+from rowhash import row_hashes
+
+
+def cold_load(store, upload_id):
+    """The stored dataset replayed from its Parquet base and plan, not the cached frame"""
+    store.cache.clear()
+    return store.load(upload_id)
+
+
+def test_fused_calculations_widen_small_integers(store):
+    store.save("u", pd.DataFrame({"y": np.array([30000, -2, 7], dtype=np.int16)}))
+    tasks.apply_pipeline("u", [
+        {"op": "calculate", "new_column": "y2", "expression": "y * 2"},
+        {"op": "calculate", "new_column": "y3", "expression": "y * 100000"},
+    ])
+    cached = store.load("u")
+    assert cached["y3"].tolist() == [3_000_000_000, -200_000, 700_000]
+    tm.assert_frame_equal(cold_load(store, "u"), cached)
+
+
+def test_text_cleaning_is_an_undoable_plan_step(store):
+    original = pd.DataFrame({"name": ["  ada lovelace", None, "alan turing  "], "n": [1, 2, 3]})
+    store.save("u", original)
+    tasks.apply_pipeline("u", [
+        {"op": "clean", "action": "strip", "column": "name"},
+        {"op": "clean", "action": "title", "column": "name"},
+    ])
+    cleaned = store.load("u")
+    assert cleaned["name"].fillna("").tolist() == ["Ada Lovelace", "", "Alan Turing"]
+    tm.assert_frame_equal(cold_load(store, "u"), cleaned)
+
+    assert store.undo_step("u")
+    tm.assert_frame_equal(store.load("u"), original)
+    assert store.redo_step("u")
+    tm.assert_frame_equal(store.load("u"), cleaned)
+
+
+def mixed_frame() -> pd.DataFrame:
+    df, _ = optimize_dtypes(pd.DataFrame({
+        "city": ["Oslo", "Lima", "Oslo", None, "Lima", "Oslo"] * 5,
+        "qty": [1, 2, 1, 4, 2, 1] * 5,
+        "price": [9.5, np.nan, 9.5, 3.25, np.nan, 9.5] * 5,
+        "code": ["1", "2", "1", "x", "2", "1"] * 5,
+    }))
+    return df
+
+
+REPLAYED_EDITS = [
+    [{"op": "calculate", "new_column": "total", "expression": "qty * price"},
+     {"op": "calculate", "new_column": "big", "expression": "total * 1000000"},
+     {"op": "calculate", "new_column": "qty", "expression": "qty * 2"}],
+    [{"op": "clean", "action": "fill_mean", "column": "price"},
+     {"op": "clean", "action": "fill_mean", "column": None}],
+    [{"op": "cast", "column": "code", "target_type": "numeric"},
+     {"op": "cast", "column": "city", "target_type": "string"}],
+    [{"op": "clean", "action": "drop_duplicates", "column": None}],
+    [{"op": "clean", "action": "drop_na", "column": "code"},
+     {"op": "calculate", "new_column": "unit", "expression": "total / qty"}],
+]
+
+
+def test_replay_matches_the_frame_of_every_edit(store):
+    store.save("u", mixed_frame())
+    for steps in REPLAYED_EDITS:
+        tasks.apply_pipeline("u", steps)
+        cached = store.load("u")
+        tm.assert_frame_equal(cold_load(store, "u"), cached)
+        # The stored row hashes are those of the replayed frame
+        assert (store.row_hashes("u") == row_hashes(cached)).all()
+
+
+def test_undo_and_redo_return_to_the_same_versions(store):
+    store.save("u", mixed_frame())
+    versions, frames = [store.version("u")], [store.load("u")]
+    for steps in REPLAYED_EDITS:
+        tasks.apply_pipeline("u", steps)
+        versions.append(store.version("u"))
+        frames.append(store.load("u"))
+
+    for version, frame in zip(reversed(versions[:-1]), reversed(frames[:-1])):
+        assert store.undo_step("u")
+        assert store.version("u") == version
+        tm.assert_frame_equal(cold_load(store, "u"), frame)
+    assert not store.undo_step("u")
+
+    for version, frame in zip(versions[1:], frames[1:]):
+        assert store.redo_step("u")
+        assert store.version("u") == version
+        tm.assert_frame_equal(cold_load(store, "u"), frame)
+    assert not store.redo_step("u")
+
+
+def test_new_edit_clears_redo(store):
+    store.save("u", mixed_frame())
+    tasks.apply_pipeline("u", REPLAYED_EDITS[0])
+    store.undo_step("u")
+    tasks.apply_pipeline("u", REPLAYED_EDITS[1])
+    assert not store.redo_step("u")
+    assert len(store.plan("u")) == 1
+
+
+def test_concurrent_edits_keep_every_plan_entry(store):
+    store.save("u", pd.DataFrame({"n": range(1000)}))
+    edits = [[{"op": "calculate", "new_column": f"c{i}", "expression": f"n + {i}"}] for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda steps: tasks.apply_pipeline("u", steps), edits))
+    assert len(store.plan("u")) == 8
+    assert set(cold_load(store, "u").columns) == {"n", *(f"c{i}" for i in range(8))}
+    for _ in range(8):
+        assert store.undo_step("u")
+    tm.assert_frame_equal(cold_load(store, "u"), pd.DataFrame({"n": range(1000)}))